@@ -1,17 +1,56 @@
+import argparse
+import hashlib
+import inspect
 import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Headless backend: plots are rendered in worker processes without a display
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
-from pathlib import Path
+
+from src.analysis.results_store import ResultsStore, columns_to_rows, select_rows, summarize_bot
 
 plt.style.use('seaborn-v0_8-darkgrid')
 plt.rcParams['figure.figsize'] = (10, 6)
 plt.rcParams['font.size'] = 11
 
+RESULTS_DIR = project_root / 'results'
+HASH_MANIFEST_PATH = RESULTS_DIR / '.plot_hashes.json'
+OUTPUT_FORMATS = ['png', 'pdf', 'svg']
+
 
-def load_results():
+def load_results(run_id=None):
+    # Prefer the columnar run store written by run_tests; aggregates are computed vectorized
+    store = ResultsStore(RESULTS_DIR / 'runs')
+    if not store.run_files():
+        return load_legacy_results()
+    
+    columns = store.load_run(run_id)
+    if len(columns['run_id']) == 0:
+        raise SystemExit(f"Run '{run_id}' not found in {store.directory}")
+    
+    nlp_results = summarize_bot(columns, 'NLP')
+    llm_results = summarize_bot(columns, 'LLM')
+    nlp_results['results'] = columns_to_rows(select_rows(columns, columns['bot_type'] == 'NLP'))
+    llm_results['results'] = columns_to_rows(select_rows(columns, columns['bot_type'] == 'LLM'))
+    comparison = {'run_id': str(columns['run_id'][0]), 'nlp_bot': nlp_results, 'llm_bot': llm_results}
+    
+    return nlp_results, llm_results, comparison
+
+
+def load_legacy_results():
     # Go up to project root, then into results
-    project_root = Path(__file__).parent.parent
-    results_dir = project_root / "results"
+    results_dir = RESULTS_DIR
     
     with open(results_dir / "comparison_report.json", 'r', encoding='utf-8') as f:
         comparison = json.load(f)
@@ -28,15 +67,23 @@ def load_results():
         llm_results['results'] = llm_full
     
     nlp_results['total_keywords_found'] = sum(len(r.get('keywords_found', [])) for r in nlp_results['results'])
-    nlp_results['total_keywords_expected'] = sum(len(r.get('expected_keywords', [])) for r in nlp_results['results'])
+    nlp_results['total_keywords_expected'] = sum(len(r.get('keywords_expected', [])) for r in nlp_results['results'])
     
     llm_results['total_keywords_found'] = sum(len(r.get('keywords_found', [])) for r in llm_results['results'])
-    llm_results['total_keywords_expected'] = sum(len(r.get('expected_keywords', [])) for r in llm_results['results'])
+    llm_results['total_keywords_expected'] = sum(len(r.get('keywords_expected', [])) for r in llm_results['results'])
     
     return nlp_results, llm_results, comparison
 
 
-def plot_response_time_comparison(nlp_results, llm_results):
+def save_plot(name, output_format='png'):
+    # Save to project/results/ directory (one level up from analysis/)
+    output_path = RESULTS_DIR / f'{name}.{output_format}'
+    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    print(f"✓ Saved: {output_path.name}")
+    plt.close()
+
+
+def plot_response_time_comparison(nlp_results, llm_results, output_format='png'):
     fig, ax = plt.subplots(figsize=(10, 6))
     
     categories = ['Average', 'Minimum', 'Maximum']
@@ -73,14 +120,10 @@ def plot_response_time_comparison(nlp_results, llm_results):
                    ha='center', va='bottom', fontsize=9)
     
     plt.tight_layout()
-    # Save to project/results/ directory (one level up from analysis/)
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_response_time_comparison.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_response_time_comparison.png")
-    plt.close()
+    save_plot('plot_response_time_comparison', output_format)
 
 
-def plot_accuracy_by_category(nlp_results, llm_results):
+def plot_accuracy_by_category(nlp_results, llm_results, output_format='png'):
     fig, ax = plt.subplots(figsize=(12, 7))
     
     categories = list(nlp_results['accuracy_by_category'].keys())
@@ -111,13 +154,10 @@ def plot_accuracy_by_category(nlp_results, llm_results):
                        ha='center', va='bottom', fontsize=8)
     
     plt.tight_layout()
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_accuracy_by_category.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_accuracy_by_category.png")
-    plt.close()
+    save_plot('plot_accuracy_by_category', output_format)
 
 
-def plot_accuracy_by_difficulty(nlp_results, llm_results):
+def plot_accuracy_by_difficulty(nlp_results, llm_results, output_format='png'):
     fig, ax = plt.subplots(figsize=(10, 6))
     
     difficulties = list(nlp_results['accuracy_by_difficulty'].keys())
@@ -147,13 +187,10 @@ def plot_accuracy_by_difficulty(nlp_results, llm_results):
                    ha='center', va='bottom', fontsize=10)
     
     plt.tight_layout()
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_accuracy_by_difficulty.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_accuracy_by_difficulty.png")
-    plt.close()
+    save_plot('plot_accuracy_by_difficulty', output_format)
 
 
-def plot_overall_metrics(nlp_results, llm_results):
+def plot_overall_metrics(nlp_results, llm_results, output_format='png'):
     fig, ax = plt.subplots(figsize=(10, 6))
     
     metrics = ['Avg Relevance\nScore', 'Keyword\nMatch Rate']
@@ -189,13 +226,10 @@ def plot_overall_metrics(nlp_results, llm_results):
                    ha='center', va='bottom', fontsize=10, fontweight='bold')
     
     plt.tight_layout()
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_overall_metrics.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_overall_metrics.png")
-    plt.close()
+    save_plot('plot_overall_metrics', output_format)
 
 
-def plot_response_time_log_scale(nlp_results, llm_results):
+def plot_response_time_log_scale(nlp_results, llm_results, output_format='png'):
     fig, ax = plt.subplots(figsize=(10, 6))
     
     nlp_avg = nlp_results['avg_response_time_ms']
@@ -225,13 +259,10 @@ def plot_response_time_log_scale(nlp_results, llm_results):
             fontsize=12, fontweight='bold')
     
     plt.tight_layout()
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_response_time_log_scale.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_response_time_log_scale.png")
-    plt.close()
+    save_plot('plot_response_time_log_scale', output_format)
 
 
-def plot_success_failure_rate(nlp_results, llm_results):
+def plot_success_failure_rate(nlp_results, llm_results, output_format='png'):
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
     
     nlp_successful = sum(1 for result in nlp_results['results'] if result['relevance_score'] > 0.5)
@@ -258,13 +289,10 @@ def plot_success_failure_rate(nlp_results, llm_results):
                  fontsize=15, fontweight='bold', y=1.02)
     
     plt.tight_layout()
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_success_failure_rate.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_success_failure_rate.png")
-    plt.close()
+    save_plot('plot_success_failure_rate', output_format)
 
 
-def plot_keyword_coverage(nlp_results, llm_results):
+def plot_keyword_coverage(nlp_results, llm_results, output_format='png'):
     fig, ax = plt.subplots(figsize=(10, 6))
     
     nlp_keywords = nlp_results['total_keywords_found']
@@ -296,13 +324,10 @@ def plot_keyword_coverage(nlp_results, llm_results):
                ha='center', va='bottom', fontsize=11, fontweight='bold')
     
     plt.tight_layout()
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_keyword_coverage.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_keyword_coverage.png")
-    plt.close()
+    save_plot('plot_keyword_coverage', output_format)
 
 
-def plot_category_heatmap(nlp_results, llm_results):
+def plot_category_heatmap(nlp_results, llm_results, output_format='png'):
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
     
     categories = list(nlp_results['accuracy_by_category'].keys())
@@ -340,13 +365,10 @@ def plot_category_heatmap(nlp_results, llm_results):
     fig.suptitle('Category-wise Accuracy Comparison', fontsize=15, fontweight='bold')
     
     plt.tight_layout()
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_category_heatmap.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_category_heatmap.png")
-    plt.close()
+    save_plot('plot_category_heatmap', output_format)
 
 
-def plot_query_response_times(nlp_results, llm_results):
+def plot_query_response_times(nlp_results, llm_results, output_format='png'):
     fig, ax = plt.subplots(figsize=(14, 7))
     
     nlp_times = [r['response_time_ms'] for r in nlp_results['results']]
@@ -369,13 +391,10 @@ def plot_query_response_times(nlp_results, llm_results):
     ax.grid(True, alpha=0.3, axis='y')
     
     plt.tight_layout()
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_query_response_times.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_query_response_times.png")
-    plt.close()
+    save_plot('plot_query_response_times', output_format)
 
 
-def plot_relevance_distribution(nlp_results, llm_results):
+def plot_relevance_distribution(nlp_results, llm_results, output_format='png'):
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
     
     nlp_relevance = [r['relevance_score'] for r in nlp_results['results']]
@@ -402,45 +421,193 @@ def plot_relevance_distribution(nlp_results, llm_results):
     fig.suptitle('Relevance Score Distribution Comparison', fontsize=15, fontweight='bold', y=1.02)
     
     plt.tight_layout()
-    output_path = Path(__file__).parent.parent / 'results' / 'plot_relevance_distribution.png'
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    print("✓ Saved: plot_relevance_distribution.png")
-    plt.close()
+    save_plot('plot_relevance_distribution', output_format)
+
+
+# name -> (plot function, result keys it reads, description)
+PLOTS = {
+    'plot_response_time_comparison': (
+        plot_response_time_comparison,
+        ['avg_response_time_ms', 'min_response_time_ms', 'max_response_time_ms'],
+        'Response time comparison (bar chart)'
+    ),
+    'plot_response_time_log_scale': (
+        plot_response_time_log_scale,
+        ['avg_response_time_ms'],
+        'Response time log scale comparison'
+    ),
+    'plot_accuracy_by_category': (
+        plot_accuracy_by_category,
+        ['accuracy_by_category'],
+        'Accuracy by category (grouped bar)'
+    ),
+    'plot_accuracy_by_difficulty': (
+        plot_accuracy_by_difficulty,
+        ['accuracy_by_difficulty'],
+        'Accuracy by difficulty (grouped bar)'
+    ),
+    'plot_overall_metrics': (
+        plot_overall_metrics,
+        ['avg_relevance_score', 'keyword_match_rate'],
+        'Overall metrics comparison'
+    ),
+    'plot_success_failure_rate': (
+        plot_success_failure_rate,
+        ['results', 'total_queries'],
+        'Success/failure rate (pie charts)'
+    ),
+    'plot_keyword_coverage': (
+        plot_keyword_coverage,
+        ['total_keywords_found', 'total_keywords_expected'],
+        'Keyword coverage (stacked bar)'
+    ),
+    'plot_category_heatmap': (
+        plot_category_heatmap,
+        ['accuracy_by_category'],
+        'Category accuracy heatmap'
+    ),
+    'plot_query_response_times': (
+        plot_query_response_times,
+        ['results'],
+        'Query-specific response times'
+    ),
+    'plot_relevance_distribution': (
+        plot_relevance_distribution,
+        ['results'],
+        'Relevance score distribution (histograms)'
+    ),
+}
+
+
+def plot_inputs(name, nlp_results, llm_results):
+    # Only the keys a plot reads, so unrelated result changes don't force a re-render
+    _, keys, _ = PLOTS[name]
+    return (
+        {key: nlp_results.get(key) for key in keys},
+        {key: llm_results.get(key) for key in keys}
+    )
+
+
+def plot_content_hash(name, nlp_inputs, llm_inputs, output_format):
+    plot_fn = PLOTS[name][0]
+    payload = json.dumps(
+        {'nlp': nlp_inputs, 'llm': llm_inputs, 'format': output_format},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    digest = hashlib.sha256()
+    digest.update(payload.encode('utf-8'))
+    # Editing the plot code invalidates its cached render too
+    digest.update(inspect.getsource(plot_fn).encode('utf-8'))
+    digest.update(inspect.getsource(save_plot).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def load_hash_manifest():
+    if not HASH_MANIFEST_PATH.exists():
+        return {}
+    try:
+        with open(HASH_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_hash_manifest(manifest):
+    tmp_path = HASH_MANIFEST_PATH.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, HASH_MANIFEST_PATH)
+
+
+def render_plot(name, nlp_inputs, llm_inputs, output_format):
+    # Runs in a worker process; receives only the inputs this plot needs
+    started = time.perf_counter()
+    plot_fn = PLOTS[name][0]
+    plot_fn(nlp_inputs, llm_inputs, output_format)
+    return name, (time.perf_counter() - started) * 1000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate comparison plots from the results/ directory")
+    parser.add_argument('--only', nargs='+', choices=list(PLOTS.keys()), metavar='PLOT',
+                        help=f"Render only these plots (choices: {', '.join(PLOTS.keys())})")
+    parser.add_argument('--format', dest='output_format', choices=OUTPUT_FORMATS, default='png',
+                        help="Output file format")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes used for rendering")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-render plots even if their inputs are unchanged")
+    parser.add_argument('--run', dest='run_id', default=None,
+                        help="Run id from results/runs/ to plot (default: the latest run)")
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
+    
     print("Loading test results...")
-    nlp_results, llm_results, comparison = load_results()
+    nlp_results, llm_results, comparison = load_results(args.run_id)
+    
+    selected = args.only or list(PLOTS.keys())
+    manifest = load_hash_manifest()
+    
+    pending = {}
+    skipped = []
+    for name in selected:
+        nlp_inputs, llm_inputs = plot_inputs(name, nlp_results, llm_results)
+        content_hash = plot_content_hash(name, nlp_inputs, llm_inputs, args.output_format)
+        output_key = f'{name}.{args.output_format}'
+        output_path = RESULTS_DIR / output_key
+        if not args.force and manifest.get(output_key) == content_hash and output_path.exists():
+            skipped.append(output_key)
+            continue
+        pending[name] = (nlp_inputs, llm_inputs, content_hash)
     
     print("\nGenerating plots...")
     print("=" * 60)
     
-    plot_response_time_comparison(nlp_results, llm_results)
-    plot_response_time_log_scale(nlp_results, llm_results)
-    plot_accuracy_by_category(nlp_results, llm_results)
-    plot_accuracy_by_difficulty(nlp_results, llm_results)
-    plot_overall_metrics(nlp_results, llm_results)
-    plot_success_failure_rate(nlp_results, llm_results)
-    plot_keyword_coverage(nlp_results, llm_results)
-    plot_category_heatmap(nlp_results, llm_results)
-    plot_query_response_times(nlp_results, llm_results)
-    plot_relevance_distribution(nlp_results, llm_results)
+    for output_key in skipped:
+        print(f"= Unchanged: {output_key}")
+    
+    started = time.perf_counter()
+    failures = []
+    if pending:
+        jobs = max(1, min(args.jobs, len(pending)))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(render_plot, name, nlp_inputs, llm_inputs, args.output_format): name
+                for name, (nlp_inputs, llm_inputs, _) in pending.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                output_key = f'{name}.{args.output_format}'
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"✗ Failed: {output_key} ({e})")
+                    manifest.pop(output_key, None)
+                    failures.append(name)
+                    continue
+                manifest[output_key] = pending[name][2]
+        save_hash_manifest(manifest)
+    elapsed_s = time.perf_counter() - started
     
     print("=" * 60)
-    print(f"\n✅ All plots generated successfully!")
+    rendered = len(pending) - len(failures)
+    if failures:
+        print(f"\n⚠️  {len(failures)} plot(s) failed: {', '.join(failures)}")
+    else:
+        print(f"\n✅ All plots generated successfully!")
     print(f"📁 Saved to: results/ directory")
-    print(f"📊 Total plots: 10")
+    print(f"📊 Rendered: {rendered}, unchanged: {len(skipped)} ({elapsed_s:.1f}s)")
     print("\nPlots generated:")
-    print("  1. Response time comparison (bar chart)")
-    print("  2. Response time log scale comparison")
-    print("  3. Accuracy by category (grouped bar)")
-    print("  4. Accuracy by difficulty (grouped bar)")
-    print("  5. Overall metrics comparison")
-    print("  6. Success/failure rate (pie charts)")
-    print("  7. Keyword coverage (stacked bar)")
-    print("  8. Category accuracy heatmap")
-    print("  9. Query-specific response times")
-    print(" 10. Relevance score distribution (histograms)")
+    for index, name in enumerate(selected, 1):
+        print(f"{index:>3}. {PLOTS[name][2]}")
+    
+    if failures:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
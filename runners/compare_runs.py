@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Compare evaluation runs recorded by run_tests.py
+Tests per-query latency and relevance with a Mann-Whitney U test and flags regressions
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.analysis.results_store import ResultsStore
+from src.analysis.run_history import RunHistory
+
+RUNS_DIR = project_root / "results" / "runs"
+
+
+def print_runs(history: RunHistory):
+    print(f"{'run_id':<24} {'commit':<16} {'model':<14} {'corpus':<17} {'prompt':<17} {'conc':>4} {'results':>7}")
+    for run in history.list_runs():
+        print(
+            f"{run.run_id:<24} {run.git_commit:<16} {run.model:<14} {run.corpus_hash:<17} "
+            f"{run.prompt_hash:<17} {run.concurrency:>4} {run.result_count:>7}"
+        )
+
+
+def format_change(comparison) -> str:
+    if comparison.metric == "response_time_ms":
+        return f"{comparison.change * 100:+.1f}% median"
+    return f"{comparison.change:+.3f} mean"
+
+
+def print_comparison(history: RunHistory, baseline_ids, candidate_ids, comparisons):
+    print("=" * 80)
+    print(f"Baseline:  {', '.join(baseline_ids)}")
+    print(f"Candidate: {', '.join(candidate_ids)}")
+    print("=" * 80)
+    
+    differences = history.metadata_differences(baseline_ids, candidate_ids)
+    for name, (baseline_value, candidate_value) in differences.items():
+        print(f"  ⚠️  {name} differs: {baseline_value or '-'} → {candidate_value or '-'}")
+    if differences:
+        print()
+    
+    for comparison in comparisons:
+        if comparison.regression:
+            flag = "REGRESSION"
+        elif comparison.improvement:
+            flag = "improved"
+        else:
+            flag = "no significant change"
+        print(
+            f"  {comparison.bot_type:<4} {comparison.metric:<17} "
+            f"median {comparison.baseline_median:9.3f} → {comparison.candidate_median:9.3f} | "
+            f"{format_change(comparison):<16} | p={comparison.p_value:.4f} "
+            f"(n={comparison.baseline_n}/{comparison.candidate_n}) | {flag}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare evaluation runs and flag regressions")
+    parser.add_argument("--list", action="store_true", help="List recorded runs and exit")
+    parser.add_argument("--baseline", nargs="+", help="Baseline run id(s), pooled (default: the previous run)")
+    parser.add_argument("--candidate", nargs="+", help="Candidate run id(s), pooled (default: the latest run)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level")
+    parser.add_argument("--min-latency-change", type=float, default=0.10,
+                        help="Smallest relative change of the median latency that is flagged")
+    parser.add_argument("--min-relevance-change", type=float, default=0.05,
+                        help="Smallest absolute change of the mean relevance that is flagged")
+    parser.add_argument("--json", action="store_true", help="Print the comparison as JSON")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if a regression is flagged")
+    args = parser.parse_args()
+    
+    history = RunHistory(ResultsStore(RUNS_DIR))
+    if args.list:
+        print_runs(history)
+        return
+    
+    baseline_ids, candidate_ids = args.baseline, args.candidate
+    if baseline_ids is None or candidate_ids is None:
+        defaults = history.default_comparison_runs()
+        if defaults is None:
+            parser.error("At least two recorded runs are needed; run runners/run_tests.py again")
+        baseline_ids = baseline_ids or defaults[0]
+        candidate_ids = candidate_ids or defaults[1]
+    
+    known = {run.run_id for run in history.list_runs()}
+    unknown = [run_id for run_id in baseline_ids + candidate_ids if run_id not in known]
+    if unknown:
+        parser.error(f"Unknown run ids: {', '.join(unknown)}")
+    
+    comparisons = history.compare(
+        baseline_ids,
+        candidate_ids,
+        alpha=args.alpha,
+        min_latency_change=args.min_latency_change,
+        min_relevance_change=args.min_relevance_change
+    )
+    
+    if args.json:
+        print(json.dumps({
+            "baseline": baseline_ids,
+            "candidate": candidate_ids,
+            "metadata_differences": history.metadata_differences(baseline_ids, candidate_ids),
+            "comparisons": [comparison.to_dict() for comparison in comparisons]
+        }, indent=2))
+    else:
+        print_comparison(history, baseline_ids, candidate_ids, comparisons)
+    
+    if args.fail_on_regression and any(comparison.regression for comparison in comparisons):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
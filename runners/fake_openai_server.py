@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI Responses API
+Answers POST /v1/responses after a fixed delay and counts upstream requests,
+so client behaviour can be measured without network access or billing
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _BurstHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The listen backlog must absorb bursts of simultaneous connections
+    request_queue_size = 1024
+
+
+class FakeOpenAIServer:
+    def __init__(self, latency_seconds: float = 0.05, answer: str = "¡Hola! ¿Qué se te antoja hoy? 🍽️", port: int = 0):
+        self.latency_seconds = latency_seconds
+        self.answer = answer
+        self.request_count = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = _BurstHTTPServer(("127.0.0.1", port), self._build_handler())
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+    
+    def _build_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                self.rfile.read(length)
+                with server._lock:
+                    server.request_count += 1
+                    response_id = next(server._ids)
+                time.sleep(server.latency_seconds)
+                
+                body = json.dumps(server.build_response(response_id)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        return Handler
+    
+    def build_response(self, response_id: int) -> dict:
+        return {
+            "id": f"resp_{response_id}",
+            "object": "response",
+            "created_at": int(time.time()),
+            "status": "completed",
+            "model": "fake-model",
+            "output": [{
+                "type": "message",
+                "id": f"msg_{response_id}",
+                "status": "completed",
+                "role": "assistant",
+                "content": [{"type": "output_text", "text": self.answer, "annotations": []}]
+            }],
+            "parallel_tool_calls": False,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": 120,
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": 24,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": 144
+            }
+        }
+    
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI Responses API server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    args = parser.parse_args()
+    
+    server = FakeOpenAIServer(latency_seconds=args.latency_ms / 1000, port=args.port)
+    print(f"Fake OpenAI server on {server.url} (set OPENAI_BASE_URL to this)")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Telegram Bot API
+Answers getMe, getUpdates and sendMessage with per-chat and global flood limits (429 with
+retry_after, like Telegram), so the bots' outbound queue can be tested without network access.
+push_message() queues an incoming user message for the next getUpdates call
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+class _BurstHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class _Window:
+    # Sliding one-second window of accepted sends
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.times: List[float] = []
+    
+    def has_room(self, now: float) -> bool:
+        self.times = [sent for sent in self.times if now - sent < 1.0]
+        return len(self.times) < self.limit
+
+
+class FakeTelegramServer:
+    def __init__(
+        self,
+        latency_seconds: float = 0.03,
+        global_limit: int = 30,
+        chat_limit: int = 1,
+        retry_after: int = 1,
+        port: int = 0
+    ):
+        self.latency_seconds = latency_seconds
+        self.global_limit = global_limit
+        self.chat_limit = chat_limit
+        self.retry_after = retry_after
+        self.sent: List[Tuple[float, int, str]] = []
+        self.too_many_requests = 0
+        self.too_long = 0
+        self._global = _Window(global_limit)
+        self._chats: Dict[int, _Window] = {}
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._updates: List[dict] = []
+        self._lock = threading.Lock()
+        self._new_updates = threading.Condition(self._lock)
+        self._server = _BurstHTTPServer(("127.0.0.1", port), self._build_handler())
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def _build_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                raw = self.rfile.read(length).decode("utf-8")
+                if self.headers.get("content-type", "").startswith("application/json"):
+                    params = json.loads(raw or "{}")
+                else:
+                    params = {key: values[0] for key, values in parse_qs(raw).items()}
+                # Paths look like /bot<token>/<method>
+                method = urlparse(self.path).path.rstrip("/").rsplit("/", 1)[-1]
+                status, body = server.handle(method, params)
+                
+                payload = json.dumps(body).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("content-type", "application/json")
+                    self.send_header("content-length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # A client that stopped while long polling
+                    pass
+            
+            do_GET = do_POST
+        
+        return Handler
+    
+    def handle(self, method: str, params: dict) -> Tuple[int, dict]:
+        if method == "getMe":
+            return 200, {"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "Stub", "username": "stub_bot",
+                "can_join_groups": True, "can_read_all_group_messages": False, "supports_inline_queries": False
+            }}
+        if method == "getUpdates":
+            return 200, {"ok": True, "result": self.get_updates(
+                int(params.get("offset", 0) or 0),
+                int(params.get("limit", 100) or 100),
+                min(float(params.get("timeout", 0) or 0), 0.5)
+            )}
+        if method in ("deleteWebhook", "close", "logOut", "setMyCommands"):
+            return 200, {"ok": True, "result": True}
+        if method == "sendMessage":
+            return self.send_message(int(params["chat_id"]), params.get("text", ""))
+        return 404, {"ok": False, "error_code": 404, "description": "Not Found: method not found"}
+    
+    def push_message(self, user_id: int, text: str, chat_id: int = None):
+        # An incoming private message from `user_id`, delivered by the next getUpdates
+        chat_id = user_id if chat_id is None else chat_id
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"},
+            "text": text
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        with self._new_updates:
+            self._updates.append({"update_id": next(self._update_ids), "message": message})
+            self._new_updates.notify_all()
+    
+    def get_updates(self, offset: int, limit: int, timeout: float) -> List[dict]:
+        # Long polling: updates from `offset` on are confirmed by the next call and then dropped
+        with self._new_updates:
+            self._updates = [update for update in self._updates if update["update_id"] >= offset]
+            if not self._updates and timeout:
+                self._new_updates.wait(timeout)
+            return self._updates[:limit]
+    
+    def send_message(self, chat_id: int, text: str) -> Tuple[int, dict]:
+        time.sleep(self.latency_seconds)
+        now = time.monotonic()
+        if len(text.encode("utf-16-le")) // 2 > TELEGRAM_MESSAGE_LIMIT:
+            with self._lock:
+                self.too_long += 1
+            return 400, {"ok": False, "error_code": 400, "description": "Bad Request: message is too long"}
+        
+        with self._lock:
+            chat_window = self._chats.setdefault(chat_id, _Window(self.chat_limit))
+            if not (self._global.has_room(now) and chat_window.has_room(now)):
+                self.too_many_requests += 1
+                return 429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after}
+                }
+            self._global.times.append(now)
+            chat_window.times.append(now)
+            self.sent.append((now, chat_id, text))
+            message_id = next(self._message_ids)
+        
+        return 200, {"ok": True, "result": {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text
+        }}
+    
+    def start(self) -> "FakeTelegramServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self) -> "FakeTelegramServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Telegram Bot API server")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=30)
+    parser.add_argument("--global-limit", type=int, default=30, help="sendMessage calls per second")
+    parser.add_argument("--chat-limit", type=int, default=1, help="sendMessage calls per second and chat")
+    args = parser.parse_args()
+    
+    server = FakeTelegramServer(
+        latency_seconds=args.latency_ms / 1000,
+        global_limit=args.global_limit,
+        chat_limit=args.chat_limit,
+        port=args.port
+    )
+    print(f"Fake Telegram Bot API on {server.url} (set TELEGRAM_BASE_URL to this)")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1234 @@
+#!/usr/bin/env python3
+"""
+Offline performance benchmarks for the NLP and LLM engines
+Run a single benchmark by name, or all of them when none is given
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from src.analysis.metrics_calculator import MetricsCalculator, QueryResult
+from src.common.resources import CORPUS_PATH, SYSTEM_PROMPT_PATH
+from src.nlp_bot.nlp_engine import CorpusEntry, NLPEngine, iter_corpus_entries, load_corpus_from_json
+from src.nlp_bot.text_normalizer import get_tokenizer_cache_info
+
+TEST_QUERIES_PATH = project_root / "tests" / "test_queries.json"
+
+# Benchmarks against the OpenAI API are billed, so they cap the number of passes
+LLM_MAX_ROUNDS = 3
+
+
+def load_test_queries() -> List[dict]:
+    with open(TEST_QUERIES_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data['test_queries']
+
+
+def build_synthetic_corpus(size: int, seed: int = 7) -> List[CorpusEntry]:
+    # Scales the real corpus by recombining its vocabulary into new Q&A pairs
+    base = load_corpus_from_json(CORPUS_PATH)
+    vocabulary = sorted({word for entry in base for word in (entry.question + " " + entry.answer).split()})
+    categories = sorted({entry.category for entry in base})
+    rng = np.random.default_rng(seed)
+    
+    n_new = max(0, size - len(base))
+    question_lengths = rng.integers(3, 9, size=n_new)
+    answer_lengths = rng.integers(15, 40, size=n_new)
+    question_words = rng.integers(0, len(vocabulary), size=question_lengths.sum()).tolist()
+    answer_words = rng.integers(0, len(vocabulary), size=answer_lengths.sum()).tolist()
+    entry_categories = rng.integers(0, len(categories), size=n_new).tolist()
+    
+    corpus = list(base)
+    q_pos = a_pos = 0
+    for q_len, a_len, category_idx in zip(question_lengths.tolist(), answer_lengths.tolist(), entry_categories):
+        corpus.append(
+            CorpusEntry(
+                question=" ".join([vocabulary[i] for i in question_words[q_pos:q_pos + q_len]]),
+                answer=" ".join([vocabulary[i] for i in answer_words[a_pos:a_pos + a_len]]),
+                category=categories[category_idx]
+            )
+        )
+        q_pos += q_len
+        a_pos += a_len
+    return corpus[:size]
+
+
+def write_synthetic_corpus(file_path: Path, size: int):
+    corpus = build_synthetic_corpus(size)
+    qa_pairs = [{"question": e.question, "answer": e.answer, "category": e.category} for e in corpus]
+    
+    with open(file_path, 'w', encoding='utf-8') as f:
+        if file_path.suffix == ".jsonl":
+            for qa in qa_pairs:
+                f.write(json.dumps(qa, ensure_ascii=False) + "\n")
+        else:
+            json.dump({"business_name": "Sabores de Bogotá", "qa_pairs": qa_pairs}, f, ensure_ascii=False, indent=2)
+
+
+def measure_peak_memory(build: Callable[[], object]) -> Tuple[object, float, float]:
+    gc.collect()
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = build()
+    elapsed_s = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / (1024 * 1024), elapsed_s
+
+
+def summarize_latencies(latencies_ms: List[float]) -> Dict[str, float]:
+    values = np.asarray(latencies_ms)
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "max_ms": float(values.max())
+    }
+
+
+def print_latency_row(label: str, summary: Dict[str, float]):
+    print(
+        f"  {label:<28} mean {summary['mean_ms']:.4f}ms | "
+        f"p50 {summary['p50_ms']:.4f}ms | p95 {summary['p95_ms']:.4f}ms | "
+        f"max {summary['max_ms']:.4f}ms"
+    )
+
+
+def time_queries(find: Callable[[str], object], queries: List[str], rounds: int) -> List[float]:
+    latencies = []
+    for _ in range(rounds):
+        for query in queries:
+            start_time = time.perf_counter()
+            find(query)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+    return latencies
+
+
+def benchmark_query_cache(rounds: int):
+    print("\n" + "=" * 80)
+    print("find_best_match latency: baseline vs fast normalization + query cache")
+    print("=" * 80)
+    
+    corpus = load_corpus_from_json(CORPUS_PATH)
+    queries = [q['query'] for q in load_test_queries()]
+    
+    baseline = NLPEngine(corpus, query_cache_size=0, fast_normalization=False)
+    normalized = NLPEngine(corpus, query_cache_size=0, fast_normalization=True)
+    cached = NLPEngine(corpus, query_cache_size=1024, fast_normalization=True)
+    
+    mismatches = sum(
+        1 for q in queries
+        if baseline.find_best_match(q)[0] != cached.find_best_match(q)[0]
+    )
+    
+    print_latency_row("baseline", summarize_latencies(time_queries(baseline.find_best_match, queries, rounds)))
+    print_latency_row("fast normalization", summarize_latencies(time_queries(normalized.find_best_match, queries, rounds)))
+    print_latency_row("fast normalization + cache", summarize_latencies(time_queries(cached.find_best_match, queries, rounds)))
+    
+    print(f"\n  Query cache: {cached.get_cache_stats().to_dict()}")
+    print(f"  Tokenizer cache: {get_tokenizer_cache_info()}")
+    print(f"  Answer mismatches vs baseline: {mismatches}/{len(queries)}")
+
+
+def keyword_recall(engine, test_queries: List[dict]) -> float:
+    calculator = MetricsCalculator()
+    recalls = []
+    for query_data in test_queries:
+        answer, _ = engine.find_best_match(query_data['query'])
+        found = calculator.calculate_keyword_matches(answer or "", query_data['expected_keywords'])
+        recalls.append(len(found) / len(query_data['expected_keywords']))
+    return float(np.mean(recalls))
+
+
+def benchmark_dense_retrieval(rounds: int):
+    print("\n" + "=" * 80)
+    print("Dense retrieval vs TF-IDF: keyword recall and latency")
+    print("=" * 80)
+    
+    model_path = os.getenv("EMBEDDING_MODEL_PATH")
+    if not model_path:
+        print("  Skipped: set EMBEDDING_MODEL_PATH to a local sentence-transformers model")
+        return
+    
+    from src.nlp_bot.dense_engine import DenseEngine
+    from src.nlp_bot.embeddings import SentenceEmbedder
+    
+    corpus = load_corpus_from_json(CORPUS_PATH)
+    test_queries = load_test_queries()
+    queries = [q['query'] for q in test_queries]
+    embedder = SentenceEmbedder(Path(model_path))
+    
+    engines = {"tfidf": NLPEngine(corpus, query_cache_size=0)}
+    for index_type in ("exact", "ivf"):
+        for quantization in ("float16", "int8"):
+            engines[f"dense-{index_type}-{quantization}"] = DenseEngine(
+                corpus, embedder, index_type=index_type,
+                quantization=quantization, query_cache_size=0
+            )
+    
+    for name, engine in engines.items():
+        summary = summarize_latencies(time_queries(engine.find_best_match, queries, rounds))
+        print_latency_row(name, summary)
+        print(f"  {'':<28} keyword recall {keyword_recall(engine, test_queries):.3f}")
+    
+    exact, ivf = engines["dense-exact-float16"], engines["dense-ivf-float16"]
+    overlaps = [
+        len({c.corpus_index for c in exact.find_top_k(q, k=3).candidates}
+            & {c.corpus_index for c in ivf.find_top_k(q, k=3).candidates}) / 3
+        for q in queries
+    ]
+    print(f"\n  IVF recall@3 vs exact search: {np.mean(overlaps):.3f}")
+
+
+def benchmark_hybrid_fusion(rounds: int):
+    print("\n" + "=" * 80)
+    print("Hybrid lexical + dense fusion: stage latency breakdown and batching")
+    print("=" * 80)
+    
+    model_path = os.getenv("EMBEDDING_MODEL_PATH")
+    if not model_path:
+        print("  Skipped: set EMBEDDING_MODEL_PATH to a local sentence-transformers model")
+        return
+    
+    import asyncio
+    from src.nlp_bot.dense_engine import DenseEngine
+    from src.nlp_bot.embeddings import SentenceEmbedder
+    from src.nlp_bot.hybrid_engine import HybridEngine
+    
+    corpus = load_corpus_from_json(CORPUS_PATH)
+    test_queries = load_test_queries()
+    queries = [q['query'] for q in test_queries]
+    embedder = SentenceEmbedder(Path(model_path))
+    
+    for fusion in ("rrf", "weighted"):
+        engine = HybridEngine(
+            NLPEngine(corpus, query_cache_size=0),
+            DenseEngine(corpus, embedder, query_cache_size=0),
+            fusion=fusion
+        )
+        
+        async def burst():
+            # Every round sends the whole query set at once, as concurrent users would
+            stage_rows = []
+            for _ in range(rounds):
+                results = await asyncio.gather(*(engine.find_top_k_async(q, k=1) for q in queries))
+                stage_rows.extend(r.timings.to_dict() for r in results)
+            return stage_rows
+        
+        stage_rows = asyncio.run(burst())
+        print(f"\n  [{fusion}] keyword recall {keyword_recall(engine, test_queries):.3f}")
+        for stage in ("lexical_ms", "embedding_ms", "dense_search_ms", "fusion_ms", "total_ms"):
+            print_latency_row(stage, summarize_latencies([row[stage] for row in stage_rows]))
+        print(f"  Embedding batches: {engine.batcher.get_stats()}")
+
+
+def benchmark_sharded_index(rounds: int):
+    print("\n" + "=" * 80)
+    print("Sharded index vs single matrix on a synthetic 200k-entry corpus")
+    print("=" * 80)
+    
+    from src.nlp_bot.sharded_index import ShardedNLPIndex
+    
+    corpus = build_synthetic_corpus(200_000)
+    queries = [q['query'] for q in load_test_queries()]
+    rounds = max(1, rounds // 20)
+    
+    start_time = time.perf_counter()
+    single = NLPEngine(corpus, query_cache_size=0)
+    print(f"  Single matrix build: {time.perf_counter() - start_time:.2f}s")
+    print_latency_row("single matrix", summarize_latencies(time_queries(single.find_best_match, queries, rounds)))
+    
+    for partition_by, n_hash_shards in (("category", 0), ("hash", 8)):
+        start_time = time.perf_counter()
+        sharded = ShardedNLPIndex(corpus, partition_by=partition_by, n_hash_shards=n_hash_shards or 4, query_cache_size=0)
+        build_s = time.perf_counter() - start_time
+        
+        shard_id = next(iter(sharded.shards))
+        start_time = time.perf_counter()
+        sharded.rebuild_shard(shard_id)
+        rebuild_s = time.perf_counter() - start_time
+        
+        mismatches = sum(1 for q in queries if single.find_best_match(q)[0] != sharded.find_best_match(q)[0])
+        label = f"sharded by {partition_by} ({len(sharded.shards)})"
+        print(f"\n  {label}: build {build_s:.2f}s | single shard rebuild {rebuild_s:.2f}s | mismatches {mismatches}")
+        print_latency_row(label, summarize_latencies(time_queries(sharded.find_best_match, queries, rounds)))
+
+
+def benchmark_incremental_updates(rounds: int):
+    print("\n" + "=" * 80)
+    print("Incremental add/update/delete vs full TF-IDF refit on a synthetic 100k corpus")
+    print("=" * 80)
+    
+    from src.nlp_bot.nlp_engine import IncrementalNLPEngine
+    
+    corpus = build_synthetic_corpus(100_000)
+    new_entries = build_synthetic_corpus(100_000 + rounds, seed=11)[-rounds:]
+    
+    start_time = time.perf_counter()
+    NLPEngine(corpus + new_entries[:1], query_cache_size=0)
+    print(f"  Full refit for one new entry: {(time.perf_counter() - start_time) * 1000:.1f}ms")
+    
+    engine = IncrementalNLPEngine(corpus, renormalize_every=10 ** 9)
+    
+    operations = {"add": [], "update": [], "delete": []}
+    added_ids = []
+    for entry in new_entries:
+        start_time = time.perf_counter()
+        added_ids.append(engine.add(entry))
+        operations["add"].append((time.perf_counter() - start_time) * 1000)
+    for entry_id, entry in zip(added_ids, reversed(new_entries)):
+        start_time = time.perf_counter()
+        engine.update(entry_id, entry)
+        operations["update"].append((time.perf_counter() - start_time) * 1000)
+    for entry_id in added_ids:
+        start_time = time.perf_counter()
+        engine.delete(entry_id)
+        operations["delete"].append((time.perf_counter() - start_time) * 1000)
+    
+    for name, latencies in operations.items():
+        print_latency_row(f"incremental {name}", summarize_latencies(latencies))
+    
+    start_time = time.perf_counter()
+    engine.renormalize()
+    print(f"  Periodic renormalization: {(time.perf_counter() - start_time) * 1000:.1f}ms")
+
+
+def benchmark_streaming_loader(rounds: int):
+    print("\n" + "=" * 80)
+    print("Peak memory: eager json.load vs streaming loader with out-of-line answers")
+    print("=" * 80)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        json_path = tmp_path / "corpus.json"
+        jsonl_path = tmp_path / "corpus.jsonl"
+        write_synthetic_corpus(json_path, 200_000)
+        write_synthetic_corpus(jsonl_path, 200_000)
+        print(f"  Corpus file: {json_path.stat().st_size / (1024 * 1024):.1f} MiB (200k entries)")
+        
+        builds = {
+            "eager json.load": lambda: NLPEngine(load_corpus_from_json(json_path), query_cache_size=0),
+            "streaming JSON": lambda: NLPEngine.from_stream(
+                iter_corpus_entries(json_path), tmp_path / "store-json", query_cache_size=0
+            ),
+            "streaming JSON Lines": lambda: NLPEngine.from_stream(
+                iter_corpus_entries(jsonl_path), tmp_path / "store-jsonl", query_cache_size=0
+            ),
+        }
+        
+        for label, build in builds.items():
+            engine, peak_mib, elapsed_s = measure_peak_memory(build)
+            print(f"  {label:<28} peak {peak_mib:8.1f} MiB | build {elapsed_s:.2f}s")
+            del engine
+
+
+def measure_retained_memory(build: Callable[[], object]) -> Tuple[object, float]:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / (1024 * 1024)
+
+
+def benchmark_answer_store(rounds: int):
+    print("\n" + "=" * 80)
+    print("Retained heap: answers in RAM vs memory-mapped answer store")
+    print("=" * 80)
+    
+    queries = [q['query'] for q in load_test_queries()]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in (50_000, 200_000):
+            print(f"\n  Corpus size: {size}")
+            store_dir = Path(tmp_dir) / f"store-{size}"
+            
+            builds = {
+                "answers in RAM": lambda: NLPEngine(build_synthetic_corpus(size), query_cache_size=0),
+                "mmap answer store": lambda: NLPEngine(
+                    build_synthetic_corpus(size), query_cache_size=0, answer_store_dir=store_dir
+                ),
+            }
+            for label, build in builds.items():
+                engine, retained_mib = measure_retained_memory(build)
+                print(f"  {label:<28} retained {retained_mib:8.1f} MiB")
+            
+            # Popular answers dominate real traffic: sample corpus rows with a Zipf law
+            rng = np.random.default_rng(3)
+            answer_ids = np.minimum(rng.zipf(1.3, size=rounds * 50), size) - 1
+            latencies = []
+            for answer_id in answer_ids:
+                start_time = time.perf_counter()
+                engine.get_answer(int(answer_id))
+                latencies.append((time.perf_counter() - start_time) * 1000)
+            print_latency_row("answer lookup (zipf)", summarize_latencies(latencies))
+            print(f"  Answer cache: {engine.get_answer_cache_stats().to_dict()}")
+            print_latency_row("find_best_match", summarize_latencies(time_queries(engine.find_best_match, queries, 5)))
+            engine.answer_store.close()
+            del engine
+
+
+def benchmark_hashing_engine(rounds: int):
+    print("\n" + "=" * 80)
+    print("Memory and accuracy: TfidfVectorizer (float64) vs hashed float32 engine")
+    print("=" * 80)
+    
+    from src.nlp_bot.hashing_engine import HashingNLPEngine
+    
+    configurations = {
+        "tfidf (vocabulary, float64)": lambda corpus: NLPEngine(corpus, query_cache_size=0),
+        "hashing 2^18": lambda corpus: HashingNLPEngine(corpus, query_cache_size=0),
+        "hashing 2^18, bigram df>=2": lambda corpus: HashingNLPEngine(corpus, query_cache_size=0, min_bigram_df=2),
+        "hashing 2^16, bigram df>=2": lambda corpus: HashingNLPEngine(
+            corpus, query_cache_size=0, n_features=2 ** 16, n_bigram_features=2 ** 16, min_bigram_df=2
+        ),
+    }
+    
+    test_queries = load_test_queries()
+    queries = [q['query'] for q in test_queries]
+    corpus = load_corpus_from_json(CORPUS_PATH)
+    baseline = NLPEngine(corpus, query_cache_size=0)
+    
+    print("\n  Accuracy on tests/test_queries.json (real corpus)")
+    for label, build in configurations.items():
+        engine = build(corpus)
+        agreement = sum(1 for q in queries if engine.find_best_match(q)[0] == baseline.find_best_match(q)[0])
+        print(f"  {label:<28} keyword recall {keyword_recall(engine, test_queries):.3f} | same answer as tfidf {agreement}/{len(queries)}")
+    
+    print("\n  Retained memory on a synthetic 200k-entry corpus")
+    large_corpus = build_synthetic_corpus(200_000)
+    for label, build in configurations.items():
+        engine, retained_mib = measure_retained_memory(lambda: build(large_corpus))
+        matrix = engine.tfidf_matrix
+        matrix_mib = (matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes) / (1024 * 1024)
+        latency = summarize_latencies(time_queries(engine.find_best_match, queries, 3))
+        print(
+            f"  {label:<28} retained {retained_mib:7.1f} MiB | matrix {matrix_mib:6.1f} MiB "
+            f"({matrix.dtype}, {matrix.indices.dtype}) | mean query {latency['mean_ms']:.2f}ms"
+        )
+        del engine
+
+
+def build_synthetic_results(n_runs: int, seed: int = 11) -> List[List[QueryResult]]:
+    test_queries = load_test_queries()
+    rng = np.random.default_rng(seed)
+    runs = []
+    for _ in range(n_runs):
+        results = []
+        for query in test_queries:
+            for bot_type in ("NLP", "LLM"):
+                keywords = query.get('expected_keywords', [])
+                found = [k for k in keywords if rng.random() < 0.5]
+                results.append(QueryResult(
+                    query_id=query['id'],
+                    query_text=query['query'],
+                    response_text="respuesta " * 20,
+                    response_time_ms=float(rng.gamma(2.0, 40.0 if bot_type == "NLP" else 900.0)),
+                    bot_type=bot_type,
+                    timestamp="2026-01-01T00:00:00",
+                    keywords_found=found,
+                    keywords_expected=keywords,
+                    relevance_score=len(found) / len(keywords) if keywords else 1.0,
+                    category=query['category'],
+                    difficulty=query['difficulty']
+                ))
+        runs.append(results)
+    return runs
+
+
+def benchmark_results_store(rounds: int):
+    print("\n" + "=" * 80)
+    print("Loading and aggregating evaluation runs: JSON arrays vs columnar store")
+    print("=" * 80)
+    
+    from src.analysis.results_store import NPZ, PARQUET, ResultsStore, parquet_available, summarize_bot
+    
+    n_runs = 2000
+    runs = build_synthetic_results(n_runs)
+    print(f"  {n_runs} runs, {sum(len(run) for run in runs)} results")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        json_dir = tmp_path / "json"
+        json_dir.mkdir()
+        for index, run in enumerate(runs):
+            calculator = MetricsCalculator()
+            calculator.results = run
+            calculator.save_results_to_json(json_dir / f"run-{index:05d}.json")
+        
+        def load_json():
+            # The previous path: parse every indented array and aggregate in Python loops
+            rows = []
+            for path in sorted(json_dir.iterdir()):
+                with open(path, 'r', encoding='utf-8') as f:
+                    rows.extend(json.load(f))
+            calculator = MetricsCalculator()
+            calculator.results = [QueryResult(**row) for row in rows]
+            return calculator.calculate_bot_metrics("LLM").accuracy_by_category
+        
+        loaders = {"indented JSON + Python loops": load_json}
+        formats = [NPZ] + ([PARQUET] if parquet_available() else [])
+        for store_format in formats:
+            store = ResultsStore(tmp_path / store_format, store_format, compact_threshold=0)
+            for index, run in enumerate(runs):
+                store.append_run(run, run_id=f"{index:05d}")
+            loaders[f"{store_format}, file per run"] = lambda store=store: summarize_bot(store.load(), "LLM")["accuracy_by_category"]
+            
+            compacted = ResultsStore(tmp_path / f"{store_format}-compacted", store_format)
+            start_time = time.perf_counter()
+            for index, run in enumerate(runs):
+                compacted.append_run(run, run_id=f"{index:05d}")
+            print(f"  {store_format} appends with auto-compaction: {(time.perf_counter() - start_time):.1f}s total")
+            size_mb = sum(path.stat().st_size for path in compacted.run_files()) / 1e6
+            print(f"  {store_format} compacted size on disk: {size_mb:.2f}MB")
+            loaders[f"{store_format}, auto-compacted"] = lambda store=compacted: summarize_bot(store.load(), "LLM")["accuracy_by_category"]
+        
+        reference = None
+        for label, load in loaders.items():
+            latencies = []
+            for _ in range(max(1, min(rounds, 3))):
+                start_time = time.perf_counter()
+                accuracy = load()
+                latencies.append((time.perf_counter() - start_time) * 1000)
+            reference = reference or accuracy
+            same = all(abs(accuracy[key] - reference[key]) < 1e-9 for key in reference)
+            print(f"  {label:<32} load + aggregate {min(latencies):9.1f}ms | matches JSON: {same}")
+
+
+def substring_keyword_matches(response: str, expected_keywords: List[str]) -> List[str]:
+    # The previous matcher: case-insensitive substring checks, one per keyword
+    response_lower = response.lower()
+    return [keyword for keyword in expected_keywords if keyword.lower() in response_lower]
+
+
+def benchmark_keyword_matching(rounds: int):
+    print("\n" + "=" * 80)
+    print("Keyword matching: substring checks vs compiled word-boundary patterns")
+    print("=" * 80)
+    
+    from src.analysis.keyword_matcher import compile_keywords, match_keywords_batch
+    
+    test_queries = load_test_queries()
+    corpus = load_corpus_from_json(CORPUS_PATH)
+    rng = np.random.default_rng(5)
+    n_results = 50_000
+    answer_ids = rng.integers(0, len(corpus), size=n_results).tolist()
+    query_ids = rng.integers(0, len(test_queries), size=n_results).tolist()
+    
+    calculator = MetricsCalculator()
+    calculator.results = [
+        QueryResult(
+            query_id=test_queries[query_id]['id'],
+            query_text=test_queries[query_id]['query'],
+            response_text=corpus[answer_id].answer,
+            response_time_ms=0.0,
+            bot_type="NLP",
+            timestamp="",
+            keywords_expected=test_queries[query_id]['expected_keywords']
+        )
+        for answer_id, query_id in zip(answer_ids, query_ids)
+    ]
+    texts = [r.response_text for r in calculator.results]
+    keyword_sets = [r.keywords_expected for r in calculator.results]
+    print(f"  {n_results} results, {len(test_queries)} keyword sets")
+    
+    compile_keywords.cache_clear()
+    timings = {}
+    
+    start_time = time.perf_counter()
+    legacy = [substring_keyword_matches(text, keywords) for text, keywords in zip(texts, keyword_sets)]
+    timings["substring, per result"] = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    per_result = [calculator.calculate_keyword_matches(text, keywords) for text, keywords in zip(texts, keyword_sets)]
+    timings["compiled, per result"] = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    calculator.update_all_result_metrics()
+    timings["compiled, batch + scoring"] = time.perf_counter() - start_time
+    
+    # Corpus answers repeat and are folded and scanned once; LLM answers are mostly distinct
+    distinct_texts = [f"{text} #{index}" for index, text in enumerate(texts)]
+    start_time = time.perf_counter()
+    for text, keywords in zip(distinct_texts, keyword_sets):
+        substring_keyword_matches(text, keywords)
+    timings["substring, distinct texts"] = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    match_keywords_batch(distinct_texts, keyword_sets)
+    timings["compiled batch, distinct"] = time.perf_counter() - start_time
+    
+    for label, elapsed_s in timings.items():
+        print(f"  {label:<28} {elapsed_s * 1000:8.1f}ms | {n_results / elapsed_s:10.0f} results/s")
+    
+    legacy_hits = sum(len(found) for found in legacy)
+    new_hits = sum(len(found) for found in per_result)
+    only_legacy = sum(len(set(old) - set(new)) for old, new in zip(legacy, per_result))
+    only_new = sum(len(set(new) - set(old)) for old, new in zip(legacy, per_result))
+    print(f"  Keyword hits: substring {legacy_hits}, compiled {new_hits}")
+    print(f"  Substring-only hits (inside other words): {only_legacy} | compiled-only hits (accents): {only_new}")
+    print(f"  Pattern cache: {compile_keywords.cache_info()}")
+    
+    # Substring checks cost one pass per keyword, the compiled pattern one pass per text.
+    # Each query's real keywords are padded with generated restaurant-like names, which
+    # mostly don't occur, as in a large catalogue where a response mentions a few of them
+    print("\n  Scaling with keyword set size (real keywords padded with generated names)")
+    letters = np.array(list("abcdefghijlmnopqrstuvz"))
+    for set_size in (5, 25, 100):
+        sets = []
+        for query in test_queries:
+            padding = [
+                "".join(rng.choice(letters, size=int(rng.integers(4, 10))))
+                for _ in range(max(0, set_size - len(query['expected_keywords'])))
+            ]
+            sets.append((query['expected_keywords'] + padding)[:set_size])
+        sized_sets = [sets[query_id] for query_id in query_ids]
+        
+        start_time = time.perf_counter()
+        for text, keywords in zip(texts, sized_sets):
+            substring_keyword_matches(text, keywords)
+        substring_s = time.perf_counter() - start_time
+        
+        start_time = time.perf_counter()
+        match_keywords_batch(texts, sized_sets)
+        batch_s = time.perf_counter() - start_time
+        print(f"  {set_size:>4} keywords: substring {substring_s * 1000:8.1f}ms | compiled batch {batch_s * 1000:8.1f}ms")
+
+
+def load_llm_benchmark_config():
+    from src.common.config import load_llm_bot_config
+    from src.common.exceptions import ConfigurationError
+    
+    try:
+        return load_llm_bot_config()
+    except ConfigurationError as e:
+        print(f"  Skipped: {e}")
+        return None
+
+
+def benchmark_output_budgets(rounds: int):
+    print("\n" + "=" * 80)
+    print("LLM latency: fixed OPENAI_MAX_TOKENS vs per-intent output budgets")
+    print("=" * 80)
+    
+    import asyncio
+    
+    from src.common.exceptions import OpenAIError
+    from src.llm_bot.intent_classifier import OutputBudgetPolicy
+    from src.llm_bot.openai_client import OpenAIClient, load_system_prompt
+    
+    config = load_llm_benchmark_config()
+    if config is None:
+        return
+    
+    client = OpenAIClient(config)
+    system_prompt = load_system_prompt(SYSTEM_PROMPT_PATH)
+    policies = {
+        "fixed max_tokens": OutputBudgetPolicy(default_budget=config.max_tokens),
+        "per-intent budgets": OutputBudgetPolicy(default_budget=config.max_tokens, budgets=config.output_budgets),
+    }
+    queries = [q['query'] for q in load_test_queries()]
+    llm_rounds = min(rounds, LLM_MAX_ROUNDS)
+    
+    async def run_policies():
+        # One event loop for all calls: the async client's connection pool is bound to it
+        results = {}
+        for label, policy in policies.items():
+            completions, failures = [], []
+            for _ in range(llm_rounds):
+                for query in queries:
+                    _, budget = policy.select(query)
+                    messages = [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": query}
+                    ]
+                    started = time.perf_counter()
+                    try:
+                        completions.append(await client.get_completion(messages, max_output_tokens=budget))
+                    except OpenAIError:
+                        # Empty even after the retry: the user gets the error message
+                        failures.append((time.perf_counter() - started) * 1000)
+            results[label] = (completions, failures)
+        return results
+    
+    print(f"  Model: {config.model} | budgets: {config.output_budgets} | passes: {llm_rounds}")
+    for label, (completions, failures) in asyncio.run(run_policies()).items():
+        # Failed calls count towards latency too, so blank replies cannot look like a speedup
+        summary = summarize_latencies([c.total_ms for c in completions] + failures)
+        print_latency_row(label, summary)
+        total = len(completions) + len(failures)
+        print(
+            f"  {'':<28} mean output tokens {np.mean([c.output_tokens for c in completions] or [0]):.1f} | "
+            f"truncated {sum(c.truncated for c in completions)}/{total} | "
+            f"retried with a larger cap {sum(c.budget_retry for c in completions)}/{total} | "
+            f"empty {len(failures)}/{total} | "
+            f"cost/query ${np.mean([c.cost_usd for c in completions] or [0]):.8f}"
+        )
+
+
+def benchmark_prompt_dedup(rounds: int):
+    print("\n" + "=" * 80)
+    print("Singleflight: 1,000 simultaneous identical prompts against a fake OpenAI server")
+    print("=" * 80)
+    
+    import asyncio
+    
+    from runners.fake_openai_server import FakeOpenAIServer
+    from src.common.config import LLMBotConfig
+    from src.llm_bot.answer_cache import first_turn_messages
+    from src.llm_bot.openai_client import OpenAIClient, load_system_prompt
+    
+    concurrency = 1000
+    messages = first_turn_messages(load_system_prompt(SYSTEM_PROMPT_PATH), "Hola")
+    
+    async def burst(client: OpenAIClient):
+        async def timed():
+            start_time = time.perf_counter()
+            result = await client.get_completion(messages)
+            return result, (time.perf_counter() - start_time) * 1000
+        return await asyncio.gather(*(timed() for _ in range(concurrency)))
+    
+    for deduplicate in (False, True):
+        with FakeOpenAIServer(latency_seconds=0.2) as server:
+            config = LLMBotConfig(
+                token="",
+                openai_api_key="fake",
+                openai_base_url=server.url,
+                model="gpt-5-nano",
+                deduplicate_prompts=deduplicate
+            )
+            client = OpenAIClient(config)
+            outcomes = asyncio.run(burst(client))
+            
+            answers = {result.text for result, _ in outcomes}
+            label = "singleflight" if deduplicate else "no deduplication"
+            print_latency_row(label, summarize_latencies([latency for _, latency in outcomes]))
+            print(
+                f"  {'':<28} upstream requests {server.request_count} | "
+                f"distinct answers {len(answers)} | shared results {sum(r.shared for r, _ in outcomes)} | "
+                f"dedup stats {client.get_dedup_stats().to_dict()}"
+            )
+
+
+# Child process for the cold start benchmark: builds a bot as the runner does, stands in
+# for Telegram's initialize() with a sleep, then runs post_init. "sequential" waits for the
+# engine before initializing, like the bots did before the engine loaded in the background
+COLD_START_SCRIPT = """
+import asyncio, sys
+sys.path.insert(0, {root!r})
+from src.common.readiness import Readiness
+from src.common.config import {config_class}
+from src.{kind}_bot.bot import {bot_class}
+
+bot = {bot_class}({config_class}(token="1:x"{config_args}), readiness=Readiness("bot"))
+if {sequential}:
+    {future}.result()
+
+async def start():
+    await asyncio.sleep({telegram_ms} / 1000)
+    await bot.on_startup(bot.application)
+
+asyncio.run(start())
+print(bot.readiness.ready_after_ms)
+"""
+
+
+def import_time_profile(module: str) -> Tuple[float, Dict[str, float]]:
+    # `python -X importtime` writes "self | cumulative | module" per import to stderr
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root, capture_output=True, text=True, check=True
+    )
+    total_ms = 0.0
+    by_package: Dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not self_us.isdigit():
+            continue
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + int(self_us) / 1000
+        if name == module:
+            total_ms = int(cumulative_us) / 1000
+    return total_ms, by_package
+
+
+def benchmark_cold_start(rounds: int):
+    print("\n" + "=" * 80)
+    print("Cold start: import-time profile and time until the bots are ready")
+    print("=" * 80)
+    
+    for module in ("src.nlp_bot.bot", "src.llm_bot.bot", "src.nlp_bot.nlp_engine", "src.llm_bot.openai_client"):
+        total_ms, by_package = import_time_profile(module)
+        heaviest = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:4]
+        print(f"  import {module:<26} {total_ms:7.0f}ms | " + ", ".join(f"{name} {ms:.0f}ms" for name, ms in heaviest))
+    
+    bots = {
+        "nlp": ("NLPBotConfig", "", "NLPBot", "bot.engine_future"),
+        "llm": ("LLMBotConfig", ', openai_api_key="x", model="gpt-5-nano"', "LLMBot", "bot.engines_future")
+    }
+    print()
+    for telegram_ms in (0, 300):
+        for kind, (config_class, config_args, bot_class, future) in bots.items():
+            for sequential in (True, False):
+                script = COLD_START_SCRIPT.format(
+                    root=str(project_root), kind=kind, config_class=config_class, config_args=config_args, bot_class=bot_class,
+                    future=future, sequential=sequential, telegram_ms=telegram_ms
+                )
+                ready_ms, wall_ms = [], []
+                for _ in range(max(1, min(rounds, 5))):
+                    start_time = time.perf_counter()
+                    completed = subprocess.run(
+                        [sys.executable, "-c", script],
+                        cwd=project_root, capture_output=True, text=True, check=True
+                    )
+                    wall_ms.append((time.perf_counter() - start_time) * 1000)
+                    ready_ms.append(float(completed.stdout.strip().splitlines()[-1]))
+                label = f"{kind} bot, {'engine first' if sequential else 'background engine'}"
+                print(
+                    f"  {label:<30} telegram init {telegram_ms:3d}ms | "
+                    f"ready after {np.median(ready_ms):6.0f}ms | process wall {np.median(wall_ms):6.0f}ms"
+                )
+
+
+def benchmark_metrics_endpoint(rounds: int):
+    print("\n" + "=" * 80)
+    print("Metrics endpoint: scrape latency and handler event loop lag while scraping")
+    print("=" * 80)
+    
+    import asyncio
+    import threading
+    import urllib.request
+    
+    from src.common.health_server import HealthServer
+    from src.common.metrics import MetricsRegistry
+    from src.common.readiness import Readiness
+    
+    registry = MetricsRegistry(const_labels={"bot": "benchmark"})
+    messages = registry.counter("bot_messages_total", "Messages by outcome", ("outcome",))
+    latency = registry.histogram("bot_response_duration_seconds", "Response latency", ("outcome",))
+    rng = np.random.default_rng(3)
+    for outcome, value in zip(rng.choice(["matched", "fallback", "error"], size=20000).tolist(), rng.exponential(0.2, 20000).tolist()):
+        messages.inc(outcome=outcome)
+        latency.observe(value, outcome=outcome)
+    
+    server = HealthServer(registry, Readiness("benchmark"), host="127.0.0.1", port=0)
+    server.start()
+    url = f"http://127.0.0.1:{server.port}/metrics"
+    
+    def loop_lag(seconds: float) -> List[float]:
+        # A stand-in for the bot's handler loop: how late do 1ms timers fire?
+        async def ticks():
+            lags = []
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                start_time = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append((time.perf_counter() - start_time - 0.001) * 1000)
+            return lags
+        return asyncio.run(ticks())
+    
+    duration = max(0.5, min(rounds, 200) / 100)
+    print_latency_row("loop lag, idle", summarize_latencies(loop_lag(duration)))
+    
+    scrape_ms: List[float] = []
+    stop = threading.Event()
+    
+    def scrape():
+        while not stop.is_set():
+            start_time = time.perf_counter()
+            with urllib.request.urlopen(url, timeout=5) as response:
+                response.read()
+            scrape_ms.append((time.perf_counter() - start_time) * 1000)
+    
+    scrapers = [threading.Thread(target=scrape) for _ in range(4)]
+    for scraper in scrapers:
+        scraper.start()
+    lags = loop_lag(duration)
+    stop.set()
+    for scraper in scrapers:
+        scraper.join()
+    server.stop()
+    
+    print_latency_row("loop lag, 4 scrapers", summarize_latencies(lags))
+    print_latency_row("scrape /metrics", summarize_latencies(scrape_ms))
+    print(f"  {len(scrape_ms)} scrapes in {duration:.1f}s, {len(registry.render().splitlines())} lines each")
+
+
+def benchmark_send_queue(rounds: int):
+    print("\n" + "=" * 80)
+    print("Send queue: a reply burst sent inline vs through the queue, against a local Bot API stub")
+    print("=" * 80)
+    
+    import asyncio
+    
+    from telegram import Bot
+    from telegram.error import TelegramError
+    from telegram.request import HTTPXRequest
+    
+    from runners.fake_telegram_server import FakeTelegramServer
+    from src.common.send_queue import SendQueue
+    
+    n_chats = 30
+    per_chat = 4
+    rng = np.random.default_rng(5)
+    # Mostly short replies, some long enough to need splitting
+    burst = []
+    for index in range(n_chats * per_chat):
+        size = int(rng.choice([80, 200, 1500, 6000], p=[0.5, 0.25, 0.15, 0.1]))
+        burst.append((1000 + index % n_chats, f"m{index} " + "word " * (size // 5)))
+    
+    async def run(queued: bool) -> Tuple[FakeTelegramServer, Dict[str, object]]:
+        server = FakeTelegramServer(latency_seconds=0.03, global_limit=30, chat_limit=4).start()
+        bot = Bot("1:benchmark", base_url=f"{server.url}/bot", request=HTTPXRequest(connection_pool_size=64))
+        await bot.initialize()
+        enqueued_at: Dict[str, float] = {}
+        delays: Dict[str, List[float]] = {"short": [], "long": []}
+        order: Dict[int, List[int]] = {}
+        errors: Dict[str, int] = {}
+        
+        async def send(chat_id: int, text: str, **options):
+            await bot.send_message(chat_id=chat_id, text=text, **options)
+            tag = text.split(" ", 1)[0]
+            if tag in enqueued_at:
+                delays["short" if len(text) <= 280 else "long"].append((time.perf_counter() - enqueued_at[tag]) * 1000)
+                order.setdefault(chat_id, []).append(int(tag[1:]))
+        
+        async def send_inline(chat_id: int, text: str):
+            try:
+                await send(chat_id, text)
+            except TelegramError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+        
+        start_time = time.perf_counter()
+        if queued:
+            queue = SendQueue(send)
+            queue.start()
+            for chat_id, text in burst:
+                enqueued_at[text.split(" ", 1)[0]] = time.perf_counter()
+                await queue.enqueue(chat_id, text)
+            await queue.close(timeout=120)
+        else:
+            for chat_id, text in burst:
+                enqueued_at[text.split(" ", 1)[0]] = time.perf_counter()
+            await asyncio.gather(*(send_inline(chat_id, text) for chat_id, text in burst))
+        elapsed = time.perf_counter() - start_time
+        
+        await bot.shutdown()
+        server.stop()
+        in_order = all(ids == sorted(ids) for ids in order.values())
+        return server, {"elapsed": elapsed, "delays": delays, "errors": errors, "in_order": in_order}
+    
+    for label, queued in (("inline", False), ("queued", True)):
+        server, result = asyncio.run(run(queued))
+        delivered = len(result["delays"]["short"]) + len(result["delays"]["long"])
+        print(f"\n{label}: {delivered}/{len(burst)} replies delivered in {result['elapsed']:.1f}s, "
+              f"{len(server.sent)} messages sent, {server.too_many_requests} answered 429, {server.too_long} too long")
+        if result["errors"]:
+            print(f"  failed sends: {result['errors']}")
+        print(f"  per-chat order kept: {result['in_order']}")
+        for size in ("short", "long"):
+            if result["delays"][size]:
+                print_latency_row(f"{size} reply delivery", summarize_latencies(result["delays"][size]))
+
+
+def free_port() -> int:
+    import socket
+    
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def read_metric(port: int, name: str) -> float:
+    # Sum of a metric's samples on a local /metrics endpoint; -1 while it is not reachable
+    import urllib.request
+    
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2) as response:
+            lines = response.read().decode("utf-8").splitlines()
+    except OSError:
+        return -1
+    return sum(float(line.rsplit(" ", 1)[1]) for line in lines if line.split("{", 1)[0].split(" ", 1)[0] == name)
+
+
+class PartitionedDeployment:
+    # A router and LLM bot workers as separate processes, as run_llm_bot.py starts them,
+    # against the fake Telegram and OpenAI servers
+    def __init__(self, telegram_url: str, openai_url: str, n_candidates: int, log_dir: Path):
+        self.log_dir = log_dir
+        self.env = {
+            **os.environ,
+            "LLM_BOT_TOKEN": "1:benchmark",
+            "OPENAI_API_KEY": "fake",
+            "OPENAI_BASE_URL": openai_url,
+            "OPENAI_MODEL": "gpt-5-nano",
+            "TELEGRAM_BASE_URL": telegram_url,
+            "DEDUPLICATE_PROMPTS": "false",
+            "SPECULATIVE_ANSWERING": "false",
+            "WARM_CACHE_DIR": "",
+            "SEND_GLOBAL_RATE": "10000",
+            "SEND_GLOBAL_BURST": "1000",
+            "SEND_CHAT_RATE": "1000",
+            "SEND_CHAT_BURST": "1000",
+            "LLM_PARTITION_CHECK_SECONDS": "0.3",
+            "LLM_PARTITION_SECRET": "benchmark",
+            "LOG_LEVEL": "WARNING"
+        }
+        self.worker_ports = [(free_port(), free_port()) for _ in range(n_candidates)]
+        self.env["LLM_PARTITION_WORKERS"] = ",".join(f"http://127.0.0.1:{port}" for port, _ in self.worker_ports)
+        self.router_health_port = free_port()
+        self.workers: Dict[int, subprocess.Popen] = {}
+        self.router = None
+    
+    def spawn(self, name: str, env: Dict[str, str]) -> subprocess.Popen:
+        log = open(self.log_dir / f"{name}.log", "w")
+        return subprocess.Popen(
+            [sys.executable, str(project_root / "runners" / "run_llm_bot.py")],
+            env={**self.env, **env}, cwd=project_root, stdout=log, stderr=subprocess.STDOUT
+        )
+    
+    def start_router(self):
+        self.router = self.spawn("router", {
+            "LLM_PARTITION_ROLE": "router",
+            "HEALTH_PORT": str(self.router_health_port)
+        })
+    
+    def start_worker(self, index: int):
+        port, health_port = self.worker_ports[index]
+        self.workers[index] = self.spawn(f"worker{index}", {
+            "LLM_PARTITION_ROLE": "worker",
+            "LLM_PARTITION_PORT": str(port),
+            "HEALTH_PORT": str(health_port)
+        })
+    
+    def stop_worker(self, index: int):
+        process = self.workers.pop(index)
+        process.terminate()
+        process.wait(timeout=30)
+    
+    def wait_for_ring(self, size: int, timeout: float = 60.0):
+        deadline = time.perf_counter() + timeout
+        while read_metric(self.router_health_port, "llm_router_ring_workers") != size:
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"Partition ring did not reach {size} workers, see logs in {self.log_dir}")
+            time.sleep(0.1)
+    
+    def worker_metric(self, name: str, exclude: Tuple[int, ...] = ()) -> float:
+        return sum(read_metric(self.worker_ports[index][1], name) for index in self.workers if index not in exclude)
+    
+    def stop(self):
+        for index in list(self.workers):
+            self.stop_worker(index)
+        if self.router is not None:
+            self.router.terminate()
+            self.router.wait(timeout=30)
+
+
+def benchmark_partitioned_scaling(rounds: int):
+    print("\n" + "=" * 80)
+    print("Partitioned LLM bot: throughput by worker count and conversation moves on rebalancing")
+    print("=" * 80)
+    
+    from collections import Counter
+    
+    from runners.fake_openai_server import FakeOpenAIServer
+    from runners.fake_telegram_server import FakeTelegramServer
+    from src.common.hash_ring import HashRing
+    
+    n_messages = max(40, min(rounds * 2, 400))
+    
+    def deliver(telegram: FakeTelegramServer, users: List[int], timeout: float = 120.0) -> float:
+        # Messages per second from pushing them to Telegram until every reply was sent
+        sent_before = len(telegram.sent)
+        start_time = time.perf_counter()
+        for index, user_id in enumerate(users):
+            telegram.push_message(user_id, f"Recomiéndame algo para cenar #{index}")
+        while len(telegram.sent) - sent_before < len(users):
+            if time.perf_counter() - start_time > timeout:
+                raise TimeoutError(f"Only {len(telegram.sent) - sent_before}/{len(users)} replies sent")
+            time.sleep(0.01)
+        return len(users) / (time.perf_counter() - start_time)
+    
+    with tempfile.TemporaryDirectory() as log_dir, \
+            FakeOpenAIServer(latency_seconds=0.05) as openai_server, \
+            FakeTelegramServer(latency_seconds=0.0, global_limit=100000, chat_limit=1000) as telegram:
+        # Each worker handles its updates one at a time, like the single bot, so a worker's
+        # throughput is bounded by OpenAI latency and workers add capacity
+        print(f"  {n_messages} messages from distinct users, 50ms fake OpenAI latency")
+        baseline = None
+        for n_workers in (1, 2, 4):
+            deployment = PartitionedDeployment(telegram.url, openai_server.url, n_workers, Path(log_dir))
+            ring = HashRing(f"http://127.0.0.1:{port}" for port, _ in deployment.worker_ports)
+            busiest = max(Counter(ring.owner(user_id) for user_id in range(1000, 1000 + n_messages)).values())
+            try:
+                for index in range(n_workers):
+                    deployment.start_worker(index)
+                deployment.start_router()
+                deployment.wait_for_ring(n_workers)
+                deliver(telegram, list(range(1, 21)))
+                throughput = deliver(telegram, list(range(1000, 1000 + n_messages)))
+            finally:
+                deployment.stop()
+            baseline = baseline or throughput
+            print(f"  {n_workers} worker(s): {throughput:7.1f} messages/s | speedup {throughput / baseline:.2f}x "
+                  f"| efficiency {throughput / baseline / n_workers:.0%} | busiest worker has {busiest / n_messages:.0%} of users")
+        
+        # 3 of 4 candidate workers hold conversations; a 4th joins, then one leaves
+        n_users = n_messages
+        users = list(range(5000, 5000 + n_users))
+        deployment = PartitionedDeployment(telegram.url, openai_server.url, 4, Path(log_dir))
+        try:
+            for index in range(3):
+                deployment.start_worker(index)
+            deployment.start_router()
+            deployment.wait_for_ring(3)
+            deliver(telegram, users)
+            print(f"\n  {n_users} conversations on 3 workers: {deployment.worker_metric('llm_active_conversations'):.0f} held")
+            
+            deployment.start_worker(3)
+            deployment.wait_for_ring(4)
+            moved = deployment.worker_metric("llm_partition_conversations_moved_total")
+            print(f"  scale 3 -> 4: {deployment.worker_metric('llm_active_conversations'):.0f} held, "
+                  f"{moved / 2:.0f} moved ({moved / 2 / n_users:.0%}, ideal 25%)")
+            
+            before = deployment.worker_metric("llm_partition_conversations_moved_total", exclude=(1,))
+            deployment.stop_worker(1)
+            deployment.wait_for_ring(3)
+            received = deployment.worker_metric("llm_partition_conversations_moved_total") - before
+            print(f"  scale 4 -> 3: {deployment.worker_metric('llm_active_conversations'):.0f} held, "
+                  f"{received:.0f} moved in from the stopped worker")
+        finally:
+            deployment.stop()
+
+
+def benchmark_resource_reload(rounds: int):
+    print("\n" + "=" * 80)
+    print("Resource loader: repeated loads and event loop lag while reloading a changed corpus")
+    print("=" * 80)
+    
+    import asyncio
+    from functools import partial
+    
+    from src.common.resources import ResourceLoader
+    from src.nlp_bot.nlp_engine import parse_corpus
+    
+    loader = ResourceLoader()
+    loader.register("system_prompt_bench", SYSTEM_PROMPT_PATH, lambda data: data.decode("utf-8").strip())
+    loader.register("corpus_bench", CORPUS_PATH, parse_corpus)
+    n_loads = max(100, rounds * 10)
+    for label, load in (
+        ("load_corpus_from_json", lambda: load_corpus_from_json(CORPUS_PATH)),
+        ("ResourceLoader.get", lambda: loader.get("corpus_bench").value),
+    ):
+        start_time = time.perf_counter()
+        for _ in range(n_loads):
+            load()
+        print(f"  {label:<28} {(time.perf_counter() - start_time) / n_loads * 1e6:10.1f}µs per call ({n_loads} calls)")
+    
+    def loop_lag(work) -> Tuple[List[float], float]:
+        # How late 1ms timers fire while `work` reloads the corpus and rebuilds the index
+        async def run():
+            lags = []
+            done = False
+            
+            async def ticks():
+                while not done:
+                    start_time = time.perf_counter()
+                    await asyncio.sleep(0.001)
+                    lags.append((time.perf_counter() - start_time - 0.001) * 1000)
+            
+            ticker = asyncio.create_task(ticks())
+            await asyncio.sleep(0.05)
+            start_time = time.perf_counter()
+            await work()
+            elapsed = time.perf_counter() - start_time
+            done = True
+            await ticker
+            return lags, elapsed
+        return asyncio.run(run())
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus_path = Path(tmp_dir) / "corpus.json"
+        write_synthetic_corpus(corpus_path, 20_000)
+        loader.register("corpus", corpus_path, partial(parse_corpus, json_lines=False))
+        base = loader.get("corpus")
+        print(f"\n  Corpus file: {base.size_bytes / (1024 * 1024):.1f} MiB (20k entries), version {base.version}")
+        
+        async def unchanged():
+            loader.reload("corpus")
+        
+        async def inline():
+            corpus = loader.reload("corpus")
+            NLPEngine(corpus.value, query_cache_size=0)
+        
+        async def in_thread():
+            corpus = await loader.reload_async("corpus")
+            await asyncio.to_thread(NLPEngine, corpus.value, query_cache_size=0)
+        
+        for label, work in (("unchanged (stat only)", unchanged), ("reload on the loop", inline), ("reload in a thread", in_thread)):
+            if work is not unchanged:
+                # A new version: one answer edited, as a corpus update would
+                data = json.loads(corpus_path.read_text(encoding="utf-8"))
+                data["qa_pairs"][0]["answer"] += f" ({label})"
+                corpus_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            lags, elapsed = loop_lag(work)
+            summary = summarize_latencies(lags)
+            print(f"  {label:<28} loop lag p95 {summary['p95_ms']:8.2f}ms | max {summary['max_ms']:8.2f}ms | reload {elapsed:.2f}s "
+                  f"| version {loader.get('corpus').version}")
+
+
+BENCHMARKS = {
+    "query_cache": benchmark_query_cache,
+    "dense_retrieval": benchmark_dense_retrieval,
+    "hybrid_fusion": benchmark_hybrid_fusion,
+    "sharded_index": benchmark_sharded_index,
+    "incremental_updates": benchmark_incremental_updates,
+    "streaming_loader": benchmark_streaming_loader,
+    "answer_store": benchmark_answer_store,
+    "hashing_engine": benchmark_hashing_engine,
+    "output_budgets": benchmark_output_budgets,
+    "prompt_dedup": benchmark_prompt_dedup,
+    "results_store": benchmark_results_store,
+    "keyword_matching": benchmark_keyword_matching,
+    "cold_start": benchmark_cold_start,
+    "metrics_endpoint": benchmark_metrics_endpoint,
+    "send_queue": benchmark_send_queue,
+    "partitioned_scaling": benchmark_partitioned_scaling,
+    "resource_reload": benchmark_resource_reload,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline performance benchmarks")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--rounds", type=int, default=200, help="Repetitions of the query set per benchmark")
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+    
+    for name in args.benchmarks or list(BENCHMARKS):
+        BENCHMARKS[name](args.rounds)
+
+
+if __name__ == "__main__":
+    main()
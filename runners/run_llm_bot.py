@@ -7,9 +7,13 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# First, so the readiness timer starts before the heavy imports
+from src.common.readiness import Readiness
+
 from src.common.config import load_llm_bot_config
 from src.common.logger import setup_logger
 from src.llm_bot.bot import LLMBot
+from src.llm_bot.partitioning import PartitionRouter
 
 
 def main():
@@ -17,7 +21,13 @@ def main():
         config = load_llm_bot_config()
         setup_logger("llm_bot", config.log_level)
         
-        bot = LLMBot(config)
+        ready_file = Path(config.ready_file) if config.ready_file else None
+        if config.partition_role == "router":
+            router = PartitionRouter(config, readiness=Readiness("LLM Router", ready_file))
+            router.run()
+            return
+        
+        bot = LLMBot(config, readiness=Readiness("LLM Bot", ready_file))
         bot.run()
         
     except KeyboardInterrupt:
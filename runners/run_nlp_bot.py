@@ -7,6 +7,9 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# First, so the readiness timer starts before the heavy imports
+from src.common.readiness import Readiness
+
 from src.common.config import load_nlp_bot_config
 from src.common.logger import setup_logger
 from src.nlp_bot.bot import NLPBot
@@ -17,7 +20,8 @@ def main():
         config = load_nlp_bot_config()
         setup_logger("nlp_bot", config.log_level)
         
-        bot = NLPBot(config)
+        ready_file = Path(config.ready_file) if config.ready_file else None
+        bot = NLPBot(config, readiness=Readiness("NLP Bot", ready_file))
         bot.run()
         
     except KeyboardInterrupt:
@@ -8,16 +8,25 @@ import json
 import time
 import asyncio
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
-from src.nlp_bot.nlp_engine import NLPEngine, load_corpus_from_json
-from src.llm_bot.openai_client import OpenAIClient, load_system_prompt
+from src.nlp_bot.nlp_engine import NLPEngine, parse_corpus
+from src.llm_bot.intent_classifier import OutputBudgetPolicy
+from src.llm_bot.openai_client import OpenAIClient, parse_system_prompt
 from src.common.config import load_nlp_bot_config, load_llm_bot_config
 from src.analysis.metrics_calculator import MetricsCalculator, QueryResult
+from src.analysis.results_store import ResultsStore
+from src.analysis.run_history import RunHistory, current_git_commit
 from src.common.logger import setup_logger
+from src.common.resources import CORPUS_PATH, SYSTEM_PROMPT_PATH, get_resource_loader
 
 logger = setup_logger(__name__)
 
+# The run records the versions the engines were actually built from
+resources = get_resource_loader()
+resources.register("corpus", CORPUS_PATH, parse_corpus)
+resources.register("system_prompt", SYSTEM_PROMPT_PATH, parse_system_prompt)
+
 
 def load_test_queries():
     # Go up to project root, then into tests
@@ -34,9 +43,7 @@ def test_nlp_bot(queries):
     print("="*80)
     
     # Initialize NLP bot
-    project_root = Path(__file__).parent.parent
-    corpus_path = project_root / "data" / "corpus" / "qa_pairs.json"
-    corpus = load_corpus_from_json(str(corpus_path))
+    corpus = resources.get("corpus").value
     nlp_config = load_nlp_bot_config()
     engine = NLPEngine(corpus, similarity_threshold=nlp_config.similarity_threshold)
     
@@ -73,7 +80,7 @@ def test_nlp_bot(queries):
             response_text=response_text,
             response_time_ms=response_time_ms,
             bot_type="NLP",
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=datetime.now(timezone.utc).isoformat(),
             keywords_expected=query_data['expected_keywords'],
             category=query_data['category'],
             difficulty=query_data['difficulty']
@@ -96,10 +103,12 @@ async def test_llm_engine():
     
     llm_config = load_llm_bot_config()
     client = OpenAIClient(llm_config)
+    output_budgets = OutputBudgetPolicy(
+        default_budget=llm_config.max_tokens,
+        budgets=llm_config.output_budgets
+    )
     
-    project_root = Path(__file__).parent.parent
-    prompt_path = project_root / "data" / "prompts" / "system_prompt.txt"
-    system_prompt = load_system_prompt(prompt_path)
+    system_prompt = resources.get("system_prompt").value
     
     test_queries = load_test_queries()
     calculator = MetricsCalculator()
@@ -117,15 +126,21 @@ async def test_llm_engine():
             {"role": "user", "content": query_text}
         ]
         
+        intent, output_budget = output_budgets.select(query_text)
+        logger.info(f"Intent: {intent} | Output budget: {output_budget} tokens")
+        
+        completion = None
         try:
             start_time = time.time()
-            response_text = await client.get_completion(messages)
+            completion = await client.get_completion(messages, max_output_tokens=output_budget)
             end_time = time.time()
             
+            response_text = completion.text
             response_time_ms = (end_time - start_time) * 1000
             
             logger.info(f"✓ Got response")
-            logger.info(f"Response time: {response_time_ms:.2f}ms")
+            logger.info(f"Response time: {response_time_ms:.2f}ms (connect {completion.connect_ms:.2f}ms, TTFB {completion.ttfb_ms:.2f}ms)")
+            logger.info(f"Tokens: {completion.input_tokens} in ({completion.cached_input_tokens} cached) / {completion.output_tokens} out ({completion.reasoning_tokens} reasoning) | retries: {completion.retries}")
             logger.info(f"Response: {response_text[:100]}...")
             
         except Exception as e:
@@ -139,11 +154,23 @@ async def test_llm_engine():
             response_text=response_text,
             response_time_ms=response_time_ms,
             bot_type="LLM",
-            timestamp=datetime.utcnow().isoformat(),
+            timestamp=datetime.now(timezone.utc).isoformat(),
             keywords_expected=query_data['expected_keywords'],
             category=query_data['category'],
-            difficulty=query_data['difficulty']
+            difficulty=query_data['difficulty'],
+            intent=intent,
+            output_budget=output_budget
         )
+        if completion is not None:
+            result.model = completion.model
+            result.connect_ms = completion.connect_ms
+            result.ttfb_ms = completion.ttfb_ms
+            result.input_tokens = completion.input_tokens
+            result.cached_input_tokens = completion.cached_input_tokens
+            result.output_tokens = completion.output_tokens
+            result.reasoning_tokens = completion.reasoning_tokens
+            result.retries = completion.retries
+            result.cost_usd = completion.cost_usd
         
         calculator.add_result(result)
         calculator.update_result_metrics(result)
@@ -169,6 +196,7 @@ def print_summary(nlp_calculator: MetricsCalculator, llm_calculator: MetricsCalc
     logger.info(f"Total queries: {nlp_metrics.total_queries}")
     logger.info(f"Avg response time: {nlp_metrics.avg_response_time_ms:.2f}ms")
     logger.info(f"Min/Max response time: {nlp_metrics.min_response_time_ms:.2f}ms / {nlp_metrics.max_response_time_ms:.2f}ms")
+    logger.info(f"p50/p95 response time: {nlp_metrics.p50_response_time_ms:.2f}ms / {nlp_metrics.p95_response_time_ms:.2f}ms")
     logger.info(f"Avg relevance score: {nlp_metrics.avg_relevance_score:.3f}")
     logger.info(f"Keyword match rate: {nlp_metrics.keyword_match_rate:.3f}")
     logger.info(f"Keywords found: {nlp_metrics.total_keywords_found}/{nlp_metrics.total_keywords_expected}")
@@ -185,9 +213,14 @@ def print_summary(nlp_calculator: MetricsCalculator, llm_calculator: MetricsCalc
     logger.info(f"Total queries: {llm_metrics.total_queries}")
     logger.info(f"Avg response time: {llm_metrics.avg_response_time_ms:.2f}ms")
     logger.info(f"Min/Max response time: {llm_metrics.min_response_time_ms:.2f}ms / {llm_metrics.max_response_time_ms:.2f}ms")
+    logger.info(f"p50/p95 response time: {llm_metrics.p50_response_time_ms:.2f}ms / {llm_metrics.p95_response_time_ms:.2f}ms")
     logger.info(f"Avg relevance score: {llm_metrics.avg_relevance_score:.3f}")
     logger.info(f"Keyword match rate: {llm_metrics.keyword_match_rate:.3f}")
     logger.info(f"Keywords found: {llm_metrics.total_keywords_found}/{llm_metrics.total_keywords_expected}")
+    logger.info(f"Avg connect/TTFB: {llm_metrics.avg_connect_ms:.2f}ms / {llm_metrics.avg_ttfb_ms:.2f}ms")
+    logger.info(f"Tokens: {llm_metrics.total_input_tokens} in ({llm_metrics.total_cached_input_tokens} cached) / {llm_metrics.total_output_tokens} out ({llm_metrics.total_reasoning_tokens} reasoning)")
+    logger.info(f"Throughput: {llm_metrics.tokens_per_second:.1f} output tokens/sec | retries: {llm_metrics.total_retries}")
+    logger.info(f"Cost: ${llm_metrics.total_cost_usd:.6f} total, ${llm_metrics.cost_per_query_usd:.8f} per query")
     
     logger.info("\nAccuracy by category:")
     for category, score in sorted(llm_metrics.accuracy_by_category.items()):
@@ -210,7 +243,7 @@ def print_summary(nlp_calculator: MetricsCalculator, llm_calculator: MetricsCalc
 
 async def main():
     logger.info("Starting direct function tests...")
-    logger.info(f"Test time: {datetime.utcnow().isoformat()}")
+    logger.info(f"Test time: {datetime.now(timezone.utc).isoformat()}")
     
     project_root = Path(__file__).parent.parent
     results_dir = project_root / "results"
@@ -228,6 +261,18 @@ async def main():
     
     print_summary(nlp_calculator, llm_calculator)
     
+    # Every run is appended to the run history; old runs are never rewritten
+    history = RunHistory(ResultsStore(results_dir / "runs"))
+    run = history.record_run(
+        combined_calculator.results,
+        git_commit=current_git_commit(project_root),
+        model=load_llm_bot_config().model,
+        corpus_hash=resources.get("corpus").version,
+        prompt_hash=resources.get("system_prompt").version,
+        # Queries are sent one at a time
+        concurrency=1
+    )
+    # Latest run as JSON arrays, for readers of the files written before the run store
     nlp_calculator.save_results_to_json(results_dir / "nlp_results.json")
     llm_calculator.save_results_to_json(results_dir / "llm_results.json")
     combined_calculator.save_results_to_json(results_dir / "all_results.json")
@@ -235,10 +280,12 @@ async def main():
     
     logger.info("\n" + "=" * 80)
     logger.info("Results saved to results/ directory")
+    logger.info(f"  - runs/ (run {run.run_id}, commit {run.git_commit}, {history.store.format})")
     logger.info("  - nlp_results.json")
     logger.info("  - llm_results.json")
     logger.info("  - all_results.json")
     logger.info("  - comparison_report.json")
+    logger.info("Compare with the previous run: python runners/compare_runs.py")
     logger.info("=" * 80)
 
 
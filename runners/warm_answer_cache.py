@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Deploy-time warmup for the LLM bot's answer cache
+Precomputes answers for the canonical queries and stores them under WARM_CACHE_DIR,
+versioned by system prompt and model
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.common.config import load_llm_bot_config
+from src.common.logger import setup_logger
+from src.common.resources import SYSTEM_PROMPT_PATH, WARM_QUERIES_PATH, get_resource_loader
+from src.llm_bot.answer_cache import WarmAnswerCache, first_turn_messages, load_canonical_queries
+from src.llm_bot.intent_classifier import OutputBudgetPolicy
+from src.llm_bot.openai_client import OpenAIClient, parse_system_prompt
+
+logger = setup_logger(__name__)
+
+
+async def warm_cache(queries_path: Path, concurrency: int, force: bool) -> int:
+    config = load_llm_bot_config()
+    if not config.warm_cache_dir:
+        logger.info("WARM_CACHE_DIR is not set, nothing to warm")
+        return 0
+    
+    # The bot finds these answers by the same prompt version (content hash)
+    resources = get_resource_loader()
+    resources.register("system_prompt", SYSTEM_PROMPT_PATH, parse_system_prompt)
+    prompt = resources.get("system_prompt")
+    system_prompt = prompt.value
+    cache = WarmAnswerCache(
+        Path(config.warm_cache_dir),
+        prompt.version,
+        config.model,
+        ttl_seconds=config.warm_cache_ttl_seconds
+    )
+    cache.load()
+    
+    client = OpenAIClient(config)
+    output_budgets = OutputBudgetPolicy(default_budget=config.max_tokens, budgets=config.output_budgets)
+    
+    queries = load_canonical_queries(queries_path)
+    pending = []
+    for query in queries:
+        entry = cache.get(query)
+        if force or entry is None or cache.is_stale(entry):
+            pending.append(query)
+    logger.info(f"Warming {len(pending)}/{len(queries)} queries (version {cache.version})")
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def fetch(query: str) -> bool:
+        async with semaphore:
+            _, output_budget = output_budgets.select(query)
+            try:
+                completion = await client.get_completion(
+                    first_turn_messages(system_prompt, query),
+                    max_output_tokens=output_budget
+                )
+            except Exception as e:
+                logger.error(f"✗ {query}: {e}")
+                return False
+            
+            if not completion.text:
+                logger.error(f"✗ {query}: empty answer (truncated={completion.truncated})")
+                return False
+            
+            cache.put(query, completion.text, completion.output_tokens)
+            logger.info(f"✓ {query} ({completion.total_ms:.0f}ms, {completion.output_tokens} tokens)")
+            return True
+    
+    results = await asyncio.gather(*(fetch(query) for query in pending))
+    cache.save()
+    
+    failures = results.count(False)
+    logger.info(f"Warm cache: {len(cache)} answers in {cache.file_path} ({failures} failures)")
+    # Warming is an optimisation: failed queries are answered live and cached by the bot,
+    # so a failed warmup (an OpenAI outage, say) must not keep the bot from starting
+    if pending and failures == len(pending):
+        logger.warning("Every warm request failed, starting with the cached answers only")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute LLM answers for canonical queries")
+    parser.add_argument("--queries", type=Path, default=WARM_QUERIES_PATH, help="JSON file with a canonical_queries list")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel OpenAI requests")
+    parser.add_argument("--force", action="store_true", help="Regenerate answers that are still fresh")
+    args = parser.parse_args()
+    
+    try:
+        sys.exit(asyncio.run(warm_cache(args.queries, args.concurrency, args.force)))
+    except Exception as e:
+        logger.error(f"Warmup failed, the bot starts without it: {e}")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 import json
 from pathlib import Path
 
+from src.analysis.running_stats import RunningStats
 from src.common.logger import get_logger
 
 logger = get_logger(__name__)
@@ -21,60 +22,91 @@ class ComparisonMetrics:
     nlp_avg_response_time: float
     llm_avg_response_time: float
     total_queries: int
+    nlp_response_time: Dict[str, float] = field(default_factory=dict)
+    llm_response_time: Dict[str, float] = field(default_factory=dict)
     
     def to_dict(self) -> dict:
         return {
             "nlp_avg_response_time_ms": round(self.nlp_avg_response_time * 1000, 2),
             "llm_avg_response_time_ms": round(self.llm_avg_response_time * 1000, 2),
             "total_queries": self.total_queries,
-            "speed_comparison": "NLP is faster" if self.nlp_avg_response_time < self.llm_avg_response_time else "LLM is faster"
+            "speed_comparison": "NLP is faster" if self.nlp_avg_response_time < self.llm_avg_response_time else "LLM is faster",
+            "nlp_response_time_ms": self.nlp_response_time,
+            "llm_response_time_ms": self.llm_response_time
         }
 
 
 class Evaluator:
-    def __init__(self):
+    # Response times feed running aggregates as they arrive, so computing metrics costs the
+    # same for ten responses or ten million. With stream_path set, responses are appended to
+    # a JSON Lines file instead of being kept in memory.
+    def __init__(self, stream_path: Optional[Path] = None):
         self.nlp_responses: List[BotResponse] = []
         self.llm_responses: List[BotResponse] = []
+        self.nlp_stats = RunningStats()
+        self.llm_stats = RunningStats()
+        self.stream_path = stream_path
+        self._stream = None
+        if stream_path is not None:
+            stream_path.parent.mkdir(parents=True, exist_ok=True)
+            self._stream = open(stream_path, 'a', encoding='utf-8', buffering=1)
         logger.info("Evaluator initialized")
     
     def add_nlp_response(self, query: str, response: str, response_time: float):
-        self.nlp_responses.append(
+        self._add_response(
             BotResponse(
                 query=query,
                 response=response,
                 response_time=response_time,
                 bot_type="NLP"
-            )
+            ),
+            self.nlp_responses,
+            self.nlp_stats
         )
     
     def add_llm_response(self, query: str, response: str, response_time: float):
-        self.llm_responses.append(
+        self._add_response(
             BotResponse(
                 query=query,
                 response=response,
                 response_time=response_time,
                 bot_type="LLM"
-            )
+            ),
+            self.llm_responses,
+            self.llm_stats
         )
     
-    def calculate_metrics(self) -> ComparisonMetrics:
-        if not self.nlp_responses or not self.llm_responses:
+    def _add_response(self, bot_response: BotResponse, responses: List[BotResponse], stats: RunningStats):
+        stats.add(bot_response.response_time)
+        if self._stream is None:
+            responses.append(bot_response)
+            return
+        
+        self._stream.write(json.dumps({
+            "bot_type": bot_response.bot_type,
+            "query": bot_response.query,
+            "response": bot_response.response,
+            "response_time_ms": round(bot_response.response_time * 1000, 2)
+        }, ensure_ascii=False) + "\n")
+    
+    def calculate_metrics(self) -> Optional[ComparisonMetrics]:
+        if self.nlp_stats.count == 0 or self.llm_stats.count == 0:
             logger.warning("Not enough data for comparison")
             return None
         
-        nlp_avg = sum(r.response_time for r in self.nlp_responses) / len(self.nlp_responses)
-        llm_avg = sum(r.response_time for r in self.llm_responses) / len(self.llm_responses)
-        
         metrics = ComparisonMetrics(
-            nlp_avg_response_time=nlp_avg,
-            llm_avg_response_time=llm_avg,
-            total_queries=min(len(self.nlp_responses), len(self.llm_responses))
+            nlp_avg_response_time=self.nlp_stats.mean,
+            llm_avg_response_time=self.llm_stats.mean,
+            total_queries=min(self.nlp_stats.count, self.llm_stats.count),
+            nlp_response_time=self.nlp_stats.to_dict(scale=1000),
+            llm_response_time=self.llm_stats.to_dict(scale=1000)
         )
         
         logger.info("Calculated comparison metrics")
         return metrics
     
     def save_results(self, output_path: Path):
+        metrics = self.calculate_metrics()
         results = {
             "nlp_responses": [
                 {
@@ -92,10 +124,24 @@ class Evaluator:
                 }
                 for r in self.llm_responses
             ],
-            "metrics": self.calculate_metrics().to_dict() if self.calculate_metrics() else {}
+            "metrics": metrics.to_dict() if metrics else {}
         }
+        if self.stream_path is not None:
+            # Streamed responses are already on disk; only point at them
+            results["responses_path"] = str(self.stream_path)
         
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(results, f, ensure_ascii=False, indent=2)
         
         logger.info(f"Results saved to {output_path}")
+    
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+    
+    def __enter__(self) -> "Evaluator":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,116 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.nlp_bot.text_normalizer import normalize_text
+
+WORD_CHAR = re.compile(r"\w")
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(normalize_text(keyword).split())
+
+
+@lru_cache(maxsize=4096)
+def fold_text(text: str) -> str:
+    # Corpus answers repeat across results, so each is folded once
+    return normalize_text(text)
+
+
+def trie_regex(words: Iterable[str]) -> str:
+    # The alternation of `words` with shared prefixes factored out ("sushi|sushiteca" ->
+    # "sushi(?:teca)?"), so each position of the scan tries one branch per distinct prefix
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: dict) -> str:
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        optional = "" in node
+        if not branches:
+            return ""
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+    
+    return build(trie)
+
+
+class KeywordPattern:
+    # One compiled alternation per keyword set: the normalized keywords matched at word
+    # boundaries in responses folded the same way, so case and accents don't matter
+    def __init__(self, keywords: Tuple[str, ...]):
+        self.keywords = keywords
+        self.normalized = [normalize_keyword(keyword) for keyword in keywords]
+        unique = sorted({keyword for keyword in self.normalized if keyword})
+        
+        self.pattern = None
+        if unique:
+            # Only the trailing boundary is in the pattern: a leading lookbehind would disable
+            # the regex engine's first-character scan, so the leading one is checked per match
+            self.pattern = re.compile(trie_regex(unique) + r"(?!\w)")
+        
+        # Only the longest keyword is reported per position; shorter keywords found as whole
+        # words inside it ("falsa" in "puerta falsa") matched there too
+        self.implied: Dict[str, Set[str]] = {
+            long: {
+                short for short in unique
+                if short != long and re.search(rf"(?<!\w){re.escape(short)}(?!\w)", long)
+            }
+            for long in unique
+        }
+    
+    def find(self, text: str) -> List[str]:
+        if self.pattern is None or not text:
+            return []
+        
+        folded = fold_text(text)
+        matched: Set[str] = set()
+        match = self.pattern.search(folded)
+        while match is not None:
+            start = match.start()
+            if start == 0 or not WORD_CHAR.match(folded, start - 1):
+                keyword = " ".join(match.group().split())
+                matched.add(keyword)
+                matched.update(self.implied[keyword])
+            # Resume right after the match start, so keywords that overlap in the text all match
+            match = self.pattern.search(folded, start + 1)
+        return [keyword for keyword, normalized in zip(self.keywords, self.normalized) if normalized in matched]
+
+
+@lru_cache(maxsize=4096)
+def compile_keywords(keywords: Tuple[str, ...]) -> KeywordPattern:
+    return KeywordPattern(keywords)
+
+
+def match_keywords(text: str, keywords: Sequence[str]) -> List[str]:
+    return compile_keywords(tuple(keywords)).find(text)
+
+
+def match_keywords_batch(texts: Sequence[str], keyword_sets: Sequence[Sequence[str]]) -> List[List[str]]:
+    # Results of the same test query share a keyword set and often the same corpus answer:
+    # each distinct pair is matched once
+    matches: Dict[Tuple[str, Tuple[str, ...]], List[str]] = {}
+    found = []
+    for text, keywords in zip(texts, keyword_sets):
+        key = (text, tuple(keywords))
+        if key not in matches:
+            matches[key] = match_keywords(text, keywords)
+        found.append(list(matches[key]))
+    return found
+
+
+def relevance_scores(found_counts: np.ndarray, expected_counts: np.ndarray) -> np.ndarray:
+    # Results without expected keywords score 1.0, like calculate_relevance_score
+    found_counts = np.asarray(found_counts, dtype=np.float64)
+    expected_counts = np.asarray(expected_counts, dtype=np.float64)
+    scores = np.divide(found_counts, expected_counts, out=np.ones_like(found_counts), where=expected_counts > 0)
+    return np.minimum(scores, 1.0)
@@ -2,8 +2,11 @@ import json
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timezone
 
+import numpy as np
+
+from src.analysis.keyword_matcher import match_keywords, match_keywords_batch, relevance_scores
 from src.common.logger import get_logger
 
 logger = get_logger(__name__)
@@ -22,6 +25,17 @@ class QueryResult:
     relevance_score: float = 0.0
     category: str = ""
     difficulty: str = ""
+    model: str = ""
+    intent: str = ""
+    output_budget: int = 0
+    connect_ms: float = 0.0
+    ttfb_ms: float = 0.0
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    output_tokens: int = 0
+    reasoning_tokens: int = 0
+    retries: int = 0
+    cost_usd: float = 0.0
 
 
 @dataclass
@@ -37,6 +51,18 @@ class BotMetrics:
     keyword_match_rate: float
     total_keywords_found: int
     total_keywords_expected: int
+    p50_response_time_ms: float = 0.0
+    p95_response_time_ms: float = 0.0
+    avg_connect_ms: float = 0.0
+    avg_ttfb_ms: float = 0.0
+    total_input_tokens: int = 0
+    total_cached_input_tokens: int = 0
+    total_output_tokens: int = 0
+    total_reasoning_tokens: int = 0
+    total_retries: int = 0
+    tokens_per_second: float = 0.0
+    total_cost_usd: float = 0.0
+    cost_per_query_usd: float = 0.0
 
 
 class MetricsCalculator:
@@ -59,14 +85,8 @@ class MetricsCalculator:
         return min(score, 1.0)
     
     def calculate_keyword_matches(self, response: str, expected_keywords: List[str]) -> List[str]:
-        response_lower = response.lower()
-        found = []
-        
-        for keyword in expected_keywords:
-            if keyword.lower() in response_lower:
-                found.append(keyword)
-        
-        return found
+        # Accent-insensitive whole-word matches, so "wok" no longer hits inside other words
+        return match_keywords(response, expected_keywords)
     
     def update_result_metrics(self, result: QueryResult):
         result.keywords_found = self.calculate_keyword_matches(
@@ -75,6 +95,22 @@ class MetricsCalculator:
         )
         result.relevance_score = self.calculate_relevance_score(result)
     
+    def update_all_result_metrics(self):
+        if not self.results:
+            return
+        
+        found = match_keywords_batch(
+            [r.response_text for r in self.results],
+            [r.keywords_expected for r in self.results]
+        )
+        scores = relevance_scores(
+            np.fromiter((len(keywords) for keywords in found), dtype=np.int64, count=len(found)),
+            np.fromiter((len(r.keywords_expected) for r in self.results), dtype=np.int64, count=len(self.results))
+        )
+        for result, keywords, score in zip(self.results, found, scores.tolist()):
+            result.keywords_found = keywords
+            result.relevance_score = score
+    
     def calculate_bot_metrics(self, bot_type: str) -> BotMetrics:
         bot_results = [r for r in self.results if r.bot_type == bot_type]
         
@@ -103,6 +139,11 @@ class MetricsCalculator:
         total_keywords_expected = sum(len(r.keywords_expected) for r in bot_results)
         keyword_match_rate = total_keywords_found / total_keywords_expected if total_keywords_expected > 0 else 0.0
         
+        total_output_tokens = sum(r.output_tokens for r in bot_results)
+        total_response_seconds = sum(response_times) / 1000
+        tokens_per_second = total_output_tokens / total_response_seconds if total_response_seconds > 0 else 0.0
+        total_cost_usd = sum(r.cost_usd for r in bot_results)
+        
         return BotMetrics(
             bot_type=bot_type,
             total_queries=len(bot_results),
@@ -114,9 +155,42 @@ class MetricsCalculator:
             accuracy_by_difficulty=accuracy_by_difficulty,
             keyword_match_rate=keyword_match_rate,
             total_keywords_found=total_keywords_found,
-            total_keywords_expected=total_keywords_expected
+            total_keywords_expected=total_keywords_expected,
+            p50_response_time_ms=self._percentile(response_times, 50),
+            p95_response_time_ms=self._percentile(response_times, 95),
+            avg_connect_ms=sum(r.connect_ms for r in bot_results) / len(bot_results),
+            avg_ttfb_ms=sum(r.ttfb_ms for r in bot_results) / len(bot_results),
+            total_input_tokens=sum(r.input_tokens for r in bot_results),
+            total_cached_input_tokens=sum(r.cached_input_tokens for r in bot_results),
+            total_output_tokens=total_output_tokens,
+            total_reasoning_tokens=sum(r.reasoning_tokens for r in bot_results),
+            total_retries=sum(r.retries for r in bot_results),
+            tokens_per_second=tokens_per_second,
+            total_cost_usd=total_cost_usd,
+            cost_per_query_usd=total_cost_usd / len(bot_results)
         )
     
+    def _percentile(self, values: List[float], percentile: float) -> float:
+        ordered = sorted(values)
+        position = (len(ordered) - 1) * percentile / 100
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+    
+    def _usage_summary(self, metrics: BotMetrics) -> Dict[str, Any]:
+        return {
+            "avg_connect_ms": round(metrics.avg_connect_ms, 2),
+            "avg_ttfb_ms": round(metrics.avg_ttfb_ms, 2),
+            "total_input_tokens": metrics.total_input_tokens,
+            "total_cached_input_tokens": metrics.total_cached_input_tokens,
+            "total_output_tokens": metrics.total_output_tokens,
+            "total_reasoning_tokens": metrics.total_reasoning_tokens,
+            "total_retries": metrics.total_retries,
+            "tokens_per_second": round(metrics.tokens_per_second, 2),
+            "total_cost_usd": round(metrics.total_cost_usd, 6),
+            "cost_per_query_usd": round(metrics.cost_per_query_usd, 8)
+        }
+    
     def _calculate_accuracy_by_field(self, results: List[QueryResult], field: str) -> Dict[str, float]:
         field_groups = {}
         
@@ -137,27 +211,33 @@ class MetricsCalculator:
         llm_metrics = self.calculate_bot_metrics("LLM")
         
         report = {
-            "generated_at": datetime.utcnow().isoformat(),
+            "generated_at": datetime.now(timezone.utc).isoformat(),
             "total_queries": len(self.results),
             "nlp_bot": {
                 "total_queries": nlp_metrics.total_queries,
                 "avg_response_time_ms": round(nlp_metrics.avg_response_time_ms, 2),
                 "min_response_time_ms": round(nlp_metrics.min_response_time_ms, 2),
                 "max_response_time_ms": round(nlp_metrics.max_response_time_ms, 2),
+                "p50_response_time_ms": round(nlp_metrics.p50_response_time_ms, 2),
+                "p95_response_time_ms": round(nlp_metrics.p95_response_time_ms, 2),
                 "avg_relevance_score": round(nlp_metrics.avg_relevance_score, 3),
                 "keyword_match_rate": round(nlp_metrics.keyword_match_rate, 3),
                 "accuracy_by_category": {k: round(v, 3) for k, v in nlp_metrics.accuracy_by_category.items()},
-                "accuracy_by_difficulty": {k: round(v, 3) for k, v in nlp_metrics.accuracy_by_difficulty.items()}
+                "accuracy_by_difficulty": {k: round(v, 3) for k, v in nlp_metrics.accuracy_by_difficulty.items()},
+                "usage": self._usage_summary(nlp_metrics)
             },
             "llm_bot": {
                 "total_queries": llm_metrics.total_queries,
                 "avg_response_time_ms": round(llm_metrics.avg_response_time_ms, 2),
                 "min_response_time_ms": round(llm_metrics.min_response_time_ms, 2),
                 "max_response_time_ms": round(llm_metrics.max_response_time_ms, 2),
+                "p50_response_time_ms": round(llm_metrics.p50_response_time_ms, 2),
+                "p95_response_time_ms": round(llm_metrics.p95_response_time_ms, 2),
                 "avg_relevance_score": round(llm_metrics.avg_relevance_score, 3),
                 "keyword_match_rate": round(llm_metrics.keyword_match_rate, 3),
                 "accuracy_by_category": {k: round(v, 3) for k, v in llm_metrics.accuracy_by_category.items()},
-                "accuracy_by_difficulty": {k: round(v, 3) for k, v in llm_metrics.accuracy_by_difficulty.items()}
+                "accuracy_by_difficulty": {k: round(v, 3) for k, v in llm_metrics.accuracy_by_difficulty.items()},
+                "usage": self._usage_summary(llm_metrics)
             },
             "comparison": {
                 "response_time_improvement": self._calculate_improvement(
@@ -206,7 +286,18 @@ class MetricsCalculator:
                 "keywords_expected": result.keywords_expected,
                 "relevance_score": result.relevance_score,
                 "category": result.category,
-                "difficulty": result.difficulty
+                "difficulty": result.difficulty,
+                "model": result.model,
+                "intent": result.intent,
+                "output_budget": result.output_budget,
+                "connect_ms": result.connect_ms,
+                "ttfb_ms": result.ttfb_ms,
+                "input_tokens": result.input_tokens,
+                "cached_input_tokens": result.cached_input_tokens,
+                "output_tokens": result.output_tokens,
+                "reasoning_tokens": result.reasoning_tokens,
+                "retries": result.retries,
+                "cost_usd": result.cost_usd
             })
         
         with open(file_path, 'w', encoding='utf-8') as f:
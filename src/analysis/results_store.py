@@ -0,0 +1,310 @@
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.analysis.metrics_calculator import QueryResult
+from src.common.exceptions import ConfigurationError
+from src.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+PARQUET = "parquet"
+NPZ = "npz"
+JSONL = "jsonl"
+STORE_FORMATS = [PARQUET, NPZ, JSONL]
+JSONL_FILE_NAME = "runs.jsonl"
+
+NUMERIC_COLUMNS = {
+    "query_id": np.int64,
+    "response_time_ms": np.float64,
+    "relevance_score": np.float64,
+    "keywords_found_count": np.int64,
+    "keywords_expected_count": np.int64,
+    "output_budget": np.int64,
+    "connect_ms": np.float64,
+    "ttfb_ms": np.float64,
+    "input_tokens": np.int64,
+    "cached_input_tokens": np.int64,
+    "output_tokens": np.int64,
+    "reasoning_tokens": np.int64,
+    "retries": np.int64,
+    "cost_usd": np.float64,
+}
+STRING_COLUMNS = [
+    "run_id", "query_text", "response_text", "bot_type", "timestamp",
+    "category", "difficulty", "model", "intent", "keywords_found", "keywords_expected",
+]
+# Free text of any length: kept as object arrays in memory and as one UTF-8 buffer plus row
+# offsets in npz files, since a fixed-width '<U' array pads every row to the longest response
+TEXT_COLUMNS = {"query_text", "response_text"}
+COLUMNS = list(NUMERIC_COLUMNS) + STRING_COLUMNS
+
+# Keyword lists are stored as one string column; the unit separator never appears in keywords
+KEYWORD_SEPARATOR = "\x1f"
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_store_format(requested: Optional[str] = None) -> str:
+    if requested is None:
+        return PARQUET if parquet_available() else NPZ
+    if requested not in STORE_FORMATS:
+        raise ConfigurationError(f"Unknown results format '{requested}' (expected one of {', '.join(STORE_FORMATS)})")
+    if requested == PARQUET and not parquet_available():
+        raise ConfigurationError("pyarrow is required for the parquet results format")
+    return requested
+
+
+def new_run_id() -> str:
+    # Sortable, so the latest run is the maximum run_id
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def string_column(name: str, values) -> np.ndarray:
+    if name not in TEXT_COLUMNS:
+        return np.array(values, dtype=str)
+    column = np.empty(len(values), dtype=object)
+    column[:] = list(values)
+    return column
+
+
+def encode_text(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Offsets count characters, so the whole buffer is decoded once and sliced
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    return np.frombuffer("".join(values).encode("utf-8"), dtype=np.uint8), offsets
+
+
+def decode_text(name: str, data: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    text = data.tobytes().decode("utf-8")
+    bounds = offsets.tolist()
+    return string_column(name, [text[start:end] for start, end in zip(bounds[:-1], bounds[1:])])
+
+
+def results_to_columns(results: List[QueryResult], run_id: str) -> Dict[str, np.ndarray]:
+    columns = {
+        name: np.array([getattr(r, name) for r in results], dtype=dtype)
+        for name, dtype in NUMERIC_COLUMNS.items()
+        if name not in ("keywords_found_count", "keywords_expected_count")
+    }
+    columns["keywords_found_count"] = np.array([len(r.keywords_found) for r in results], dtype=np.int64)
+    columns["keywords_expected_count"] = np.array([len(r.keywords_expected) for r in results], dtype=np.int64)
+    columns["run_id"] = np.array([run_id] * len(results), dtype=str)
+    for name in STRING_COLUMNS:
+        if name == "run_id":
+            continue
+        if name in ("keywords_found", "keywords_expected"):
+            values = [KEYWORD_SEPARATOR.join(getattr(r, name)) for r in results]
+        else:
+            values = [getattr(r, name) for r in results]
+        columns[name] = string_column(name, values)
+    return columns
+
+
+def columns_to_rows(columns: Dict[str, np.ndarray]) -> List[dict]:
+    # Row view in the shape save_results_to_json writes, for per-query consumers
+    rows = []
+    lists = {name: columns[name].tolist() for name in COLUMNS}
+    for index in range(len(lists["run_id"])):
+        row = {name: lists[name][index] for name in COLUMNS}
+        for name in ("keywords_found", "keywords_expected"):
+            row[name] = row[name].split(KEYWORD_SEPARATOR) if row[name] else []
+        rows.append(row)
+    return rows
+
+
+def empty_columns() -> Dict[str, np.ndarray]:
+    columns = {name: np.array([], dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+    columns.update({name: string_column(name, []) for name in STRING_COLUMNS})
+    return columns
+
+
+def concat_columns(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if not parts:
+        return empty_columns()
+    return {name: np.concatenate([part[name] for part in parts]) for name in COLUMNS}
+
+
+def select_rows(columns: Dict[str, np.ndarray], mask: np.ndarray) -> Dict[str, np.ndarray]:
+    return {name: values[mask] for name, values in columns.items()}
+
+
+def group_mean(columns: Dict[str, np.ndarray], group_column: str, value_column: str = "relevance_score") -> Dict[str, float]:
+    if len(columns[group_column]) == 0:
+        return {}
+    keys, inverse = np.unique(columns[group_column], return_inverse=True)
+    sums = np.bincount(inverse, weights=columns[value_column])
+    counts = np.bincount(inverse)
+    return {str(key): float(total / count) for key, total, count in zip(keys, sums, counts)}
+
+
+def summarize_bot(columns: Dict[str, np.ndarray], bot_type: str) -> dict:
+    bot = select_rows(columns, columns["bot_type"] == bot_type)
+    total_queries = len(bot["bot_type"])
+    if total_queries == 0:
+        return {
+            "total_queries": 0,
+            "avg_response_time_ms": 0.0,
+            "min_response_time_ms": 0.0,
+            "max_response_time_ms": 0.0,
+            "p50_response_time_ms": 0.0,
+            "p95_response_time_ms": 0.0,
+            "avg_relevance_score": 0.0,
+            "keyword_match_rate": 0.0,
+            "accuracy_by_category": {},
+            "accuracy_by_difficulty": {},
+            "total_keywords_found": 0,
+            "total_keywords_expected": 0,
+        }
+    
+    times = bot["response_time_ms"]
+    p50, p95 = np.percentile(times, [50, 95])
+    keywords_found = int(bot["keywords_found_count"].sum())
+    keywords_expected = int(bot["keywords_expected_count"].sum())
+    return {
+        "total_queries": total_queries,
+        "avg_response_time_ms": float(times.mean()),
+        "min_response_time_ms": float(times.min()),
+        "max_response_time_ms": float(times.max()),
+        "p50_response_time_ms": float(p50),
+        "p95_response_time_ms": float(p95),
+        "avg_relevance_score": float(bot["relevance_score"].mean()),
+        "keyword_match_rate": keywords_found / keywords_expected if keywords_expected > 0 else 0.0,
+        "accuracy_by_category": group_mean(bot, "category"),
+        "accuracy_by_difficulty": group_mean(bot, "difficulty"),
+        "total_keywords_found": keywords_found,
+        "total_keywords_expected": keywords_expected,
+    }
+
+
+class ResultsStore:
+    # Each evaluation run is appended as its own file, so writers never rewrite old runs.
+    # Once compact_threshold loose files accumulate they are merged into one, keeping
+    # loads to a handful of reads.
+    def __init__(self, directory: Path, store_format: Optional[str] = None, compact_threshold: int = 64):
+        self.directory = Path(directory)
+        self.format = resolve_store_format(store_format)
+        self.compact_threshold = compact_threshold
+    
+    def append_run(self, results: List[QueryResult], run_id: Optional[str] = None) -> Path:
+        run_id = run_id or new_run_id()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        columns = results_to_columns(results, run_id)
+        
+        if self.format == JSONL:
+            # JSON Lines fallback: one shared file, appended row by row
+            file_path = self.directory / JSONL_FILE_NAME
+            with open(file_path, 'a', encoding='utf-8') as f:
+                for row in columns_to_rows(columns):
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            file_path = self.directory / f"run-{run_id}.{self.format}"
+            self._write_columns(file_path, columns)
+            if self.compact_threshold and len(self.run_files()) > self.compact_threshold:
+                self.compact()
+        
+        logger.info(f"Appended run {run_id} ({len(results)} results) to {file_path}")
+        return file_path
+    
+    def _write_columns(self, file_path: Path, columns: Dict[str, np.ndarray]):
+        tmp_path = file_path.with_name(file_path.name + ".tmp")
+        if self.format == PARQUET:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            arrays = {
+                name: pa.array(columns[name], type=pa.string()) if name in TEXT_COLUMNS else columns[name]
+                for name in COLUMNS
+            }
+            pq.write_table(pa.table(arrays), tmp_path)
+        else:
+            arrays = {name: values for name, values in columns.items() if name not in TEXT_COLUMNS}
+            for name in TEXT_COLUMNS:
+                arrays[f"{name}.data"], arrays[f"{name}.offsets"] = encode_text(columns[name])
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+        tmp_path.replace(file_path)
+    
+    def run_files(self) -> List[Path]:
+        if not self.directory.exists():
+            return []
+        files = [
+            path for path in self.directory.iterdir()
+            if path.suffix.lstrip(".") in STORE_FORMATS
+            and (path.name.startswith(("run-", "compacted-")) or path.name == JSONL_FILE_NAME)
+        ]
+        return sorted(files)
+    
+    def load(self) -> Dict[str, np.ndarray]:
+        return concat_columns([self._read_file(path) for path in self.run_files()])
+    
+    def load_run(self, run_id: Optional[str] = None) -> Dict[str, np.ndarray]:
+        # Defaults to the most recent run
+        columns = self.load()
+        if len(columns["run_id"]) == 0:
+            return columns
+        run_id = run_id or str(np.unique(columns["run_id"])[-1])
+        return select_rows(columns, columns["run_id"] == run_id)
+    
+    def run_ids(self) -> List[str]:
+        return [str(run_id) for run_id in np.unique(self.load()["run_id"])]
+    
+    def compact(self) -> Optional[Path]:
+        # Merge every run into a single file so loading many runs costs one read
+        files = self.run_files()
+        if len(files) <= 1 or self.format == JSONL:
+            return None
+        columns = self.load()
+        file_path = self.directory / f"compacted-{np.unique(columns['run_id'])[-1]}.{self.format}"
+        self._write_columns(file_path, columns)
+        for path in files:
+            if path != file_path:
+                path.unlink()
+        logger.info(f"Compacted {len(files)} run files into {file_path}")
+        return file_path
+    
+    def _read_file(self, file_path: Path) -> Dict[str, np.ndarray]:
+        suffix = file_path.suffix.lstrip(".")
+        if suffix == NPZ:
+            with np.load(file_path, allow_pickle=False) as data:
+                columns = {name: data[name] for name in COLUMNS if name not in TEXT_COLUMNS}
+                for name in TEXT_COLUMNS:
+                    if name in data:
+                        # Written before text columns were stored as buffers
+                        columns[name] = string_column(name, data[name].tolist())
+                    else:
+                        columns[name] = decode_text(name, data[f"{name}.data"], data[f"{name}.offsets"])
+                return columns
+        if suffix == PARQUET:
+            import pyarrow.parquet as pq
+            table = pq.read_table(file_path, columns=COLUMNS)
+            return {
+                name: string_column(name, table.column(name).to_pylist()) if name in TEXT_COLUMNS
+                else table.column(name).to_numpy(zero_copy_only=False).astype(NUMERIC_COLUMNS.get(name, str))
+                for name in COLUMNS
+            }
+        return self._read_jsonl(file_path)
+    
+    def _read_jsonl(self, file_path: Path) -> Dict[str, np.ndarray]:
+        values = {name: [] for name in COLUMNS}
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                for name in COLUMNS:
+                    value = row.get(name, 0 if name in NUMERIC_COLUMNS else "")
+                    if name in ("keywords_found", "keywords_expected"):
+                        value = KEYWORD_SEPARATOR.join(value)
+                    values[name].append(value)
+        columns = {name: np.array(values[name], dtype=dtype) for name, dtype in NUMERIC_COLUMNS.items()}
+        columns.update({name: string_column(name, values[name]) for name in STRING_COLUMNS})
+        return columns
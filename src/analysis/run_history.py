@@ -0,0 +1,195 @@
+import json
+import subprocess
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.stats import mannwhitneyu
+
+from src.analysis.metrics_calculator import QueryResult
+from src.analysis.results_store import ResultsStore, new_run_id
+from src.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+METADATA_FILE_NAME = "run_metadata.jsonl"
+
+# Metadata fields that change what a run measures; differences are reported next to the deltas
+CONFOUNDING_FIELDS = ["git_commit", "model", "corpus_hash", "prompt_hash", "concurrency"]
+
+
+@dataclass
+class RunMetadata:
+    run_id: str
+    created_at: str
+    git_commit: str = "unknown"
+    model: str = ""
+    corpus_hash: str = ""
+    prompt_hash: str = ""
+    concurrency: int = 1
+    result_count: int = 0
+    extra: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class MetricComparison:
+    bot_type: str
+    metric: str
+    baseline_n: int
+    candidate_n: int
+    baseline_median: float
+    candidate_median: float
+    baseline_mean: float
+    candidate_mean: float
+    change: float
+    p_value: float
+    regression: bool
+    improvement: bool
+    
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def current_git_commit(repo_dir: Path) -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=repo_dir, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=repo_dir, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}+dirty" if dirty else commit
+
+
+class RunHistory:
+    # Per-run metadata lives next to the results store as append-only JSON Lines
+    def __init__(self, store: ResultsStore):
+        self.store = store
+        self.metadata_path = store.directory / METADATA_FILE_NAME
+    
+    def record_run(self, results: List[QueryResult], **metadata) -> RunMetadata:
+        run = RunMetadata(
+            run_id=new_run_id(),
+            created_at=datetime.now(timezone.utc).isoformat(),
+            result_count=len(results),
+            **metadata
+        )
+        self.store.append_run(results, run_id=run.run_id)
+        with open(self.metadata_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(asdict(run), ensure_ascii=False) + "\n")
+        return run
+    
+    def list_runs(self) -> List[RunMetadata]:
+        runs = {}
+        if self.metadata_path.exists():
+            with open(self.metadata_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = RunMetadata(**json.loads(line))
+                        runs[entry.run_id] = entry
+        
+        # Runs stored before metadata was recorded still show up, without it
+        for run_id in self.store.run_ids():
+            if run_id not in runs:
+                runs[run_id] = RunMetadata(run_id=run_id, created_at="")
+        return [runs[run_id] for run_id in sorted(runs)]
+    
+    def metadata_differences(self, baseline_ids: Sequence[str], candidate_ids: Sequence[str]) -> Dict[str, tuple]:
+        runs = {run.run_id: run for run in self.list_runs()}
+        differences = {}
+        for name in CONFOUNDING_FIELDS:
+            baseline_values = sorted({str(getattr(runs[run_id], name)) for run_id in baseline_ids if run_id in runs})
+            candidate_values = sorted({str(getattr(runs[run_id], name)) for run_id in candidate_ids if run_id in runs})
+            if baseline_values != candidate_values:
+                differences[name] = (", ".join(baseline_values), ", ".join(candidate_values))
+        return differences
+    
+    def compare(
+        self,
+        baseline_ids: Sequence[str],
+        candidate_ids: Sequence[str],
+        alpha: float = 0.05,
+        min_latency_change: float = 0.10,
+        min_relevance_change: float = 0.05
+    ) -> List[MetricComparison]:
+        columns = self.store.load()
+        baseline_mask = np.isin(columns["run_id"], list(baseline_ids))
+        candidate_mask = np.isin(columns["run_id"], list(candidate_ids))
+        
+        comparisons = []
+        for bot_type in sorted(set(columns["bot_type"].tolist())):
+            bot_mask = columns["bot_type"] == bot_type
+            baseline = {name: values[bot_mask & baseline_mask] for name, values in columns.items()}
+            candidate = {name: values[bot_mask & candidate_mask] for name, values in columns.items()}
+            if len(baseline["run_id"]) == 0 or len(candidate["run_id"]) == 0:
+                continue
+            
+            # Latency: relative change of the median, higher is worse
+            comparisons.append(self._compare_metric(
+                bot_type, "response_time_ms",
+                baseline["response_time_ms"], candidate["response_time_ms"],
+                alpha, min_latency_change, relative=True, higher_is_better=False
+            ))
+            # Relevance: absolute change of the mean score, lower is worse
+            comparisons.append(self._compare_metric(
+                bot_type, "relevance_score",
+                baseline["relevance_score"], candidate["relevance_score"],
+                alpha, min_relevance_change, relative=False, higher_is_better=True
+            ))
+        return comparisons
+    
+    def _compare_metric(
+        self,
+        bot_type: str,
+        metric: str,
+        baseline: np.ndarray,
+        candidate: np.ndarray,
+        alpha: float,
+        min_change: float,
+        relative: bool,
+        higher_is_better: bool
+    ) -> MetricComparison:
+        baseline_median = float(np.median(baseline))
+        candidate_median = float(np.median(candidate))
+        baseline_mean = float(baseline.mean())
+        candidate_mean = float(candidate.mean())
+        
+        if relative:
+            change = (candidate_median - baseline_median) / baseline_median if baseline_median > 0 else 0.0
+        else:
+            change = candidate_mean - baseline_mean
+        
+        # Rank-based, so a few slow outliers can't fake a shift in the typical query
+        p_value = float(mannwhitneyu(baseline, candidate, alternative="two-sided").pvalue)
+        if np.isnan(p_value):
+            p_value = 1.0
+        
+        significant = p_value < alpha and abs(change) >= min_change
+        worse = change < 0 if higher_is_better else change > 0
+        return MetricComparison(
+            bot_type=bot_type,
+            metric=metric,
+            baseline_n=len(baseline),
+            candidate_n=len(candidate),
+            baseline_median=baseline_median,
+            candidate_median=candidate_median,
+            baseline_mean=baseline_mean,
+            candidate_mean=candidate_mean,
+            change=change,
+            p_value=p_value,
+            regression=significant and worse,
+            improvement=significant and not worse
+        )
+    
+    def default_comparison_runs(self) -> Optional[tuple]:
+        # Latest run against the one before it
+        run_ids = [run.run_id for run in self.list_runs()]
+        if len(run_ids) < 2:
+            return None
+        return [run_ids[-2]], [run_ids[-1]]
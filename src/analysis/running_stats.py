@@ -0,0 +1,123 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class P2Quantile:
+    # P² estimator (Jain & Chlamtac): tracks one quantile with five markers, so memory and
+    # update cost stay constant however many values are added
+    def __init__(self, quantile: float):
+        self.quantile = quantile
+        self.heights: List[float] = []
+        self.positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.desired = [1.0, 1 + 2 * quantile, 1 + 4 * quantile, 3 + 2 * quantile, 5.0]
+        self.increments = [0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0]
+    
+    def add(self, value: float):
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+        
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+        
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        
+        for i in range(1, 4):
+            offset = self.desired[i] - self.positions[i]
+            room_above = self.positions[i + 1] - self.positions[i] > 1
+            room_below = self.positions[i - 1] - self.positions[i] < -1
+            if (offset >= 1 and room_above) or (offset <= -1 and room_below):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                self.positions[i] += step
+    
+    def _parabolic(self, i: int, step: int) -> float:
+        n, h = self.positions, self.heights
+        return h[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1])
+        )
+    
+    def _linear(self, i: int, step: int) -> float:
+        n, h = self.positions, self.heights
+        return h[i] + step * (h[i + step] - h[i]) / (n[i + step] - n[i])
+    
+    def value(self) -> float:
+        if not self.heights:
+            return 0.0
+        if len(self.heights) < 5:
+            # Too few values for the markers: interpolate between the exact order statistics
+            position = (len(self.heights) - 1) * self.quantile
+            lower = int(position)
+            upper = min(lower + 1, len(self.heights) - 1)
+            return self.heights[lower] + (self.heights[upper] - self.heights[lower]) * (position - lower)
+        return self.heights[2]
+
+
+@dataclass
+class RunningStats:
+    count: int = 0
+    total: float = 0.0
+    mean: float = 0.0
+    m2: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+    quantiles: Dict[float, P2Quantile] = field(
+        default_factory=lambda: {q: P2Quantile(q) for q in DEFAULT_QUANTILES}
+    )
+    
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        # Welford's update: numerically stable variance without keeping the values
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        for estimator in self.quantiles.values():
+            estimator.add(value)
+    
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+    
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+    
+    def quantile(self, q: float) -> float:
+        return self.quantiles[q].value()
+    
+    def to_dict(self, scale: float = 1.0, digits: int = 2) -> dict:
+        if self.count == 0:
+            return {"count": 0}
+        summary = {
+            "count": self.count,
+            "mean": round(self.mean * scale, digits),
+            "stddev": round(self.stddev * scale, digits),
+            "min": round(self.minimum * scale, digits),
+            "max": round(self.maximum * scale, digits),
+        }
+        for q in self.quantiles:
+            summary[f"p{q * 100:g}"] = round(self.quantile(q) * scale, digits)
+        return summary
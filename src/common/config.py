@@ -1,6 +1,7 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, List
 from dotenv import load_dotenv
 
 from src.common.exceptions import ConfigurationError
@@ -10,20 +11,69 @@ from src.common.exceptions import ConfigurationError
 class BotConfig:
     token: str
     log_level: str = "INFO"
+    ready_file: str = ""
+    health_host: str = "0.0.0.0"
+    health_port: int = 0
+    telegram_base_url: str = ""
+    send_global_rate: float = 25.0
+    send_global_burst: int = 5
+    send_chat_rate: float = 1.0
+    send_chat_burst: int = 3
+    send_queue_size: int = 1000
+    short_reply_chars: int = 280
+    resource_check_seconds: float = 0.0
 
 
 @dataclass
 class NLPBotConfig(BotConfig):
     similarity_threshold: float = 0.3
+    query_cache_size: int = 1024
+    corpus_path: str = ""
+    answer_store_dir: str = ""
+    answer_cache_size: int = 256
+    retrieval_engine: str = "tfidf"
+    hashing_n_features: int = 2 ** 18
+    hashing_n_bigram_features: int = 2 ** 18
+    min_bigram_df: int = 1
+    shard_partition_by: str = "category"
+    shard_count: int = 4
+    embedding_model_path: str = ""
+    dense_index: str = "exact"
+    dense_quantization: str = "float16"
+    dense_similarity_threshold: float = 0.5
+    hybrid_fusion: str = "rrf"
+    hybrid_lexical_weight: float = 0.5
 
 
 @dataclass
 class LLMBotConfig(BotConfig):
     openai_api_key: str = ""
+    openai_base_url: str = ""
     model: str = ""
     temperature: float = 0.7
     max_tokens: int = 500
     max_conversation_history: int = 10
+    reasoning_effort: str = ""
+    deduplicate_prompts: bool = True
+    output_budgets: Dict[str, int] = field(default_factory=dict)
+    speculative_answering: bool = False
+    similarity_threshold: float = 0.3
+    speculative_accept_score: float = 0.6
+    speculative_deadline_ms: int = 2500
+    speculation_log_path: str = ""
+    warm_cache_dir: str = ""
+    warm_cache_ttl_seconds: int = 86400
+    warm_cache_max_staleness_seconds: int = 604800
+    input_cost_per_1m: float = 0.0
+    cached_input_cost_per_1m: float = 0.0
+    output_cost_per_1m: float = 0.0
+    partition_role: str = "standalone"
+    partition_workers: List[str] = field(default_factory=list)
+    partition_secret: str = ""
+    partition_host: str = "127.0.0.1"
+    partition_port: int = 8090
+    partition_check_seconds: float = 2.0
+    partition_drain_seconds: float = 10.0
 
 
 def load_environment() -> None:
@@ -41,17 +91,82 @@ def validate_environment_variable(var_name: str) -> str:
     return value
 
 
+def parse_output_budgets(value: str) -> Dict[str, int]:
+    budgets = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        intent, _, budget = item.partition("=")
+        intent = intent.strip()
+        try:
+            tokens = int(budget)
+        except ValueError:
+            raise ConfigurationError(f"Invalid output budget '{item}', expected intent=tokens")
+        # The Responses API rejects max_output_tokens below 16
+        if tokens < 16:
+            raise ConfigurationError(f"Output budget for '{intent}' must be at least 16 tokens")
+        budgets[intent] = tokens
+    return budgets
+
+
+def load_shared_bot_settings() -> dict:
+    # Settings of BotConfig that both bots read the same way
+    settings = {
+        "ready_file": os.getenv("READY_FILE", ""),
+        "health_host": os.getenv("HEALTH_HOST", "0.0.0.0"),
+        "health_port": int(os.getenv("HEALTH_PORT", "0")),
+        "telegram_base_url": os.getenv("TELEGRAM_BASE_URL", "").rstrip("/"),
+        "send_global_rate": float(os.getenv("SEND_GLOBAL_RATE", "25")),
+        "send_global_burst": int(os.getenv("SEND_GLOBAL_BURST", "5")),
+        "send_chat_rate": float(os.getenv("SEND_CHAT_RATE", "1")),
+        "send_chat_burst": int(os.getenv("SEND_CHAT_BURST", "3")),
+        "send_queue_size": int(os.getenv("SEND_QUEUE_SIZE", "1000")),
+        "short_reply_chars": int(os.getenv("SHORT_REPLY_CHARS", "280")),
+        "resource_check_seconds": float(os.getenv("RESOURCE_CHECK_SECONDS", "0"))
+    }
+    if settings["send_global_rate"] <= 0 or settings["send_chat_rate"] <= 0:
+        raise ConfigurationError("SEND_GLOBAL_RATE and SEND_CHAT_RATE must be positive")
+    if settings["send_global_burst"] < 1 or settings["send_chat_burst"] < 1 or settings["send_queue_size"] < 1:
+        raise ConfigurationError("SEND_GLOBAL_BURST, SEND_CHAT_BURST and SEND_QUEUE_SIZE must be at least 1")
+    return settings
+
+
 def load_nlp_bot_config() -> NLPBotConfig:
     load_environment()
     
     token = validate_environment_variable("NLP_BOT_TOKEN")
     log_level = os.getenv("LOG_LEVEL", "INFO")
     similarity_threshold = float(os.getenv("SIMILARITY_THRESHOLD", "0.3"))
+    query_cache_size = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+    retrieval_engine = os.getenv("NLP_RETRIEVAL_ENGINE", "tfidf")
+    
+    embedding_model_path = os.getenv("EMBEDDING_MODEL_PATH", "")
+    if retrieval_engine in ("dense", "hybrid") and not embedding_model_path:
+        raise ConfigurationError(
+            f"EMBEDDING_MODEL_PATH is required when NLP_RETRIEVAL_ENGINE={retrieval_engine}"
+        )
     
     return NLPBotConfig(
         token=token,
         log_level=log_level,
-        similarity_threshold=similarity_threshold
+        **load_shared_bot_settings(),
+        similarity_threshold=similarity_threshold,
+        query_cache_size=query_cache_size,
+        corpus_path=os.getenv("CORPUS_PATH", ""),
+        answer_store_dir=os.getenv("ANSWER_STORE_DIR", ""),
+        answer_cache_size=int(os.getenv("ANSWER_CACHE_SIZE", "256")),
+        retrieval_engine=retrieval_engine,
+        hashing_n_features=int(os.getenv("HASHING_N_FEATURES", str(2 ** 18))),
+        hashing_n_bigram_features=int(os.getenv("HASHING_N_BIGRAM_FEATURES", str(2 ** 18))),
+        min_bigram_df=int(os.getenv("MIN_BIGRAM_DF", "1")),
+        shard_partition_by=os.getenv("SHARD_PARTITION_BY", "category"),
+        shard_count=int(os.getenv("SHARD_COUNT", "4")),
+        embedding_model_path=embedding_model_path,
+        dense_index=os.getenv("DENSE_INDEX", "exact"),
+        dense_quantization=os.getenv("DENSE_QUANTIZATION", "float16"),
+        dense_similarity_threshold=float(os.getenv("DENSE_SIMILARITY_THRESHOLD", "0.5")),
+        hybrid_fusion=os.getenv("HYBRID_FUSION", "rrf"),
+        hybrid_lexical_weight=float(os.getenv("HYBRID_LEXICAL_WEIGHT", "0.5"))
     )
 
 
@@ -65,13 +180,64 @@ def load_llm_bot_config() -> LLMBotConfig:
     temperature = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
     max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "500"))
     max_history = int(os.getenv("MAX_CONVERSATION_HISTORY", "10"))
+    input_cost = float(os.getenv("OPENAI_INPUT_COST_PER_1M", "0.05"))
+    cached_input_cost = float(os.getenv("OPENAI_CACHED_INPUT_COST_PER_1M", "0.005"))
+    output_cost = float(os.getenv("OPENAI_OUTPUT_COST_PER_1M", "0.40"))
+    reasoning_effort = os.getenv("OPENAI_REASONING_EFFORT", "")
+    openai_base_url = os.getenv("OPENAI_BASE_URL", "")
+    deduplicate_prompts = os.getenv("DEDUPLICATE_PROMPTS", "true").lower() == "true"
+    output_budgets = parse_output_budgets(os.getenv("INTENT_OUTPUT_BUDGETS", ""))
+    speculative_answering = os.getenv("SPECULATIVE_ANSWERING", "false").lower() == "true"
+    similarity_threshold = float(os.getenv("SIMILARITY_THRESHOLD", "0.3"))
+    speculative_accept_score = float(os.getenv("SPECULATIVE_ACCEPT_SCORE", "0.6"))
+    speculative_deadline_ms = int(os.getenv("SPECULATIVE_DEADLINE_MS", "2500"))
+    speculation_log_path = os.getenv("SPECULATION_LOG_PATH", "")
+    warm_cache_dir = os.getenv("WARM_CACHE_DIR", "")
+    warm_cache_ttl_seconds = int(os.getenv("WARM_CACHE_TTL_SECONDS", "86400"))
+    warm_cache_max_staleness_seconds = int(os.getenv("WARM_CACHE_MAX_STALENESS_SECONDS", "604800"))
+    if warm_cache_max_staleness_seconds < warm_cache_ttl_seconds:
+        raise ConfigurationError("WARM_CACHE_MAX_STALENESS_SECONDS must be at least WARM_CACHE_TTL_SECONDS")
+    partition_role = os.getenv("LLM_PARTITION_ROLE", "standalone").lower()
+    if partition_role not in ("standalone", "router", "worker"):
+        raise ConfigurationError(f"Invalid LLM_PARTITION_ROLE '{partition_role}', expected standalone, router or worker")
+    partition_workers = [url.strip().rstrip("/") for url in os.getenv("LLM_PARTITION_WORKERS", "").split(",") if url.strip()]
+    partition_secret = os.getenv("LLM_PARTITION_SECRET", "")
+    if partition_role != "standalone":
+        # Workers only talk to the configured workers, and only to callers holding the secret
+        if not partition_workers:
+            raise ConfigurationError(f"LLM_PARTITION_WORKERS is required when LLM_PARTITION_ROLE={partition_role}")
+        if not partition_secret:
+            raise ConfigurationError(f"LLM_PARTITION_SECRET is required when LLM_PARTITION_ROLE={partition_role}")
     
     return LLMBotConfig(
         token=token,
         openai_api_key=openai_api_key,
+        openai_base_url=openai_base_url,
         log_level=log_level,
+        **load_shared_bot_settings(),
         model=model,
         temperature=temperature,
         max_tokens=max_tokens,
-        max_conversation_history=max_history
+        max_conversation_history=max_history,
+        input_cost_per_1m=input_cost,
+        cached_input_cost_per_1m=cached_input_cost,
+        output_cost_per_1m=output_cost,
+        reasoning_effort=reasoning_effort,
+        deduplicate_prompts=deduplicate_prompts,
+        output_budgets=output_budgets,
+        speculative_answering=speculative_answering,
+        similarity_threshold=similarity_threshold,
+        speculative_accept_score=speculative_accept_score,
+        speculative_deadline_ms=speculative_deadline_ms,
+        speculation_log_path=speculation_log_path,
+        warm_cache_dir=warm_cache_dir,
+        warm_cache_ttl_seconds=warm_cache_ttl_seconds,
+        warm_cache_max_staleness_seconds=warm_cache_max_staleness_seconds,
+        partition_role=partition_role,
+        partition_workers=partition_workers,
+        partition_secret=partition_secret,
+        partition_host=os.getenv("LLM_PARTITION_HOST", "127.0.0.1"),
+        partition_port=int(os.getenv("LLM_PARTITION_PORT", "8090")),
+        partition_check_seconds=float(os.getenv("LLM_PARTITION_CHECK_SECONDS", "2")),
+        partition_drain_seconds=float(os.getenv("LLM_PARTITION_DRAIN_SECONDS", "10"))
     )
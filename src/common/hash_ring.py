@@ -0,0 +1,46 @@
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Tuple
+
+DEFAULT_VIRTUAL_NODES = 160
+
+
+def stable_hash(value: str) -> int:
+    # hash() is salted per process; every router and worker must agree on the ring
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    # Consistent hashing with virtual nodes: adding or removing one of N nodes moves only
+    # about 1/N of the keys, and every other key keeps its owner
+    def __init__(self, nodes: Iterable[str] = (), virtual_nodes: int = DEFAULT_VIRTUAL_NODES):
+        self.virtual_nodes = virtual_nodes
+        self.nodes: Tuple[str, ...] = tuple(sorted(set(nodes)))
+        points: List[Tuple[int, str]] = sorted(
+            (stable_hash(f"{node}#{index}"), node)
+            for node in self.nodes
+            for index in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+    
+    def __len__(self) -> int:
+        return len(self.nodes)
+    
+    def owner(self, key) -> str:
+        if not self.nodes:
+            raise LookupError("Hash ring has no nodes")
+        index = bisect.bisect(self._hashes, stable_hash(str(key)))
+        return self._owners[index % len(self._owners)]
+    
+    def share(self) -> Dict[str, float]:
+        # Fraction of the hash space each node owns
+        if not self.nodes:
+            return {}
+        space = 2 ** 64
+        shares = dict.fromkeys(self.nodes, 0.0)
+        previous = self._hashes[-1] - space
+        for point, node in zip(self._hashes, self._owners):
+            shares[node] += (point - previous) / space
+            previous = point
+        return shares
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+
+from src.common.logger import get_logger
+from src.common.metrics import MetricsRegistry
+from src.common.readiness import Readiness
+
+logger = get_logger(__name__)
+
+REQUEST_TIMEOUT_SECONDS = 5.0
+MAX_HEADER_LINES = 100
+MAX_BODY_BYTES = 1024 * 1024
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def read_http_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+    # Method, path without query string, lower-cased headers and body of one HTTP/1.x request
+    request_line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT_SECONDS)
+    headers: Dict[str, str] = {}
+    for _ in range(MAX_HEADER_LINES):
+        header = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT_SECONDS)
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    
+    length = min(int(headers.get("content-length", "0") or 0), MAX_BODY_BYTES)
+    body = await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT_SECONDS) if length else b""
+    parts = request_line.decode("latin-1").split()
+    method, path = (parts[0], parts[1]) if len(parts) >= 2 else ("", "")
+    return method, path.split("?", 1)[0], headers, body
+
+
+async def write_http_response(writer: asyncio.StreamWriter, status: str, content_type: str, body: str, head_only: bool = False):
+    payload = body.encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "Connection: close\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + (b"" if head_only else payload))
+    await writer.drain()
+
+
+class HealthServer:
+    # /healthz, /readyz and Prometheus /metrics on a thread with its own event loop: it is up
+    # before the engine has loaded, and a scrape never runs on the loop handling messages
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        readiness: Readiness,
+        host: str = "0.0.0.0",
+        port: int = 8080
+    ):
+        self.registry = registry
+        self.readiness = readiness
+        self.host = host
+        self.port = port
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._started = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="health-server", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._startup_error is not None:
+            raise self._startup_error
+        logger.info(f"Health server listening on http://{self.host}:{self.port}")
+    
+    def stop(self):
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(timeout=REQUEST_TIMEOUT_SECONDS)
+            self._thread = None
+    
+    def _run(self):
+        asyncio.run(self._serve())
+    
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        try:
+            server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        except OSError as e:
+            self._startup_error = e
+            self._started.set()
+            return
+        
+        # Port 0 binds a free port; report the real one
+        self.port = server.sockets[0].getsockname()[1]
+        self._started.set()
+        async with server:
+            await self._stopped.wait()
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, path, _, _ = await read_http_request(reader)
+            status, content_type, body = self.route(method, path)
+            await write_http_response(writer, status, content_type, body, head_only=method == "HEAD")
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    def route(self, method: str, path: str) -> Tuple[str, str, str]:
+        if method not in ("GET", "HEAD"):
+            return "405 Method Not Allowed", "text/plain", "method not allowed\n"
+        if path == "/healthz":
+            # The process is up and this thread is serving
+            return "200 OK", "text/plain", "ok\n"
+        if path == "/readyz":
+            if self.readiness.is_ready():
+                return "200 OK", "text/plain", "ready\n"
+            return "503 Service Unavailable", "text/plain", "not ready\n"
+        if path == "/metrics":
+            return "200 OK", METRICS_CONTENT_TYPE, self.registry.render()
+        return "404 Not Found", "text/plain", "not found\n"
@@ -0,0 +1,220 @@
+import bisect
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.common.cache import CacheStats
+from src.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_sample(name: str, labels: Dict[str, str], value: float) -> str:
+    label_text = ",".join(f'{key}="{escape_label_value(str(val))}"' for key, val in labels.items())
+    if math.isinf(value):
+        value_text = "+Inf" if value > 0 else "-Inf"
+    elif float(value).is_integer():
+        value_text = str(int(value))
+    else:
+        value_text = repr(float(value))
+    return f"{name}{{{label_text}}} {value_text}" if label_text else f"{name} {value_text}"
+
+
+class Metric:
+    type_name = "untyped"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        # Updated from the bot's event loop and read from the metrics server thread
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+    
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type_name = "counter"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+    
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, self._labels(key), value) for key, value in values]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+    
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket (the last one is +Inf), sum and count
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+    
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0, 0])
+                self._series[key] = series
+            series[0][index] += 1
+            series[1][0] += value
+            series[1][1] += 1
+    
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            series = [(key, list(counts), list(totals)) for key, (counts, totals) in self._series.items()]
+        
+        samples = []
+        for key, counts, (total, count) in series:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", {**labels, "le": format_bound(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+def format_bound(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else repr(float(bound))
+
+
+class CallbackMetric(Metric):
+    # Read at scrape time from an existing stats source (cache hits, active conversations),
+    # so the code being measured needs no changes. `collect` returns one value, or a value
+    # per label tuple
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        type_name: str,
+        collect: Callable[[], Union[float, Dict[Tuple[str, ...], float], None]],
+        labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.type_name = type_name
+        self.collect = collect
+    
+    def samples(self) -> List[Sample]:
+        values = self.collect()
+        if values is None:
+            return []
+        if not isinstance(values, dict):
+            return [(self.name, {}, float(values))]
+        return [(self.name, self._labels(key), float(value)) for key, value in values.items()]
+
+
+class MetricsRegistry:
+    def __init__(self, const_labels: Optional[Dict[str, str]] = None):
+        self.const_labels = dict(const_labels or {})
+        self.metrics: List[Metric] = []
+    
+    def register(self, metric: Metric) -> Metric:
+        if any(existing.name == metric.name for existing in self.metrics):
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics.append(metric)
+        return metric
+    
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+    
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+    
+    def callback(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable,
+        type_name: str = "gauge",
+        labelnames: Sequence[str] = ()
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help_text, type_name, collect, labelnames))
+    
+    def render(self) -> str:
+        # Prometheus text exposition format 0.0.4
+        lines = []
+        for metric in list(self.metrics):
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                # One failing stats source must not break the whole scrape
+                logger.warning(f"Collecting metric {metric.name} failed: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in samples:
+                lines.append(format_sample(name, {**self.const_labels, **labels}, value))
+        return "\n".join(lines) + "\n"
+
+
+def register_cache_metrics(registry: MetricsRegistry, prefix: str, collect: Callable[[], Dict[str, CacheStats]]):
+    # Hit, miss and size series for every cache `collect` reports, labelled by cache name
+    def field(name: str):
+        return lambda: {(cache,): getattr(stats, name) for cache, stats in collect().items()}
+    
+    registry.callback(f"{prefix}_cache_hits_total", "Cache hits", field("hits"), "counter", ("cache",))
+    registry.callback(f"{prefix}_cache_misses_total", "Cache misses", field("misses"), "counter", ("cache",))
+    registry.callback(f"{prefix}_cache_entries", "Entries currently cached", field("size"), "gauge", ("cache",))
+    registry.callback(f"{prefix}_cache_max_entries", "Cache capacity", field("max_size"), "gauge", ("cache",))
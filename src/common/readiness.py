@@ -0,0 +1,45 @@
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from src.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Imported first by the runners, so startup times are measured from (almost) process start
+PROCESS_STARTED = time.monotonic()
+
+
+class Readiness:
+    # Set once the bot can answer messages. The optional ready file lets container
+    # health checks see the same signal (`test -f`)
+    def __init__(self, name: str, ready_file: Optional[Path] = None):
+        self.name = name
+        self.ready_file = ready_file
+        self.ready_after_ms: Optional[float] = None
+        self._event = threading.Event()
+        if ready_file is not None and ready_file.exists():
+            # Left over from a previous process
+            ready_file.unlink()
+    
+    def mark_ready(self):
+        if self._event.is_set():
+            return
+        self.ready_after_ms = (time.monotonic() - PROCESS_STARTED) * 1000
+        self._event.set()
+        if self.ready_file is not None:
+            self.ready_file.parent.mkdir(parents=True, exist_ok=True)
+            self.ready_file.write_text(f"{self.ready_after_ms:.0f}\n", encoding='utf-8')
+        logger.info(f"{self.name} ready {self.ready_after_ms:.0f}ms after process start")
+    
+    def mark_not_ready(self):
+        self._event.clear()
+        if self.ready_file is not None and self.ready_file.exists():
+            self.ready_file.unlink()
+    
+    def is_ready(self) -> bool:
+        return self._event.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from src.common.logger import get_logger
+from src.common.metrics import MetricsRegistry
+
+logger = get_logger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+SYSTEM_PROMPT_PATH = DATA_DIR / "prompts" / "system_prompt.txt"
+WARM_QUERIES_PATH = DATA_DIR / "prompts" / "warm_queries.json"
+CORPUS_PATH = DATA_DIR / "corpus" / "qa_pairs.json"
+
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def file_content_hash(file_path: Path) -> str:
+    # Same value as content_hash(file_path.read_bytes()), without holding the file in memory
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class Resource:
+    name: str
+    path: Path
+    # Parsed content, or the path itself for assets that are streamed rather than parsed
+    value: Any
+    version: str
+    size_bytes: int
+    loaded_at: float
+    stat_key: Tuple[int, int] = (0, 0)
+
+
+class ResourceLoader:
+    # Each asset is read and parsed once per process and shared by everything that uses it.
+    # Its version is the hash of the bytes that were parsed, so caches keyed by it never mix
+    # two versions of a file. Reloads swap in a new value only when the content changed
+    def __init__(self):
+        self._specs: Dict[str, Tuple[Path, Optional[Callable[[bytes], Any]]]] = {}
+        self._resources: Dict[str, Resource] = {}
+        self._lock = threading.Lock()
+        self.reloads: Dict[Tuple[str, str], int] = {}
+    
+    def register(self, name: str, path: Path, parse: Optional[Callable[[bytes], Any]] = None):
+        path = Path(path).resolve()
+        with self._lock:
+            registered = self._specs.get(name)
+            if registered is not None and registered != (path, parse):
+                raise ValueError(f"Resource {name} is already registered for {registered[0]} with another parser")
+            self._specs[name] = (path, parse)
+    
+    def get(self, name: str) -> Resource:
+        # Loads on first use; concurrent first calls read the file once
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+        with self._lock:
+            resource = self._resources.get(name)
+            if resource is None:
+                resource = self._read(name)
+                self._resources[name] = resource
+            return resource
+    
+    async def get_async(self, name: str) -> Resource:
+        resource = self._resources.get(name)
+        return resource if resource is not None else await asyncio.to_thread(self.get, name)
+    
+    def _read(self, name: str, unless_version: Optional[str] = None) -> Optional[Resource]:
+        path, parse = self._specs[name]
+        if not path.exists():
+            raise FileNotFoundError(f"Resource {name} not found: {path}")
+        stat = path.stat()
+        
+        if parse is None:
+            version, value, size = file_content_hash(path), path, stat.st_size
+            if version == unless_version:
+                return None
+        else:
+            data = path.read_bytes()
+            version, size = content_hash(data), len(data)
+            if version == unless_version:
+                return None
+            value = parse(data)
+        
+        logger.info(f"Loaded {name} version {version} from {path}")
+        return Resource(name, path, value, version, size, time.time(), (stat.st_mtime_ns, stat.st_size))
+    
+    def reload(self, name: str, force: bool = False) -> Optional[Resource]:
+        # The new version if the content changed or nothing was loaded before, None if it did
+        # not change or could not be loaded. Without `force`, a file whose size and mtime are
+        # unchanged is not read at all
+        current = self._resources.get(name)
+        result = "unchanged"
+        resource = None
+        try:
+            # Callers on the SIGHUP path don't await the result, so nothing may raise out of here
+            if current is None:
+                # The first load failed (a file missing at startup): this load is the change
+                with self._lock:
+                    current = self._resources.get(name)
+                    if current is None:
+                        resource = self._read(name)
+                        self._resources[name] = resource
+            else:
+                stat = current.path.stat()
+                if force or (stat.st_mtime_ns, stat.st_size) != current.stat_key:
+                    resource = self._read(name, unless_version=current.version)
+                    if resource is not None:
+                        with self._lock:
+                            self._resources[name] = resource
+        except Exception as e:
+            # A missing, half-written or invalid file: keep serving the current version
+            kept = f"keeping version {current.version}" if current is not None else "nothing loaded yet"
+            logger.error(f"Reloading {name} failed, {kept}: {e}")
+            result = "error"
+        
+        if resource is not None:
+            result = "changed"
+            previous = f"version {current.version}" if current is not None else "first load"
+            logger.info(f"Reloaded {name}: {previous} -> {resource.version}")
+        self.reloads[(name, result)] = self.reloads.get((name, result), 0) + 1
+        return resource
+    
+    async def reload_async(self, name: str, force: bool = False) -> Optional[Resource]:
+        return await asyncio.to_thread(self.reload, name, force)
+
+
+_loader = ResourceLoader()
+
+
+def get_resource_loader() -> ResourceLoader:
+    return _loader
+
+
+def start_reload_triggers(reload: Callable[[bool], Awaitable[None]], interval_seconds: float) -> Optional[asyncio.Task]:
+    # SIGHUP forces a reload; with an interval, changed files are also picked up by polling
+    loop = asyncio.get_running_loop()
+    if hasattr(signal, "SIGHUP"):
+        loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(reload(True)))
+    if interval_seconds <= 0:
+        return None
+    
+    async def poll():
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await reload(False)
+            except Exception as e:
+                logger.error(f"Resource reload failed: {e}")
+    
+    return asyncio.create_task(poll())
+
+
+def register_resource_metrics(registry: MetricsRegistry, collect: Callable[[], Dict[str, Optional[Resource]]]):
+    # The versions a bot is serving right now, which can trail the loader while a new
+    # version's index is still being built
+    def active() -> Dict[str, Resource]:
+        return {name: resource for name, resource in collect().items() if resource is not None}
+    
+    registry.callback(
+        "bot_resource_info", "Active version (content hash) of each loaded asset",
+        lambda: {(name, resource.version): 1 for name, resource in active().items()}, "gauge", ("resource", "version")
+    )
+    registry.callback(
+        "bot_resource_loaded_timestamp_seconds", "When the active version of each asset was loaded",
+        lambda: {(name,): resource.loaded_at for name, resource in active().items()}, "gauge", ("resource",)
+    )
+    registry.callback(
+        "bot_resource_reloads_total", "Reload checks by asset and result",
+        lambda: dict(get_resource_loader().reloads), "counter", ("resource", "result")
+    )
@@ -0,0 +1,359 @@
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from telegram.error import BadRequest, NetworkError, RetryAfter
+
+from src.common.logger import get_logger
+from src.common.metrics import MetricsRegistry
+
+logger = get_logger(__name__)
+
+# Telegram counts message length in UTF-16 code units
+TELEGRAM_MESSAGE_LIMIT = 4096
+SHORT = "short"
+LONG = "long"
+
+SPLIT_BOUNDARIES = [
+    re.compile(r"\n\s*\n"),
+    re.compile(r"\n"),
+    re.compile(r"(?<=[.!?…])\s+"),
+    re.compile(r"\s+")
+]
+
+
+def telegram_length(text: str) -> int:
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _prefix_within(text: str, limit: int) -> int:
+    # Longest prefix (in characters) that fits in `limit` UTF-16 code units
+    if telegram_length(text) <= limit:
+        return len(text)
+    low, high = 0, min(len(text), limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if telegram_length(text[:middle]) <= limit:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    # Cut at the last paragraph, line, sentence or word break that fits; hard cut otherwise
+    parts = []
+    rest = text
+    while telegram_length(rest) > limit:
+        window = _prefix_within(rest, limit)
+        cut = None
+        for boundary in SPLIT_BOUNDARIES:
+            breaks = [match for match in boundary.finditer(rest, 0, window + 1) if match.start() > 0]
+            if breaks:
+                cut = breaks[-1]
+                break
+        if cut is None:
+            parts.append(rest[:window])
+            rest = rest[window:]
+        else:
+            parts.append(rest[:cut.start()].rstrip())
+            rest = rest[cut.end():]
+    if rest.strip() or not parts:
+        parts.append(rest)
+    return parts
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    value = error.retry_after
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+    
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+    
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+@dataclass
+class OutboundMessage:
+    chat_id: int
+    text: str
+    priority: int
+    sequence: int
+    enqueued_at: float
+    options: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+
+
+class SendQueue:
+    # Outbound messages are queued per chat and sent by one dispatcher within a global and a
+    # per-chat token bucket. Chats whose next message is short go first, messages within a
+    # chat keep their order, and a flood-control error pauses every send until it expires
+    def __init__(
+        self,
+        send: Callable[..., Awaitable[Any]],
+        global_rate: float = 25.0,
+        global_burst: int = 5,
+        chat_rate: float = 1.0,
+        chat_burst: int = 3,
+        max_pending: int = 1000,
+        max_in_flight: int = 8,
+        short_reply_chars: int = 280,
+        max_retries: int = 3,
+        registry: Optional[MetricsRegistry] = None
+    ):
+        self.send = send
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_pending = max_pending
+        self.short_reply_chars = short_reply_chars
+        self.max_retries = max_retries
+        # Up to burst + rate sends can land in any one-second window; keep that under Telegram's limits
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        
+        self._chats: Dict[int, Deque[OutboundMessage]] = {}
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        # Chats waiting for a send slot, and chats waiting for their own bucket or a retry delay
+        self._ready: List[Tuple[int, int, int]] = []
+        self._delayed: List[Tuple[float, int, int]] = []
+        self._scheduled: Set[int] = set()
+        self._in_flight: Set[int] = set()
+        self._sequence = itertools.count()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._tasks: Set[asyncio.Task] = set()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.pending = 0
+        self.paused_until = 0.0
+        self.setup_metrics(registry or MetricsRegistry())
+    
+    def setup_metrics(self, registry: MetricsRegistry):
+        registry.callback("send_queue_pending", "Outbound messages queued or being sent", lambda: self.pending)
+        registry.callback("send_queue_chats", "Chats with queued outbound messages", lambda: len(self._chats))
+        registry.callback("send_queue_in_flight", "Outbound messages being sent", lambda: len(self._in_flight))
+        registry.callback(
+            "send_queue_paused", "1 while sends are paused by Telegram flood control",
+            lambda: int(time.monotonic() < self.paused_until)
+        )
+        self.messages_total = registry.counter(
+            "send_queue_messages_total", "Outbound messages by final outcome", ("outcome",)
+        )
+        self.retries_total = registry.counter("send_queue_retries_total", "Send retries by reason", ("reason",))
+        self.failures_total = registry.counter(
+            "send_queue_failures_total", "Outbound messages dropped without delivery, by reason", ("reason",)
+        )
+        self.split_parts_total = registry.counter(
+            "send_queue_split_parts_total", "Extra messages created by splitting long replies"
+        )
+        self.enqueue_wait = registry.histogram(
+            "send_queue_enqueue_wait_seconds", "Time handlers waited for queue space (backpressure)"
+        )
+        self.queue_delay = registry.histogram(
+            "send_queue_delay_seconds", "Time from enqueue to delivery", ("size",)
+        )
+    
+    def set_global_limit(self, rate: float, burst: int):
+        # Processes sending with the same bot token split its global limit between them
+        self.global_bucket.rate = rate
+        self.global_bucket.capacity = burst
+        self.global_bucket.tokens = min(self.global_bucket.tokens, burst)
+    
+    def start(self):
+        self._dispatcher = asyncio.create_task(self._dispatch())
+    
+    async def close(self, timeout: float = 5.0):
+        # Deliver what is queued if it fits in `timeout`, then stop
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if self.pending:
+            logger.warning(f"Send queue closed with {self.pending} undelivered messages")
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for task in list(self._tasks):
+            task.cancel()
+    
+    async def enqueue(self, chat_id: int, text: str, **options):
+        if not text or not text.strip():
+            # Telegram rejects empty messages; count it here rather than spend a send on it
+            logger.warning(f"Dropping empty message to chat {chat_id}")
+            self._record_failure("empty")
+            return
+        
+        parts = split_message(text)
+        priority = 0 if len(text) <= self.short_reply_chars else 1
+        
+        if self.pending + len(parts) > self.max_pending:
+            started = time.monotonic()
+            async with self._space:
+                await self._space.wait_for(lambda: self.pending == 0 or self.pending + len(parts) <= self.max_pending)
+            self.enqueue_wait.observe(time.monotonic() - started)
+        
+        now = time.monotonic()
+        queue = self._chats.setdefault(chat_id, deque())
+        for part in parts:
+            queue.append(OutboundMessage(chat_id, part, priority, next(self._sequence), now, options))
+        self.pending += len(parts)
+        self.split_parts_total.inc(len(parts) - 1)
+        
+        if chat_id not in self._scheduled:
+            self._schedule(chat_id, now)
+        self._wakeup.set()
+    
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+    
+    def _schedule(self, chat_id: int, now: float, not_before: float = 0.0):
+        head = self._chats[chat_id][0]
+        ready_at = max(now + self._bucket(chat_id).wait_time(now), not_before)
+        self._scheduled.add(chat_id)
+        if ready_at <= now:
+            heapq.heappush(self._ready, (head.priority, head.sequence, chat_id))
+        else:
+            heapq.heappush(self._delayed, (ready_at, head.sequence, chat_id))
+    
+    async def _dispatch(self):
+        while True:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, _, chat_id = heapq.heappop(self._delayed)
+                head = self._chats[chat_id][0]
+                heapq.heappush(self._ready, (head.priority, head.sequence, chat_id))
+            
+            wait = None
+            if now < self.paused_until:
+                wait = self.paused_until - now
+            elif self._ready:
+                wait = self.global_bucket.wait_time(now) or None
+                if wait is None:
+                    await self._slots.acquire()
+                    if time.monotonic() < self.paused_until:
+                        # A send hit flood control while this one waited for a slot
+                        self._slots.release()
+                        continue
+                    self._send_next()
+                    continue
+            elif self._delayed:
+                wait = self._delayed[0][0] - now
+            
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+    
+    def _send_next(self):
+        now = time.monotonic()
+        _, _, chat_id = heapq.heappop(self._ready)
+        message = self._chats[chat_id].popleft()
+        self.global_bucket.consume(now)
+        self._bucket(chat_id).consume(now)
+        self._in_flight.add(chat_id)
+        task = asyncio.create_task(self._deliver(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _deliver(self, message: OutboundMessage):
+        chat_id = message.chat_id
+        retry_delay = 0.0
+        delivered = False
+        try:
+            await self.send(chat_id=chat_id, text=message.text, **message.options)
+            delivered = True
+            self.queue_delay.observe(
+                time.monotonic() - message.enqueued_at, size=SHORT if message.priority == 0 else LONG
+            )
+        except RetryAfter as e:
+            # Flood control applies to the whole bot: every send waits, then this one goes first
+            wait = retry_after_seconds(e)
+            self.paused_until = max(self.paused_until, time.monotonic() + wait)
+            self.retries_total.inc(reason="flood")
+            logger.warning(f"Telegram flood control: pausing sends for {wait:.1f}s")
+            self._requeue(message)
+        except BadRequest as e:
+            if "parse_mode" in message.options:
+                # Usually Markdown the model or a split left unbalanced: the text still goes out
+                logger.warning(f"Telegram rejected the formatting of a message to chat {chat_id}, resending as plain text: {e}")
+                message.options = {key: value for key, value in message.options.items() if key != "parse_mode"}
+                self.retries_total.inc(reason="formatting")
+                self._requeue(message)
+            else:
+                logger.warning(f"Dropping message to chat {chat_id} rejected by Telegram: {e}")
+                self._record_failure("rejected")
+        except NetworkError as e:
+            if message.attempts >= self.max_retries:
+                logger.warning(f"Dropping message to chat {chat_id} after {message.attempts + 1} attempts: {e}")
+                self._record_failure("network")
+            else:
+                message.attempts += 1
+                retry_delay = 0.5 * 2 ** message.attempts
+                self.retries_total.inc(reason="network")
+                self._requeue(message)
+        except Exception as e:
+            logger.warning(f"Dropping message to chat {chat_id}: {e}")
+            self._record_failure("error")
+        finally:
+            self._slots.release()
+            self._in_flight.discard(chat_id)
+            self._finish(message, delivered, retry_delay)
+    
+    def _record_failure(self, reason: str):
+        self.failures_total.inc(reason=reason)
+        self.messages_total.inc(outcome="failed")
+    
+    def _requeue(self, message: OutboundMessage):
+        self._chats[message.chat_id].appendleft(message)
+    
+    def _finish(self, message: OutboundMessage, delivered: bool, retry_delay: float):
+        chat_id = message.chat_id
+        queue = self._chats[chat_id]
+        requeued = bool(queue) and queue[0] is message
+        if not requeued:
+            self.pending -= 1
+            if delivered:
+                self.messages_total.inc(outcome="sent")
+            asyncio.ensure_future(self._notify_space())
+        
+        now = time.monotonic()
+        self._scheduled.discard(chat_id)
+        if queue:
+            self._schedule(chat_id, now, not_before=now + retry_delay)
+        else:
+            del self._chats[chat_id]
+            if self._bucket(chat_id).is_full(now):
+                del self._chat_buckets[chat_id]
+        self._wakeup.set()
+    
+    async def _notify_space(self):
+        async with self._space:
+            self._space.notify_all()
@@ -0,0 +1,65 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class SingleflightStats:
+    calls: int
+    executions: int
+    in_flight: int
+    
+    @property
+    def collapsed(self) -> int:
+        return self.calls - self.executions
+    
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "in_flight": self.in_flight
+        }
+
+
+class Singleflight:
+    # Concurrent calls with the same key share one execution of `fn`
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+    
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            self.executions += 1
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # shield: one caller giving up must not cancel the call the others are waiting on
+        return await asyncio.shield(self.start(key, fn))
+    
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        # Mark the outcome as observed even when every caller was cancelled
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"Singleflight call for {key!r} failed: {future.exception()}")
+    
+    def is_in_flight(self, key: Hashable) -> bool:
+        return key in self._in_flight
+    
+    def get_stats(self) -> SingleflightStats:
+        return SingleflightStats(
+            calls=self.calls,
+            executions=self.executions,
+            in_flight=len(self._in_flight)
+        )
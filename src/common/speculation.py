@@ -0,0 +1,190 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from src.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+FAST = "fast"
+SLOW = "slow"
+
+ACCEPTED = "accepted"
+SLOW_READY = "slow_ready"
+DEADLINE = "deadline"
+SLOW_FAILED = "slow_failed"
+
+
+@dataclass
+class RaceOutcome:
+    value: Any
+    source: str
+    reason: str
+    fast_value: Any = None
+    slow_value: Any = None
+    fast_ms: Optional[float] = None
+    slow_ms: Optional[float] = None
+    served_ms: float = 0.0
+    slow_error: Optional[str] = None
+    context: Dict[str, Any] = field(default_factory=dict)
+    
+    def to_dict(self) -> dict:
+        return {
+            **self.context,
+            "source": self.source,
+            "reason": self.reason,
+            "fast_ms": None if self.fast_ms is None else round(self.fast_ms, 2),
+            "slow_ms": None if self.slow_ms is None else round(self.slow_ms, 2),
+            "served_ms": round(self.served_ms, 2),
+            "slow_error": self.slow_error
+        }
+
+
+class JsonLinesLog:
+    # Records are appended on the event loop and written by one flush task in a thread,
+    # so file IO never blocks message handling and lines keep their order
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._pending: List[str] = []
+        self._flusher: Optional[asyncio.Task] = None
+    
+    def append(self, record: dict):
+        self._pending.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush())
+    
+    async def _flush(self):
+        while self._pending:
+            lines, self._pending = self._pending, []
+            try:
+                await asyncio.to_thread(self._write, lines)
+            except OSError as e:
+                logger.error(f"Writing {len(lines)} records to {self.path} failed: {e}")
+    
+    def _write(self, lines: List[str]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+    
+    async def close(self):
+        if self._flusher is not None:
+            await self._flusher
+
+
+class SpeculativeRacer:
+    # Starts a fast and a slow producer together. The fast value is served at once
+    # if it clears `accept`, otherwise the slow one is awaited until the deadline and
+    # the fast value is served instead when it is still `usable`.
+    def __init__(
+        self,
+        deadline_seconds: float,
+        on_settled: Optional[Callable[[RaceOutcome], Any]] = None
+    ):
+        self.deadline_seconds = deadline_seconds
+        self.on_settled = on_settled
+        self._background: Set[asyncio.Task] = set()
+    
+    async def race(
+        self,
+        fast: Callable[[], Awaitable[Any]],
+        slow: Callable[[], Awaitable[Any]],
+        accept: Callable[[Any], bool],
+        usable: Callable[[Any], bool],
+        context: Optional[Dict[str, Any]] = None
+    ) -> RaceOutcome:
+        started = time.perf_counter()
+        slow_task = asyncio.create_task(slow())
+        outcome = RaceOutcome(value=None, source=FAST, reason=ACCEPTED, context=context or {})
+        
+        try:
+            outcome.fast_value = await fast()
+        except asyncio.CancelledError:
+            slow_task.cancel()
+            raise
+        except Exception as e:
+            logger.warning(f"Speculative fast path failed: {e}")
+        outcome.fast_ms = (time.perf_counter() - started) * 1000
+        fast_ok = outcome.fast_value is not None
+        fallback_ok = fast_ok and usable(outcome.fast_value)
+        
+        if fast_ok and accept(outcome.fast_value):
+            return self._serve_fast(outcome, ACCEPTED, slow_task, started)
+        
+        remaining = max(self.deadline_seconds - (time.perf_counter() - started), 0.0)
+        try:
+            # shield keeps the slow call alive past the deadline so it can still be logged
+            slow_value = await asyncio.wait_for(asyncio.shield(slow_task), timeout=remaining)
+        except asyncio.TimeoutError:
+            if fallback_ok:
+                return self._serve_fast(outcome, DEADLINE, slow_task, started)
+            # Nothing worth serving yet: keep waiting for the slow answer
+            try:
+                slow_value = await slow_task
+            except Exception as e:
+                return self._slow_failed(e, outcome, fallback_ok, started)
+        except asyncio.CancelledError:
+            slow_task.cancel()
+            raise
+        except Exception as e:
+            return self._slow_failed(e, outcome, fallback_ok, started)
+        
+        outcome.value = slow_value
+        outcome.slow_value = slow_value
+        outcome.source = SLOW
+        outcome.reason = SLOW_READY
+        outcome.slow_ms = (time.perf_counter() - started) * 1000
+        outcome.served_ms = outcome.slow_ms
+        self._notify(outcome)
+        return outcome
+    
+    def _serve_fast(self, outcome: RaceOutcome, reason: str, slow_task: asyncio.Task, started: float) -> RaceOutcome:
+        outcome.value = outcome.fast_value
+        outcome.reason = reason
+        outcome.served_ms = (time.perf_counter() - started) * 1000
+        self._settle_in_background(outcome, slow_task, started)
+        return outcome
+    
+    def _slow_failed(self, error: Exception, outcome: RaceOutcome, fallback_ok: bool, started: float) -> RaceOutcome:
+        outcome.slow_error = str(error)
+        outcome.slow_ms = (time.perf_counter() - started) * 1000
+        outcome.reason = SLOW_FAILED
+        if fallback_ok:
+            outcome.value = outcome.fast_value
+            outcome.served_ms = outcome.slow_ms
+        self._notify(outcome)
+        if not fallback_ok:
+            raise error
+        return outcome
+    
+    def _settle_in_background(self, outcome: RaceOutcome, slow_task: asyncio.Task, started: float):
+        def collect(task: asyncio.Task):
+            self._background.discard(task)
+            outcome.slow_ms = (time.perf_counter() - started) * 1000
+            if task.cancelled():
+                outcome.slow_error = "cancelled"
+            elif task.exception() is not None:
+                outcome.slow_error = str(task.exception())
+            else:
+                outcome.slow_value = task.result()
+            self._notify(outcome)
+        
+        self._background.add(slow_task)
+        slow_task.add_done_callback(collect)
+    
+    def _notify(self, outcome: RaceOutcome):
+        if self.on_settled is None:
+            return
+        try:
+            self.on_settled(outcome)
+        except Exception as e:
+            logger.error(f"Speculation logging failed: {e}")
+    
+    def pending_count(self) -> int:
+        return len(self._background)
+    
+    async def drain(self):
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from src.common.logger import get_logger
+from src.common.singleflight import Singleflight
+from src.llm_bot.intent_classifier import extract_words
+from src.llm_bot.openai_client import CompletionResult
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    answer: str
+    model: str
+    created_at: float
+    output_tokens: int = 0
+    
+    def age_seconds(self, now: Optional[float] = None) -> float:
+        return (now if now is not None else time.time()) - self.created_at
+
+
+def canonical_query(text: str) -> str:
+    return " ".join(extract_words(text))
+
+
+def cache_version(prompt_version: str, model: str) -> str:
+    # Any change to the prompt (its content hash) or model yields a new file, so old answers
+    # are never served
+    digest = hashlib.sha256(f"{model}\0{prompt_version}".encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+def first_turn_messages(system_prompt: str, query: str) -> List[dict]:
+    # Same shape ConversationManager produces for a user's first message
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": query}
+    ]
+
+
+def parse_canonical_queries(data: bytes) -> List[str]:
+    return json.loads(data.decode('utf-8'))['canonical_queries']
+
+
+def load_canonical_queries(file_path: Path) -> List[str]:
+    if not file_path.exists():
+        raise FileNotFoundError(f"Canonical queries file not found: {file_path}")
+    
+    return parse_canonical_queries(file_path.read_bytes())
+
+
+class WarmAnswerCache:
+    def __init__(self, cache_dir: Path, prompt_version: str, model: str, ttl_seconds: float = 86400):
+        self.cache_dir = Path(cache_dir)
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.version = cache_version(prompt_version, model)
+        self.file_path = self.cache_dir / f"answers-{self.version}.json"
+        self.entries: Dict[str, CachedAnswer] = {}
+    
+    def load(self) -> int:
+        if not self.file_path.exists():
+            logger.info(f"No warm answer cache for version {self.version} in {self.cache_dir}")
+            return 0
+        
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        self.entries = {
+            key: CachedAnswer(**entry)
+            for key, entry in data['entries'].items()
+        }
+        logger.info(f"Loaded {len(self.entries)} warm answers (version {self.version})")
+        return len(self.entries)
+    
+    def snapshot(self) -> dict:
+        return {
+            "version": self.version,
+            "model": self.model,
+            "entries": {key: asdict(entry) for key, entry in self.entries.items()}
+        }
+    
+    def write(self, data: dict):
+        # Takes a snapshot() so it can run in a thread while entries keep changing
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so a running bot never reads a half-written file
+        tmp_path = self.file_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.file_path)
+        logger.debug(f"Saved {len(data['entries'])} warm answers to {self.file_path}")
+    
+    def save(self):
+        self.write(self.snapshot())
+    
+    def get(self, query: str) -> Optional[CachedAnswer]:
+        return self.entries.get(canonical_query(query))
+    
+    def put(self, query: str, answer: str, output_tokens: int = 0) -> CachedAnswer:
+        entry = CachedAnswer(
+            query=query,
+            answer=answer,
+            model=self.model,
+            created_at=time.time(),
+            output_tokens=output_tokens
+        )
+        self.entries[canonical_query(query)] = entry
+        return entry
+    
+    def is_stale(self, entry: CachedAnswer, now: Optional[float] = None) -> bool:
+        return entry.age_seconds(now) > self.ttl_seconds
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class StaleWhileRevalidateCache:
+    # Serves cached answers up to max_staleness_seconds old; past the TTL one
+    # deduplicated background refresh is started, past the maximum the answer
+    # is fetched inline (still deduplicated) before being served.
+    def __init__(
+        self,
+        cache: WarmAnswerCache,
+        fetch: Callable[[str], Awaitable[CompletionResult]],
+        max_staleness_seconds: float,
+        cacheable_queries: Iterable[str] = ()
+    ):
+        self.cache = cache
+        self.fetch = fetch
+        self.max_staleness_seconds = max_staleness_seconds
+        self.cacheable_keys: Set[str] = {canonical_query(q) for q in cacheable_queries}
+        self.singleflight = Singleflight()
+        self._background: Set[asyncio.Future] = set()
+        self._save_lock = asyncio.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetch_failures = 0
+    
+    async def get(self, query: str) -> Optional[str]:
+        key = canonical_query(query)
+        entry = self.cache.entries.get(key)
+        
+        if entry is not None and entry.age_seconds() <= self.max_staleness_seconds:
+            if self.cache.is_stale(entry):
+                self.stale_hits += 1
+                self.refresh_in_background(entry.query)
+            else:
+                self.hits += 1
+            return entry.answer
+        
+        if entry is None and key not in self.cacheable_keys:
+            return None
+        
+        # Missing canonical query or too stale to serve: concurrent callers share one fetch
+        self.misses += 1
+        try:
+            fetched = await self.singleflight.do(key, lambda: self._refresh(query))
+        except Exception as e:
+            self.fetch_failures += 1
+            # Falling through would send the same prompt upstream again, uncached
+            if entry is None:
+                raise
+            logger.warning(
+                f"Fetching '{query}' failed, serving the cached answer from {entry.age_seconds():.0f}s ago: {e}"
+            )
+            return entry.answer
+        return fetched.answer
+    
+    def refresh_in_background(self, query: str):
+        key = canonical_query(query)
+        if self.singleflight.is_in_flight(key):
+            return
+        
+        future = self.singleflight.start(key, lambda: self._refresh(query))
+        self._background.add(future)
+        future.add_done_callback(self._background.discard)
+        future.add_done_callback(lambda done: self._log_background_failure(query, done))
+    
+    def _log_background_failure(self, query: str, future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            self.fetch_failures += 1
+            logger.warning(f"Cached answer refresh failed for '{query}': {future.exception()}")
+    
+    async def _refresh(self, query: str) -> CachedAnswer:
+        completion = await self.fetch(query)
+        if not completion.text.strip():
+            raise ValueError("empty answer")
+        
+        entry = self.cache.put(query, completion.text, completion.output_tokens)
+        await self._save()
+        logger.info(f"Refreshed cached answer for '{query}'")
+        return entry
+    
+    async def _save(self):
+        # Snapshot on the loop, write in a thread; the lock keeps the latest snapshot last
+        data = self.cache.snapshot()
+        async with self._save_lock:
+            try:
+                await asyncio.to_thread(self.cache.write, data)
+            except OSError as e:
+                logger.error(f"Saving the warm answer cache failed: {e}")
+    
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.cache),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "fetch_failures": self.fetch_failures,
+            "refreshes": self.singleflight.get_stats().to_dict()
+        }
+    
+    async def drain(self):
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
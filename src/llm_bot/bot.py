@@ -1,4 +1,10 @@
+import asyncio
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Optional
+
 from telegram import Update
 from telegram.ext import (
     Application,
@@ -8,30 +14,237 @@ from telegram.ext import (
     ContextTypes
 )
 
+from src.common.cache import CacheStats
 from src.common.config import LLMBotConfig
+from src.common.health_server import HealthServer
 from src.common.logger import get_logger
+from src.common.metrics import MetricsRegistry, register_cache_metrics
+from src.common.readiness import Readiness
+from src.common.resources import (
+    CORPUS_PATH,
+    SYSTEM_PROMPT_PATH,
+    WARM_QUERIES_PATH,
+    Resource,
+    get_resource_loader,
+    register_resource_metrics,
+    start_reload_triggers
+)
+from src.common.send_queue import SendQueue
+from src.common.speculation import SLOW, JsonLinesLog, RaceOutcome, SpeculativeRacer
+from src.llm_bot.answer_cache import (
+    StaleWhileRevalidateCache,
+    WarmAnswerCache,
+    first_turn_messages,
+    parse_canonical_queries
+)
 from src.llm_bot.conversation_manager import ConversationManager
-from src.llm_bot.openai_client import OpenAIClient, load_system_prompt
+from src.llm_bot.intent_classifier import OutputBudgetPolicy
+from src.llm_bot.openai_client import CompletionResult, OpenAIClient, parse_system_prompt
+from src.llm_bot.partitioning import PartitionWorker
 
 logger = get_logger(__name__)
 
 
 class LLMBot:
-    def __init__(self, config: LLMBotConfig):
+    def __init__(self, config: LLMBotConfig, readiness: Optional[Readiness] = None):
         self.config = config
-        self.application = Application.builder().token(config.token).build()
+        self.readiness = readiness or Readiness("LLM Bot")
+        self.metrics = MetricsRegistry(const_labels={"bot": "llm"})
+        self.resources = get_resource_loader()
+        self.corpus: Optional[Resource] = None
+        self.reload_lock = asyncio.Lock()
+        self.reload_task: Optional[asyncio.Task] = None
+        
+        # The OpenAI SDK (and the TF-IDF engine for speculation) load in a background thread
+        # while the Telegram client starts up and connects; post_init waits for them
+        self.openai_client = None
+        self.nlp_engine = None
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine-loader")
+        self.engines_future = executor.submit(self.load_engines)
+        executor.shutdown(wait=False)
+        
+        builder = Application.builder().token(config.token).post_init(self.on_startup).post_shutdown(self.on_shutdown)
+        if config.telegram_base_url:
+            # A local Bot API server, or runners/fake_telegram_server.py
+            builder = builder.base_url(f"{config.telegram_base_url}/bot").base_file_url(f"{config.telegram_base_url}/file/bot")
+        self.application = builder.build()
+        self.send_queue = SendQueue(
+            self.application.bot.send_message,
+            global_rate=config.send_global_rate,
+            global_burst=config.send_global_burst,
+            chat_rate=config.send_chat_rate,
+            chat_burst=config.send_chat_burst,
+            max_pending=config.send_queue_size,
+            short_reply_chars=config.short_reply_chars,
+            registry=self.metrics
+        )
         
         self.conversation_manager = ConversationManager(
             max_history=config.max_conversation_history
         )
-        self.openai_client = OpenAIClient(config)
+        self.output_budgets = OutputBudgetPolicy(
+            default_budget=config.max_tokens,
+            budgets=config.output_budgets
+        )
         
-        prompt_path = Path(__file__).parent.parent.parent / "data" / "prompts" / "system_prompt.txt"
-        self.system_prompt = load_system_prompt(prompt_path)
+        self.resources.register("system_prompt", SYSTEM_PROMPT_PATH, parse_system_prompt)
+        self.prompt = self.resources.get("system_prompt")
+        self.system_prompt = self.prompt.value
+        self.answer_cache = self.build_answer_cache(self.prompt)
+        
+        self.racer = None
+        self.speculation_log = JsonLinesLog(Path(config.speculation_log_path)) if config.speculation_log_path else None
+        if config.speculative_answering:
+            self.racer = SpeculativeRacer(
+                deadline_seconds=config.speculative_deadline_ms / 1000,
+                on_settled=self.log_speculation
+            )
+        
+        self.setup_metrics()
+        self.health_server = None
+        if config.health_port:
+            # Started before the OpenAI client has loaded, so /readyz reports the wait
+            self.health_server = HealthServer(self.metrics, self.readiness, config.health_host, config.health_port)
+            self.health_server.start()
         
         self.setup_handlers()
         logger.info("LLM Bot initialized successfully")
     
+    def load_engines(self):
+        self.openai_client = OpenAIClient(self.config)
+        self.metrics.register(self.openai_client.upstream_requests)
+        self.metrics.register(self.openai_client.upstream_latency)
+        if self.config.speculative_answering:
+            from src.nlp_bot.nlp_engine import parse_corpus
+            
+            self.resources.register("corpus", CORPUS_PATH, parse_corpus)
+            self.corpus = self.resources.get("corpus")
+            self.nlp_engine = self.speculation_engine(self.corpus)
+    
+    def speculation_engine(self, corpus: Resource):
+        from src.nlp_bot.nlp_engine import NLPEngine
+        
+        return NLPEngine(corpus.value, similarity_threshold=self.config.similarity_threshold)
+    
+    def build_answer_cache(self, prompt: Resource) -> Optional[StaleWhileRevalidateCache]:
+        if not self.config.warm_cache_dir:
+            return None
+        # The cache file is keyed by the prompt's content hash and the model
+        warm_cache = WarmAnswerCache(
+            Path(self.config.warm_cache_dir),
+            prompt.version,
+            self.config.model,
+            ttl_seconds=self.config.warm_cache_ttl_seconds
+        )
+        warm_cache.load()
+        self.resources.register("warm_queries", WARM_QUERIES_PATH, parse_canonical_queries)
+        return StaleWhileRevalidateCache(
+            warm_cache,
+            fetch=self.fetch_first_turn_answer,
+            max_staleness_seconds=self.config.warm_cache_max_staleness_seconds,
+            cacheable_queries=self.resources.get("warm_queries").value
+        )
+    
+    async def reload_resources(self, force: bool = False):
+        async with self.reload_lock:
+            prompt = await self.resources.reload_async("system_prompt", force)
+            queries = await self.resources.reload_async("warm_queries", force) if self.answer_cache is not None else None
+            if prompt is not None or queries is not None:
+                prompt = prompt or self.prompt
+                # Reading the warm cache file for the new version happens off the event loop
+                answer_cache = await asyncio.to_thread(self.build_answer_cache, prompt)
+                self.prompt, self.system_prompt, self.answer_cache = prompt, prompt.value, answer_cache
+                logger.info(f"Serving system prompt version {prompt.version}")
+            
+            if self.corpus is not None:
+                corpus = await self.resources.reload_async("corpus", force)
+                if corpus is not None:
+                    try:
+                        engine = await asyncio.to_thread(self.speculation_engine, corpus)
+                    except Exception as e:
+                        logger.error(f"Building the index for corpus version {corpus.version} failed: {e}")
+                        return
+                    self.nlp_engine, self.corpus = engine, corpus
+                    logger.info(f"Speculating from corpus version {corpus.version}")
+    
+    async def on_startup(self, application: Application):
+        self.send_queue.start()
+        await asyncio.wrap_future(self.engines_future)
+        self.reload_task = start_reload_triggers(self.reload_resources, self.config.resource_check_seconds)
+        self.readiness.mark_ready()
+    
+    async def on_shutdown(self, application: Application):
+        self.readiness.mark_not_ready()
+        if self.reload_task is not None:
+            self.reload_task.cancel()
+        await self.send_queue.close()
+        if self.speculation_log is not None:
+            await self.speculation_log.close()
+        if self.health_server is not None:
+            self.health_server.stop()
+    
+    def setup_metrics(self):
+        self.messages_total = self.metrics.counter(
+            "bot_messages_total", "Text messages handled, by where the answer came from", ("outcome",)
+        )
+        self.messages_in_progress = self.metrics.gauge("bot_messages_in_progress", "Text messages being handled")
+        self.response_seconds = self.metrics.histogram(
+            "bot_response_duration_seconds", "Time from receiving a message to queueing the reply"
+        )
+        self.metrics.callback(
+            "bot_update_queue_depth", "Updates received but not yet handled",
+            lambda: self.application.update_queue.qsize()
+        )
+        self.metrics.callback("bot_ready", "1 once the bot can answer messages", lambda: int(self.readiness.is_ready()))
+        self.metrics.callback(
+            "llm_active_conversations", "Users with a conversation history",
+            self.conversation_manager.get_active_conversations_count
+        )
+        self.metrics.callback(
+            "llm_warm_cache_lookups_total", "Warm answer cache lookups by result",
+            self.get_warm_cache_lookups, "counter", ("result",)
+        )
+        self.metrics.callback(
+            "llm_warm_cache_entries", "Precomputed answers in the warm cache",
+            lambda: self.answer_cache.get_stats()["entries"] if self.answer_cache is not None else None
+        )
+        self.metrics.callback(
+            "llm_dedup_calls_total", "Completion calls through prompt deduplication",
+            lambda: self.get_dedup_stat("calls"), "counter"
+        )
+        self.metrics.callback(
+            "llm_dedup_executions_total", "Upstream calls made after deduplication",
+            lambda: self.get_dedup_stat("executions"), "counter"
+        )
+        self.metrics.callback(
+            "llm_dedup_in_flight", "Distinct prompts currently awaiting OpenAI",
+            lambda: self.get_dedup_stat("in_flight")
+        )
+        register_cache_metrics(self.metrics, "llm", self.get_cache_stats)
+        register_resource_metrics(self.metrics, lambda: {"system_prompt": self.prompt, "corpus": self.corpus})
+    
+    def get_warm_cache_lookups(self) -> Optional[Dict[tuple, int]]:
+        if self.answer_cache is None:
+            return None
+        stats = self.answer_cache.get_stats()
+        return {("hit",): stats["hits"], ("stale_hit",): stats["stale_hits"], ("miss",): stats["misses"]}
+    
+    def get_dedup_stat(self, name: str) -> Optional[int]:
+        if self.openai_client is None:
+            return None
+        return getattr(self.openai_client.get_dedup_stats(), name)
+    
+    def get_cache_stats(self) -> Dict[str, CacheStats]:
+        stats = {}
+        if self.nlp_engine is not None:
+            stats["speculation_query"] = self.nlp_engine.get_cache_stats()
+        return stats
+    
+    async def reply(self, update: Update, text: str, **options):
+        # Queued rather than sent inline: the handler returns while the queue paces delivery
+        # within Telegram's limits, splitting replies longer than a Telegram message
+        await self.send_queue.enqueue(update.effective_chat.id, text, **options)
+    
     def setup_handlers(self):
         self.application.add_handler(CommandHandler("start", self.handle_start))
         self.application.add_handler(CommandHandler("help", self.handle_help))
@@ -52,7 +265,7 @@ class LLMBot:
             "• Conversaciones naturales sobre gastronomía\n\n"
             "¡Cuéntame qué se te antoja! 🍕🍜🥘"
         )
-        await update.message.reply_text(welcome_message)
+        await self.reply(update, welcome_message)
         logger.info(f"User {user.id} started conversation")
     
     async def handle_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -68,7 +281,7 @@ class LLMBot:
             "• Ocasiones especiales\n\n"
             "Recuerdo el contexto de nuestra conversación para darte mejores recomendaciones."
         )
-        await update.message.reply_text(help_message, parse_mode='Markdown')
+        await self.reply(update, help_message, parse_mode='Markdown')
     
     async def handle_reset(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
@@ -78,7 +291,7 @@ class LLMBot:
             "✅ Conversación reiniciada.\n\n"
             "¿Qué se te antoja ahora? 🍽️"
         )
-        await update.message.reply_text(reset_message)
+        await self.reply(update, reset_message)
         logger.info(f"User {user_id} reset conversation")
     
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -87,6 +300,9 @@ class LLMBot:
         
         logger.info(f"User {user_id} sent: {user_message}")
         
+        started = time.perf_counter()
+        outcome = "error"
+        self.messages_in_progress.inc()
         try:
             self.conversation_manager.add_user_message(user_id, user_message)
             
@@ -95,11 +311,32 @@ class LLMBot:
                 self.system_prompt
             )
             
-            response = await self.openai_client.get_completion(messages)
+            intent, output_budget = self.output_budgets.select(user_message)
+            response = await self.get_warm_answer(user_id, user_message)
+            source = "llm"
+            if response is not None:
+                source = "warm_cache"
+                logger.info(f"Serving warm cached answer to user {user_id}")
+            elif self.racer is not None:
+                source = "speculative"
+                response = await self.speculative_reply(user_id, user_message, messages, output_budget)
+            else:
+                completion = await self.openai_client.get_completion(
+                    messages,
+                    max_output_tokens=output_budget
+                )
+                response = completion.text
+                logger.info(
+                    f"LLM {intent} response for user {user_id} with prompt {self.prompt.version} "
+                    f"({completion.total_ms:.0f}ms, ttfb {completion.ttfb_ms:.0f}ms, "
+                    f"{completion.input_tokens} in / {completion.output_tokens} out tokens"
+                    f"{', shared with a concurrent identical request' if completion.shared else ''})"
+                )
             
             self.conversation_manager.add_assistant_message(user_id, response)
             
-            await update.message.reply_text(response)
+            await self.reply(update, response)
+            outcome = source
             logger.info(f"Sent response to user {user_id}")
             
         except Exception as e:
@@ -108,8 +345,95 @@ class LLMBot:
                 "Lo siento, hubo un error al procesar tu mensaje. "
                 "Por favor, intenta de nuevo en un momento."
             )
-            await update.message.reply_text(error_message)
+            await self.reply(update, error_message)
+        finally:
+            self.messages_in_progress.dec()
+            self.messages_total.inc(outcome=outcome)
+            self.response_seconds.observe(time.perf_counter() - started)
+    
+    async def get_warm_answer(self, user_id: int, user_message: str) -> Optional[str]:
+        if self.answer_cache is None:
+            return None
+        # Warm answers were generated without history, so only first turns can use them
+        if self.conversation_manager.get_conversation(user_id).get_message_count() > 1:
+            return None
+        return await self.answer_cache.get(user_message)
+    
+    async def fetch_first_turn_answer(self, query: str) -> CompletionResult:
+        _, output_budget = self.output_budgets.select(query)
+        return await self.openai_client.get_completion(
+            first_turn_messages(self.system_prompt, query),
+            max_output_tokens=output_budget
+        )
+    
+    async def speculative_reply(self, user_id: int, user_message: str, messages: list, output_budget: int) -> str:
+        async def nlp_lookup():
+            return await asyncio.to_thread(self.nlp_engine.find_best_match, user_message)
+        
+        async def llm_completion():
+            return await self.openai_client.get_completion(messages, max_output_tokens=output_budget)
+        
+        outcome = await self.racer.race(
+            nlp_lookup,
+            llm_completion,
+            accept=lambda match: match[0] is not None and match[1] >= self.config.speculative_accept_score,
+            usable=lambda match: match[0] is not None,
+            context={"user_id": user_id, "query": user_message}
+        )
+        logger.info(f"Speculative answer from {outcome.source} ({outcome.reason}) in {outcome.served_ms:.0f}ms")
+        
+        if outcome.source == SLOW:
+            return outcome.value.text
+        return outcome.value[0]
+    
+    def log_speculation(self, outcome: RaceOutcome):
+        nlp_answer, nlp_score = outcome.fast_value or (None, 0.0)
+        record = {
+            **outcome.to_dict(),
+            "prompt_version": self.prompt.version,
+            "corpus_version": self.corpus.version if self.corpus is not None else None,
+            "nlp_answer": nlp_answer,
+            "nlp_score": round(float(nlp_score), 4),
+            "llm_answer": outcome.slow_value.text if outcome.slow_value is not None else None,
+            "llm_usage": outcome.slow_value.to_dict() if outcome.slow_value is not None else None
+        }
+        logger.debug(f"Speculation settled: {record}")
+        
+        if self.speculation_log is not None:
+            self.speculation_log.append(record)
+    
+    async def run_partition_worker(self):
+        # No polling: a PartitionRouter posts the updates of the users this process owns
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stopping.set)
+        
+        worker = PartitionWorker(
+            self,
+            self.config.partition_workers,
+            self.config.partition_secret,
+            self.config.partition_host,
+            self.config.partition_port
+        )
+        await worker.start()
+        async with self.application:
+            await self.on_startup(self.application)
+            await self.application.start()
+            await stopping.wait()
+            
+            # Failing /readyz makes the router move this worker's users, and their
+            # conversations, to the remaining workers before it exits
+            self.readiness.mark_not_ready()
+            await worker.wait_released(self.config.partition_drain_seconds)
+            await self.application.stop()
+            await self.on_shutdown(self.application)
+        await worker.stop()
     
     def run(self):
+        if self.config.partition_role == "worker":
+            logger.info(f"Starting LLM Bot as a partition worker on port {self.config.partition_port}...")
+            asyncio.run(self.run_partition_worker())
+            return
         logger.info("Starting LLM Bot...")
         self.application.run_polling(allowed_updates=Update.ALL_TYPES)
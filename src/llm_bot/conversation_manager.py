@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Callable, Dict, List
 
 from src.common.logger import get_logger
 
@@ -73,3 +73,21 @@ class ConversationManager:
     
     def get_active_conversations_count(self) -> int:
         return len(self.conversations)
+    
+    def export_conversations(self, should_export: Callable[[int], bool]) -> Dict[int, List[dict]]:
+        # Removes the selected conversations and returns them for another process to import
+        exported = {}
+        for user_id in [user_id for user_id in self.conversations if should_export(user_id)]:
+            exported[user_id] = self.conversations.pop(user_id).get_messages_as_dicts()
+        if exported:
+            logger.info(f"Exported {len(exported)} conversations")
+        return exported
+    
+    def import_conversations(self, conversations: Dict[int, List[dict]]):
+        for user_id, messages in conversations.items():
+            conversation = self.get_conversation(user_id)
+            # Handed-over history goes before anything this process already has for the user
+            conversation.messages = [Message(role=m["role"], content=m["content"]) for m in messages] + conversation.messages
+            self.trim_conversation(user_id)
+        if conversations:
+            logger.info(f"Imported {len(conversations)} conversations")
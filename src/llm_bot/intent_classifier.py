@@ -0,0 +1,61 @@
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+WORD_PATTERN = re.compile(r"\w+")
+
+GREETING_WORDS = {"hola", "buenas", "buenos", "dias", "tardes", "noches", "hey", "saludos", "que", "tal", "hi", "hello"}
+COURTESY_WORDS = {"gracias", "muchas", "mil", "chao", "adios", "hasta", "luego", "pronto", "perfecto", "genial", "listo", "ok", "vale", "bye"}
+INFORMATION_WORDS = {
+    "horario", "horarios", "hora", "horas", "abren", "cierran", "abierto",
+    "ubicacion", "direccion", "queda", "quedan", "telefono", "contacto",
+    "precio", "precios", "cuesta", "cuestan", "domicilio", "domicilios",
+    "reserva", "reservas", "reservar", "parqueadero", "pago", "tarjeta"
+}
+RECOMMENDATION_WORDS = {
+    "recomienda", "recomiendas", "recomiendame", "recomendacion", "recomendaciones",
+    "sugiere", "sugieres", "sugiereme", "sugerencia", "quiero", "busco", "antoja",
+    "comer", "opciones", "algo"
+}
+
+# Thanks are only treated as such when the whole message is short; greetings when every word is
+# a greeting word, since "qué tal" and "buenos días" also open real questions
+SHORT_MESSAGE_WORDS = 6
+
+GREETING = "greeting"
+COURTESY = "courtesy"
+INFORMATION = "information"
+RECOMMENDATION = "recommendation"
+
+
+def extract_words(text: str) -> Tuple[str, ...]:
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return tuple(WORD_PATTERN.findall(stripped))
+
+
+def classify_intent(text: str) -> str:
+    words = extract_words(text)
+    word_set = set(words)
+    
+    if word_set & RECOMMENDATION_WORDS:
+        return RECOMMENDATION
+    if word_set & INFORMATION_WORDS:
+        return INFORMATION
+    if len(words) <= SHORT_MESSAGE_WORDS:
+        if word_set & COURTESY_WORDS:
+            return COURTESY
+        if words and word_set <= GREETING_WORDS:
+            return GREETING
+    return RECOMMENDATION
+
+
+@dataclass
+class OutputBudgetPolicy:
+    default_budget: int
+    budgets: Dict[str, int] = field(default_factory=dict)
+    
+    def select(self, text: str) -> Tuple[str, int]:
+        intent = classify_intent(text)
+        return intent, self.budgets.get(intent, self.default_budget)
@@ -1,22 +1,211 @@
+import hashlib
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import List
-
-from openai import OpenAI
+from typing import List, Optional
 
 from src.common.config import LLMBotConfig
 from src.common.exceptions import OpenAIError
 from src.common.logger import get_logger
+from src.common.metrics import Counter, Histogram
+from src.common.singleflight import Singleflight, SingleflightStats
 
 logger = get_logger(__name__)
 
+# Reasoning models reject sampling parameters such as temperature
+REASONING_MODEL_PREFIXES = ("gpt-5", "o1", "o3", "o4")
+
+
+def supports_temperature(model: str) -> bool:
+    return model.startswith("gpt-5-chat") or not model.startswith(REASONING_MODEL_PREFIXES)
+
+
+def lowest_reasoning_effort(model: str) -> str:
+    # o-series models start at "low"; gpt-5 also accepts "minimal"
+    return "minimal" if model.startswith("gpt-5") else "low"
+
+
+@dataclass
+class CompletionResult:
+    text: str
+    model: str
+    connect_ms: float = 0.0
+    ttfb_ms: float = 0.0
+    total_ms: float = 0.0
+    input_tokens: int = 0
+    cached_input_tokens: int = 0
+    output_tokens: int = 0
+    reasoning_tokens: int = 0
+    retries: int = 0
+    cost_usd: float = 0.0
+    truncated: bool = False
+    shared: bool = False
+    # Set when the capped attempt came back empty and was repeated with a larger or no cap
+    budget_retry: bool = False
+    
+    @property
+    def output_tokens_per_second(self) -> float:
+        if self.total_ms <= 0:
+            return 0.0
+        return self.output_tokens / (self.total_ms / 1000)
+    
+    def to_dict(self) -> dict:
+        return {
+            "model": self.model,
+            "connect_ms": round(self.connect_ms, 2),
+            "ttfb_ms": round(self.ttfb_ms, 2),
+            "total_ms": round(self.total_ms, 2),
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_input_tokens,
+            "output_tokens": self.output_tokens,
+            "reasoning_tokens": self.reasoning_tokens,
+            "retries": self.retries,
+            "cost_usd": self.cost_usd,
+            "truncated": self.truncated,
+            "shared": self.shared,
+            "budget_retry": self.budget_retry
+        }
+
+
+@dataclass
+class RequestTrace:
+    started: float = field(default_factory=time.perf_counter)
+    attempts: int = 0
+    connect_ms: float = 0.0
+    ttfb_ms: float = 0.0
+    connect_started: Optional[float] = None
+    
+    async def on_transport_event(self, event_name: str, info: dict):
+        # httpcore trace events; only fired when a new connection is opened
+        if event_name == "connection.connect_tcp.started":
+            self.connect_started = time.perf_counter()
+        elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            if self.connect_started is not None:
+                self.connect_ms = (time.perf_counter() - self.connect_started) * 1000
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("openai_request_trace", default=None)
+
+
+async def _on_request(request):
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.attempts += 1
+    request.extensions["trace"] = trace.on_transport_event
+
+
+async def _on_response(response):
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    # Response hooks run once headers arrive, before the body is read
+    trace.ttfb_ms = (time.perf_counter() - trace.started) * 1000
+
 
 class OpenAIClient:
     def __init__(self, config: LLMBotConfig):
         self.config = config
-        self.client = OpenAI(api_key=config.openai_api_key)
+        # Deferred: the SDK and its generated types take about half a second to import,
+        # which only matters for modules that need CompletionResult or load_system_prompt
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        
+        self.client = AsyncOpenAI(
+            api_key=config.openai_api_key,
+            base_url=config.openai_base_url or None,
+            http_client=DefaultAsyncHttpxClient(
+                event_hooks={"request": [_on_request], "response": [_on_response]}
+            )
+        )
+        self.singleflight = Singleflight()
+        self.upstream_requests = Counter(
+            "llm_upstream_requests_total", "OpenAI API requests by outcome", ("outcome",)
+        )
+        self.upstream_latency = Histogram(
+            "llm_upstream_request_duration_seconds", "OpenAI API request latency"
+        )
         logger.info(f"OpenAI Client initialized with model {config.model}")
     
-    async def get_completion(self, messages: List[dict]) -> str:
+    def estimate_cost(self, input_tokens: int, cached_input_tokens: int, output_tokens: int) -> float:
+        uncached_input_tokens = input_tokens - cached_input_tokens
+        cost = (
+            uncached_input_tokens * self.config.input_cost_per_1m
+            + cached_input_tokens * self.config.cached_input_cost_per_1m
+            + output_tokens * self.config.output_cost_per_1m
+        )
+        return cost / 1_000_000
+    
+    def build_request_options(self, max_output_tokens: Optional[int] = None, capped: bool = True) -> dict:
+        options = {"model": self.config.model}
+        if capped:
+            options["max_output_tokens"] = max_output_tokens or self.config.max_tokens
+        if supports_temperature(self.config.model):
+            options["temperature"] = self.config.temperature
+        if self.config.reasoning_effort:
+            options["reasoning"] = {"effort": self.config.reasoning_effort}
+        elif capped and not supports_temperature(self.config.model):
+            # Reasoning tokens count towards the cap: at the default effort a per-intent budget,
+            # or max_tokens itself, can be spent entirely on reasoning, leaving no answer
+            options["reasoning"] = {"effort": lowest_reasoning_effort(self.config.model)}
+        return options
+    
+    def prompt_key(self, messages: List[dict], max_output_tokens: Optional[int] = None) -> Optional[str]:
+        # Only context-free prompts (system prompt plus a single user turn) can be shared
+        roles = [msg["role"] for msg in messages]
+        if roles != ["system", "user"]:
+            return None
+        
+        options = self.build_request_options(max_output_tokens)
+        canonical = "\0".join([
+            repr(sorted(options.items())),
+            messages[0]["content"],
+            " ".join(messages[1]["content"].split())
+        ])
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    async def get_completion(self, messages: List[dict], max_output_tokens: Optional[int] = None) -> CompletionResult:
+        key = self.prompt_key(messages, max_output_tokens) if self.config.deduplicate_prompts else None
+        if key is None:
+            return await self.complete(messages, max_output_tokens)
+        
+        # Identical concurrent prompts share one upstream request
+        leader = not self.singleflight.is_in_flight(key)
+        result = await self.singleflight.do(key, lambda: self.complete(messages, max_output_tokens))
+        return result if leader else replace(result, shared=True, cost_usd=0.0)
+    
+    async def complete(self, messages: List[dict], max_output_tokens: Optional[int] = None) -> CompletionResult:
+        # An empty answer would reach the user as no reply at all: a per-intent budget that ran out
+        # is retried once with max_tokens, and max_tokens once without a cap; anything else is an
+        # error for the caller's fallback
+        result = await self.create_completion(messages, max_output_tokens)
+        if result.text.strip():
+            return result
+        
+        if result.truncated:
+            budgeted = bool(max_output_tokens) and max_output_tokens < self.config.max_tokens
+            limit = max_output_tokens or self.config.max_tokens
+            fallback = f"with {self.config.max_tokens}" if budgeted else "without a cap"
+            logger.warning(f"Empty response within {limit} output tokens, retrying {fallback}")
+            retry = await self.create_completion(messages, capped=budgeted)
+            retry.budget_retry = True
+            retry.total_ms += result.total_ms
+            retry.cost_usd += result.cost_usd
+            if retry.text.strip():
+                return retry
+        raise OpenAIError("OpenAI returned an empty response")
+    
+    def get_dedup_stats(self) -> SingleflightStats:
+        return self.singleflight.get_stats()
+    
+    async def create_completion(
+        self,
+        messages: List[dict],
+        max_output_tokens: Optional[int] = None,
+        capped: bool = True
+    ) -> CompletionResult:
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
         try:
             formatted_input = []
             for msg in messages:
@@ -31,26 +220,62 @@ class OpenAIClient:
                         "content": msg["content"]
                     })
             
-            response = self.client.responses.create(
-                model=self.config.model,
-                input=formatted_input
+            response = await self.client.responses.create(
+                input=formatted_input,
+                **self.build_request_options(max_output_tokens, capped)
             )
+            total_ms = (time.perf_counter() - trace.started) * 1000
             
-            answer = response.output_text
-            logger.debug(f"OpenAI response received")
-            return answer
+            result = CompletionResult(
+                text=response.output_text,
+                model=response.model or self.config.model,
+                connect_ms=trace.connect_ms,
+                ttfb_ms=trace.ttfb_ms,
+                total_ms=total_ms,
+                retries=max(trace.attempts - 1, 0),
+                truncated=response.status == "incomplete"
+            )
+            usage = response.usage
+            if usage is not None:
+                result.input_tokens = usage.input_tokens
+                result.output_tokens = usage.output_tokens
+                if usage.input_tokens_details is not None:
+                    result.cached_input_tokens = usage.input_tokens_details.cached_tokens or 0
+                if usage.output_tokens_details is not None:
+                    result.reasoning_tokens = usage.output_tokens_details.reasoning_tokens or 0
+                result.cost_usd = self.estimate_cost(
+                    result.input_tokens,
+                    result.cached_input_tokens,
+                    result.output_tokens
+                )
             
+            if result.truncated:
+                logger.warning(f"OpenAI response truncated at {result.output_tokens} output tokens")
+            logger.debug(
+                f"OpenAI response received in {total_ms:.0f}ms "
+                f"(ttfb {trace.ttfb_ms:.0f}ms, {result.input_tokens} in / {result.output_tokens} out, "
+                f"{result.retries} retries)"
+            )
+            self.upstream_requests.inc(outcome="ok")
+            self.upstream_latency.observe(total_ms / 1000)
+            return result
+        
         except Exception as e:
+            self.upstream_requests.inc(outcome="error")
             logger.error(f"OpenAI API error: {e}")
             raise OpenAIError(f"Failed to get completion from OpenAI: {e}")
+        finally:
+            _current_trace.reset(token)
+
+
+def parse_system_prompt(data: bytes) -> str:
+    return data.decode('utf-8').strip()
 
 
 def load_system_prompt(file_path: Path) -> str:
     if not file_path.exists():
         raise FileNotFoundError(f"System prompt file not found: {file_path}")
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        prompt = f.read().strip()
-    
+    prompt = parse_system_prompt(file_path.read_bytes())
     logger.info(f"Loaded system prompt from {file_path}")
     return prompt
@@ -0,0 +1,321 @@
+import asyncio
+import hmac
+import json
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from src.common.config import LLMBotConfig
+from src.common.exceptions import ConfigurationError
+from src.common.hash_ring import HashRing
+from src.common.health_server import HealthServer, read_http_request, write_http_response
+from src.common.logger import get_logger
+from src.common.metrics import MetricsRegistry
+from src.common.readiness import Readiness
+
+logger = get_logger(__name__)
+
+FORWARD_TIMEOUT_SECONDS = 5.0
+REBALANCE_TIMEOUT_SECONDS = 30.0
+# Sent by the router and by workers handing over conversations; required on every worker route
+SECRET_HEADER = "X-Partition-Secret"
+
+
+def partition_key(update: Update) -> Optional[int]:
+    # Conversations are kept per user; updates without a user go by chat
+    if update.effective_user is not None:
+        return update.effective_user.id
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    return None
+
+
+class PartitionWorker:
+    # Runs next to an LLMBot that does not poll Telegram: the router posts the updates of the
+    # users this worker owns, and on a membership change the worker hands the conversations
+    # it no longer owns to their new owners. Conversations only ever go to the configured
+    # workers, and every request must carry the shared secret
+    def __init__(self, bot, workers: Iterable[str], secret: str, host: str = "127.0.0.1", port: int = 8090):
+        if not secret:
+            raise ConfigurationError("A partition worker needs a shared secret")
+        self.bot = bot
+        self.workers = set(workers)
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.ring = HashRing()
+        self.released = asyncio.Event()
+        self.client: Optional[httpx.AsyncClient] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.setup_metrics(bot.metrics)
+    
+    def setup_metrics(self, registry: MetricsRegistry):
+        self.updates_received = registry.counter(
+            "llm_partition_updates_total", "Updates received from the partition router"
+        )
+        self.conversations_moved = registry.counter(
+            "llm_partition_conversations_moved_total", "Conversations handed over on rebalancing", ("direction",)
+        )
+        registry.callback("llm_partition_ring_workers", "Workers on the partition ring", lambda: len(self.ring))
+    
+    async def start(self):
+        self.client = httpx.AsyncClient(timeout=REBALANCE_TIMEOUT_SECONDS, headers={SECRET_HEADER: self.secret})
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        # Port 0 binds a free port; report the real one
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info(f"Partition worker listening on http://{self.host}:{self.port}")
+    
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.client is not None:
+            await self.client.aclose()
+    
+    async def wait_released(self, timeout: float) -> bool:
+        # Set once a rebalance without this worker has moved its conversations away
+        try:
+            await asyncio.wait_for(self.released.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"Not released by the router within {timeout:.0f}s, conversations stay here")
+            return False
+    
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, path, headers, body = await read_http_request(reader)
+            status, payload = await self.route(method, path, headers, body)
+            await write_http_response(writer, status, "application/json", json.dumps(payload))
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    def authorized(self, headers: Dict[str, str]) -> bool:
+        return hmac.compare_digest(headers.get(SECRET_HEADER.lower(), "").encode(), self.secret.encode())
+    
+    async def route(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[str, dict]:
+        if not self.authorized(headers):
+            return "401 Unauthorized", {"error": "unauthorized"}
+        if method == "GET" and path == "/readyz":
+            if self.bot.readiness.is_ready():
+                return "200 OK", {"ready": True}
+            return "503 Service Unavailable", {"ready": False}
+        if method != "POST":
+            return "405 Method Not Allowed", {"error": "method not allowed"}
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            return "400 Bad Request", {"error": "invalid JSON"}
+        
+        if path == "/update":
+            await self.bot.application.update_queue.put(Update.de_json(data, self.bot.application.bot))
+            self.updates_received.inc()
+            return "202 Accepted", {"ok": True}
+        if path == "/rebalance":
+            # The router only says which configured workers are up; any other URL is refused,
+            # so histories are never sent anywhere else
+            members, self_url = data["workers"], data["self"]
+            unknown = sorted(set(members + [self_url]) - self.workers)
+            if unknown:
+                logger.warning(f"Rebalance refused, not in LLM_PARTITION_WORKERS: {', '.join(unknown)}")
+                return "400 Bad Request", {"error": "unknown workers", "workers": unknown}
+            moved = await self.rebalance(members, self_url)
+            return "200 OK", {"moved": moved}
+        if path == "/conversations":
+            conversations = {int(user_id): messages for user_id, messages in data["conversations"].items()}
+            self.bot.conversation_manager.import_conversations(conversations)
+            self.conversations_moved.inc(len(conversations), direction="in")
+            return "200 OK", {"imported": len(conversations)}
+        return "404 Not Found", {"error": "not found"}
+    
+    async def rebalance(self, workers: List[str], self_url: str) -> int:
+        ring = HashRing(workers)
+        # The router holds new updates back meanwhile; finish the ones already queued so no
+        # reply is written to a conversation after it has moved
+        await asyncio.wait_for(self.bot.application.update_queue.join(), REBALANCE_TIMEOUT_SECONDS)
+        
+        moved = {}
+        if len(ring):
+            moved = self.bot.conversation_manager.export_conversations(lambda user_id: ring.owner(user_id) != self_url)
+        by_owner: Dict[str, Dict[str, list]] = defaultdict(dict)
+        for user_id, messages in moved.items():
+            by_owner[ring.owner(user_id)][str(user_id)] = messages
+        
+        handed_over = 0
+        for owner, conversations in by_owner.items():
+            try:
+                response = await self.client.post(f"{owner}/conversations", json={"conversations": conversations})
+                response.raise_for_status()
+                handed_over += len(conversations)
+            except httpx.HTTPError as e:
+                # Keep them rather than lose them; the owner starts those users afresh
+                logger.error(f"Handing {len(conversations)} conversations to {owner} failed: {e}")
+                self.bot.conversation_manager.import_conversations(
+                    {int(user_id): messages for user_id, messages in conversations.items()}
+                )
+        self.conversations_moved.inc(handed_over, direction="out")
+        
+        self.ring = ring
+        if self_url in ring.nodes:
+            # Workers share the bot token, so they share its global send limit
+            share = len(ring)
+            self.bot.send_queue.set_global_limit(
+                self.bot.config.send_global_rate / share,
+                max(1, round(self.bot.config.send_global_burst / share))
+            )
+        else:
+            self.released.set()
+        logger.info(f"Rebalanced onto {len(ring)} workers, handed over {handed_over} conversations")
+        return handed_over
+
+
+class PartitionRouter:
+    # The one process polling Telegram. Each update goes to the worker owning its user on a
+    # consistent-hash ring of the workers that report ready; when that set changes, the old
+    # owners hand conversations over before any update is forwarded on the new ring
+    def __init__(self, config: LLMBotConfig, readiness: Optional[Readiness] = None):
+        self.config = config
+        self.worker_urls = config.partition_workers
+        self.readiness = readiness or Readiness("LLM Router")
+        self.metrics = MetricsRegistry(const_labels={"bot": "llm_router"})
+        self.ring = HashRing()
+        self.ring_lock = asyncio.Lock()
+        self.client: Optional[httpx.AsyncClient] = None
+        self.watcher: Optional[asyncio.Task] = None
+        
+        builder = Application.builder().token(config.token).post_init(self.on_startup).post_shutdown(self.on_shutdown)
+        if config.telegram_base_url:
+            builder = builder.base_url(f"{config.telegram_base_url}/bot").base_file_url(f"{config.telegram_base_url}/file/bot")
+        self.application = builder.build()
+        self.application.add_handler(TypeHandler(Update, self.forward))
+        
+        self.setup_metrics()
+        self.health_server = None
+        if config.health_port:
+            self.health_server = HealthServer(self.metrics, self.readiness, config.health_host, config.health_port)
+            self.health_server.start()
+        logger.info(f"LLM Router initialized with {len(self.worker_urls)} candidate workers")
+    
+    def setup_metrics(self):
+        self.updates_total = self.metrics.counter(
+            "llm_router_updates_total", "Updates by routing outcome", ("outcome",)
+        )
+        self.forward_seconds = self.metrics.histogram(
+            "llm_router_forward_duration_seconds", "Time to hand an update to its worker"
+        )
+        self.rebalances_total = self.metrics.counter("llm_router_rebalances_total", "Ring membership changes")
+        self.metrics.callback("llm_router_ring_workers", "Workers on the partition ring", lambda: len(self.ring))
+        self.metrics.callback(
+            "llm_router_worker_share", "Fraction of users owned by each worker",
+            lambda: {(worker,): share for worker, share in self.ring.share().items()}, "gauge", ("worker",)
+        )
+        self.metrics.callback("bot_ready", "1 once updates can be routed", lambda: int(self.readiness.is_ready()))
+    
+    async def on_startup(self, application: Application):
+        self.client = httpx.AsyncClient(
+            timeout=FORWARD_TIMEOUT_SECONDS,
+            headers={SECRET_HEADER: self.config.partition_secret}
+        )
+        await self.refresh_workers()
+        self.watcher = asyncio.create_task(self.watch_workers())
+    
+    async def on_shutdown(self, application: Application):
+        self.readiness.mark_not_ready()
+        if self.watcher is not None:
+            self.watcher.cancel()
+        if self.client is not None:
+            await self.client.aclose()
+        if self.health_server is not None:
+            self.health_server.stop()
+    
+    async def watch_workers(self):
+        while True:
+            await asyncio.sleep(self.config.partition_check_seconds)
+            try:
+                await self.refresh_workers()
+            except Exception as e:
+                logger.error(f"Checking partition workers failed: {e}")
+    
+    async def probe(self, url: str) -> bool:
+        try:
+            response = await self.client.get(f"{url}/readyz", timeout=FORWARD_TIMEOUT_SECONDS)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+    
+    async def refresh_workers(self):
+        async with self.ring_lock:
+            await self._refresh_workers()
+    
+    async def _refresh_workers(self):
+        # Called with ring_lock held
+        ready = await asyncio.gather(*(self.probe(url) for url in self.worker_urls))
+        members = {url for url, ok in zip(self.worker_urls, ready) if ok}
+        if members != set(self.ring.nodes):
+            await self._rebalance(members)
+        if len(self.ring):
+            self.readiness.mark_ready()
+        else:
+            self.readiness.mark_not_ready()
+    
+    async def _rebalance(self, members: Iterable[str]):
+        previous = self.ring
+        ring = HashRing(members)
+        targets = sorted(set(previous.nodes) | set(ring.nodes))
+        results = await asyncio.gather(*(
+            self.client.post(
+                f"{url}/rebalance",
+                json={"workers": list(ring.nodes), "self": url},
+                timeout=REBALANCE_TIMEOUT_SECONDS
+            )
+            for url in targets
+        ), return_exceptions=True)
+        
+        moved = 0
+        for url, result in zip(targets, results):
+            if isinstance(result, Exception) or result.status_code != 200:
+                # A worker that died takes its conversations with it
+                logger.warning(f"Rebalancing {url} failed: {result}")
+            else:
+                moved += result.json().get("moved", 0)
+        self.ring = ring
+        self.rebalances_total.inc()
+        logger.info(f"Partition ring changed from {len(previous)} to {len(ring)} workers, {moved} conversations moved")
+    
+    async def forward(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        key = partition_key(update)
+        if key is None:
+            return
+        started = time.perf_counter()
+        # Forwarding in arrival order under the lock keeps each user's updates in order and
+        # never overlaps a rebalance
+        async with self.ring_lock:
+            for attempt in range(2):
+                if not len(self.ring):
+                    break
+                worker = self.ring.owner(key)
+                try:
+                    response = await self.client.post(
+                        f"{worker}/update",
+                        content=update.to_json(),
+                        headers={"content-type": "application/json"}
+                    )
+                    response.raise_for_status()
+                    self.updates_total.inc(outcome="forwarded" if attempt == 0 else "retried")
+                    self.forward_seconds.observe(time.perf_counter() - started)
+                    return
+                except httpx.HTTPError as e:
+                    logger.warning(f"Forwarding update {update.update_id} to {worker} failed: {e}")
+                    await self._refresh_workers()
+        
+        self.updates_total.inc(outcome="dropped")
+        logger.error(f"No worker available for update {update.update_id}, dropped")
+    
+    def run(self):
+        logger.info(f"Starting LLM Router over {', '.join(self.worker_urls)}...")
+        self.application.run_polling(allowed_updates=Update.ALL_TYPES)
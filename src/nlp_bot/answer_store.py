@@ -0,0 +1,78 @@
+import mmap
+from array import array
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from src.common.cache import CacheStats, LRUCache
+from src.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+BLOB_FILENAME = "answers.bin"
+OFFSETS_FILENAME = "offsets.npy"
+
+
+class AnswerStoreWriter:
+    def __init__(self, store_dir: Path):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._blob = open(self.store_dir / BLOB_FILENAME, 'wb')
+        self._offsets = array('q', [0])
+    
+    def append(self, answer: str) -> int:
+        answer_id = len(self._offsets) - 1
+        self._blob.write(answer.encode('utf-8'))
+        self._offsets.append(self._blob.tell())
+        return answer_id
+    
+    def close(self):
+        self._blob.close()
+        np.save(self.store_dir / OFFSETS_FILENAME, np.frombuffer(self._offsets, dtype=np.int64))
+        logger.info(f"Wrote {len(self._offsets) - 1} answers to {self.store_dir}")
+    
+    def __enter__(self) -> "AnswerStoreWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class AnswerStore:
+    def __init__(self, store_dir: Path, cache_size: int = 256):
+        self.store_dir = Path(store_dir)
+        # Both files are memory-mapped: pages are loaded by the OS on access and
+        # can be evicted under pressure, so they stay out of the Python heap.
+        self.offsets = np.load(self.store_dir / OFFSETS_FILENAME, mmap_mode='r')
+        self._file = open(self.store_dir / BLOB_FILENAME, 'rb')
+        blob_size = int(self.offsets[-1])
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if blob_size > 0 else b""
+        self.cache = LRUCache(max_size=cache_size)
+        logger.info(f"Opened answer store with {len(self)} answers from {self.store_dir}")
+    
+    def get(self, answer_id: int) -> str:
+        answer = self.cache.get(answer_id)
+        if answer is None:
+            start, end = int(self.offsets[answer_id]), int(self.offsets[answer_id + 1])
+            answer = self._blob[start:end].decode('utf-8')
+            self.cache.put(answer_id, answer)
+        return answer
+    
+    def get_cache_stats(self) -> CacheStats:
+        return self.cache.get_stats()
+    
+    def close(self):
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+def write_answer_store(answers: Iterable[str], store_dir: Path) -> Path:
+    with AnswerStoreWriter(store_dir) as writer:
+        for answer in answers:
+            writer.append(answer)
+    return Path(store_dir)
@@ -1,4 +1,11 @@
+import asyncio
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Optional
+
 from telegram import Update
 from telegram.ext import (
     Application,
@@ -8,28 +15,243 @@ from telegram.ext import (
     ContextTypes
 )
 
+from src.common.cache import CacheStats
 from src.common.config import NLPBotConfig
+from src.common.health_server import HealthServer
 from src.common.logger import get_logger
-from src.nlp_bot.nlp_engine import NLPEngine, load_corpus_from_json
+from src.common.metrics import MetricsRegistry, register_cache_metrics
+from src.common.readiness import Readiness
+from src.common.resources import CORPUS_PATH, Resource, get_resource_loader, register_resource_metrics, start_reload_triggers
+from src.common.send_queue import SendQueue
 
 logger = get_logger(__name__)
 
+VERSION_DIR_PATTERN = re.compile(r"[0-9a-f]{16}")
+
 
 class NLPBot:
-    def __init__(self, config: NLPBotConfig):
+    def __init__(self, config: NLPBotConfig, readiness: Optional[Readiness] = None):
         self.config = config
-        self.application = Application.builder().token(config.token).build()
+        self.readiness = readiness or Readiness("NLP Bot")
         
-        corpus_path = Path(__file__).parent.parent.parent / "data" / "corpus" / "qa_pairs.json"
-        corpus = load_corpus_from_json(corpus_path)
-        self.nlp_engine = NLPEngine(
-            corpus=corpus,
-            similarity_threshold=config.similarity_threshold
+        # The engine (sklearn import, corpus, index) loads in a background thread while the
+        # Telegram client starts up and connects; post_init waits for it before polling
+        self.nlp_engine = None
+        self.resources = get_resource_loader()
+        self.corpus: Optional[Resource] = None
+        self.reload_lock = asyncio.Lock()
+        self.reload_task: Optional[asyncio.Task] = None
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine-loader")
+        self.engine_future = executor.submit(self.load_engine)
+        executor.shutdown(wait=False)
+        
+        # Hybrid retrieval batches embeddings across concurrently handled updates
+        builder = (
+            Application.builder()
+            .token(config.token)
+            .concurrent_updates(config.retrieval_engine == "hybrid")
+            .post_init(self.on_startup)
+            .post_shutdown(self.on_shutdown)
+        )
+        if config.telegram_base_url:
+            # A local Bot API server, or runners/fake_telegram_server.py
+            builder = builder.base_url(f"{config.telegram_base_url}/bot").base_file_url(f"{config.telegram_base_url}/file/bot")
+        self.application = builder.build()
+        
+        self.metrics = MetricsRegistry(const_labels={"bot": "nlp"})
+        self.send_queue = SendQueue(
+            self.application.bot.send_message,
+            global_rate=config.send_global_rate,
+            global_burst=config.send_global_burst,
+            chat_rate=config.send_chat_rate,
+            chat_burst=config.send_chat_burst,
+            max_pending=config.send_queue_size,
+            short_reply_chars=config.short_reply_chars,
+            registry=self.metrics
         )
+        self.setup_metrics()
+        self.health_server = None
+        if config.health_port:
+            # Started before the engine has loaded, so /readyz reports the wait
+            self.health_server = HealthServer(self.metrics, self.readiness, config.health_host, config.health_port)
+            self.health_server.start()
         
         self.setup_handlers()
         logger.info("NLP Bot initialized successfully")
     
+    def load_engine(self):
+        from src.nlp_bot.nlp_engine import parse_corpus, parse_corpus_lines
+        
+        config = self.config
+        corpus_path = Path(config.corpus_path) if config.corpus_path else CORPUS_PATH
+        # A streamed corpus is hashed but never held in memory as a whole
+        streamed = config.retrieval_engine == "tfidf" and config.answer_store_dir
+        parse = parse_corpus_lines if corpus_path.suffix == ".jsonl" else parse_corpus
+        self.resources.register("corpus", corpus_path, None if streamed else parse)
+        corpus = self.resources.get("corpus")
+        return self.engine_for(corpus), corpus
+    
+    def engine_for(self, corpus: Resource):
+        from src.nlp_bot.nlp_engine import NLPEngine, iter_corpus_entries
+        
+        config = self.config
+        # Answers on disk go in a directory per corpus version, so building the index for a
+        # new version never rewrites the files the serving engine reads
+        answer_store_dir = Path(config.answer_store_dir) / corpus.version if config.answer_store_dir else None
+        if isinstance(corpus.value, Path):
+            # Large corpora: stream entries into the index and keep answers on disk
+            return NLPEngine.from_stream(
+                iter_corpus_entries(corpus.path),
+                answer_store_dir,
+                similarity_threshold=config.similarity_threshold,
+                query_cache_size=config.query_cache_size,
+                answer_cache_size=config.answer_cache_size
+            )
+        if config.retrieval_engine == "hashing":
+            from src.nlp_bot.hashing_engine import HashingNLPEngine
+            
+            return HashingNLPEngine(
+                corpus.value,
+                similarity_threshold=config.similarity_threshold,
+                query_cache_size=config.query_cache_size,
+                n_features=config.hashing_n_features,
+                n_bigram_features=config.hashing_n_bigram_features,
+                min_bigram_df=config.min_bigram_df,
+                answer_store_dir=answer_store_dir,
+                answer_cache_size=config.answer_cache_size
+            )
+        if config.retrieval_engine == "sharded":
+            from src.nlp_bot.sharded_index import ShardedNLPIndex
+            
+            return ShardedNLPIndex(
+                corpus.value,
+                similarity_threshold=config.similarity_threshold,
+                partition_by=config.shard_partition_by,
+                n_hash_shards=config.shard_count,
+                query_cache_size=config.query_cache_size
+            )
+        return self.build_engine(corpus.value)
+    
+    async def reload_resources(self, force: bool = False):
+        async with self.reload_lock:
+            corpus = await self.resources.reload_async("corpus", force)
+            if corpus is None:
+                return
+            # The new index is built off the event loop; messages are answered from the
+            # current one until the swap
+            started = time.perf_counter()
+            try:
+                engine = await asyncio.to_thread(self.engine_for, corpus)
+            except Exception as e:
+                logger.error(f"Building the index for corpus version {corpus.version} failed: {e}")
+                return
+            previous, self.nlp_engine, self.corpus = self.corpus, engine, corpus
+            logger.info(
+                f"Serving corpus version {corpus.version} (was {previous.version}), "
+                f"index built in {time.perf_counter() - started:.2f}s"
+            )
+            self.remove_stale_answer_stores()
+    
+    def remove_stale_answer_stores(self):
+        if not self.config.answer_store_dir:
+            return
+        for store_dir in Path(self.config.answer_store_dir).iterdir():
+            if store_dir.is_dir() and VERSION_DIR_PATTERN.fullmatch(store_dir.name) and store_dir.name != self.corpus.version:
+                shutil.rmtree(store_dir, ignore_errors=True)
+    
+    async def on_startup(self, application: Application):
+        self.send_queue.start()
+        self.nlp_engine, self.corpus = await asyncio.wrap_future(self.engine_future)
+        self.remove_stale_answer_stores()
+        self.reload_task = start_reload_triggers(self.reload_resources, self.config.resource_check_seconds)
+        self.readiness.mark_ready()
+    
+    async def on_shutdown(self, application: Application):
+        self.readiness.mark_not_ready()
+        if self.reload_task is not None:
+            self.reload_task.cancel()
+        await self.send_queue.close()
+        if self.health_server is not None:
+            self.health_server.stop()
+    
+    def setup_metrics(self):
+        self.messages_total = self.metrics.counter(
+            "bot_messages_total", "Text messages handled, by outcome", ("outcome",)
+        )
+        self.messages_in_progress = self.metrics.gauge("bot_messages_in_progress", "Text messages being handled")
+        self.response_seconds = self.metrics.histogram(
+            "bot_response_duration_seconds", "Time from receiving a message to queueing the reply"
+        )
+        self.match_seconds = self.metrics.histogram(
+            "nlp_match_duration_seconds", "Time to match a query against the corpus"
+        )
+        self.metrics.callback(
+            "bot_update_queue_depth", "Updates received but not yet handled",
+            lambda: self.application.update_queue.qsize()
+        )
+        self.metrics.callback("bot_ready", "1 once the bot can answer messages", lambda: int(self.readiness.is_ready()))
+        register_cache_metrics(self.metrics, "nlp", self.get_cache_stats)
+        register_resource_metrics(self.metrics, lambda: {"corpus": self.corpus})
+    
+    def get_cache_stats(self) -> Dict[str, CacheStats]:
+        engines = {"": self.nlp_engine}
+        if hasattr(self.nlp_engine, "lexical_engine"):
+            engines = {"lexical_": self.nlp_engine.lexical_engine, "dense_": self.nlp_engine.dense_engine}
+        
+        stats = {}
+        for prefix, engine in engines.items():
+            if hasattr(engine, "get_cache_stats"):
+                stats[f"{prefix}query"] = engine.get_cache_stats()
+            if hasattr(engine, "get_answer_cache_stats") and engine.get_answer_cache_stats() is not None:
+                stats[f"{prefix}answer"] = engine.get_answer_cache_stats()
+        return stats
+    
+    def build_engine(self, corpus: list):
+        from src.nlp_bot.nlp_engine import NLPEngine
+        
+        lexical_engine = None
+        if self.config.retrieval_engine != "dense":
+            lexical_engine = NLPEngine(
+                corpus=corpus,
+                similarity_threshold=self.config.similarity_threshold,
+                query_cache_size=self.config.query_cache_size
+            )
+            if self.config.retrieval_engine == "tfidf":
+                return lexical_engine
+        
+        from src.nlp_bot.dense_engine import DenseEngine
+        from src.nlp_bot.embeddings import SentenceEmbedder
+        
+        dense_engine = DenseEngine(
+            corpus=corpus,
+            embedder=SentenceEmbedder(Path(self.config.embedding_model_path)),
+            similarity_threshold=self.config.dense_similarity_threshold,
+            index_type=self.config.dense_index,
+            quantization=self.config.dense_quantization,
+            query_cache_size=self.config.query_cache_size
+        )
+        if lexical_engine is None:
+            return dense_engine
+        
+        from src.nlp_bot.hybrid_engine import HybridEngine
+        
+        return HybridEngine(
+            lexical_engine=lexical_engine,
+            dense_engine=dense_engine,
+            fusion=self.config.hybrid_fusion,
+            lexical_weight=self.config.hybrid_lexical_weight
+        )
+    
+    async def match_query(self, query: str):
+        if hasattr(self.nlp_engine, "find_best_match_async"):
+            return await self.nlp_engine.find_best_match_async(query)
+        return self.nlp_engine.find_best_match(query)
+    
+    async def reply(self, update: Update, text: str, **options):
+        # Queued rather than sent inline: the handler returns while the queue paces delivery
+        # within Telegram's limits, splitting replies longer than a Telegram message
+        await self.send_queue.enqueue(update.effective_chat.id, text, **options)
+    
     def setup_handlers(self):
         self.application.add_handler(CommandHandler("start", self.handle_start))
         self.application.add_handler(CommandHandler("help", self.handle_help))
@@ -49,7 +271,7 @@ class NLPBot:
             "• Lugares según tu presupuesto\n\n"
             "¿Qué se te antoja hoy?"
         )
-        await update.message.reply_text(welcome_message)
+        await self.reply(update, welcome_message)
         logger.info(f"User {user.id} started conversation")
     
     async def handle_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -64,7 +286,7 @@ class NLPBot:
             "• 'Recomiéndame algo vegetariano'\n"
             "• '¿Restaurantes económicos?'"
         )
-        await update.message.reply_text(help_message, parse_mode='Markdown')
+        await self.reply(update, help_message, parse_mode='Markdown')
     
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_message = update.message.text
@@ -72,17 +294,22 @@ class NLPBot:
         
         logger.info(f"User {user_id} sent: {user_message}")
         
+        started = time.perf_counter()
+        outcome = "error"
+        self.messages_in_progress.inc()
         try:
-            answer, score = self.nlp_engine.find_best_match(user_message)
+            answer, score = await self.match_query(user_message)
+            self.match_seconds.observe(time.perf_counter() - started)
             
             if answer:
                 response = answer
-                logger.info(f"Matched with score {score:.3f}")
+                logger.info(f"Matched with score {score:.3f} (corpus {self.corpus.version})")
             else:
                 response = self.nlp_engine.get_fallback_response()
-                logger.info(f"No match found (best score: {score:.3f})")
+                logger.info(f"No match found (best score: {score:.3f}, corpus {self.corpus.version})")
             
-            await update.message.reply_text(response)
+            await self.reply(update, response)
+            outcome = "matched" if answer else "fallback"
             
         except Exception as e:
             logger.error(f"Error processing message: {e}")
@@ -90,7 +317,11 @@ class NLPBot:
                 "Lo siento, hubo un error al procesar tu mensaje. "
                 "Por favor, intenta de nuevo."
             )
-            await update.message.reply_text(error_message)
+            await self.reply(update, error_message)
+        finally:
+            self.messages_in_progress.dec()
+            self.messages_total.inc(outcome=outcome)
+            self.response_seconds.observe(time.perf_counter() - started)
     
     def run(self):
         logger.info("Starting NLP Bot...")
@@ -0,0 +1,91 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.common.cache import CacheStats, LRUCache
+from src.common.exceptions import CorpusEmptyError, InvalidQueryError
+from src.common.logger import get_logger
+from src.nlp_bot.embeddings import Embedder
+from src.nlp_bot.nlp_engine import FALLBACK_RESPONSE, CorpusEntry, MatchCandidate, TopKResult
+from src.nlp_bot.vector_index import build_vector_index
+
+logger = get_logger(__name__)
+
+
+class DenseEngine:
+    def __init__(
+        self,
+        corpus: List[CorpusEntry],
+        embedder: Embedder,
+        similarity_threshold: float = 0.5,
+        index_type: str = "exact",
+        quantization: str = "float16",
+        query_cache_size: int = 1024
+    ):
+        if not corpus:
+            raise CorpusEmptyError("Corpus cannot be empty")
+        
+        self.corpus = corpus
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.query_cache = LRUCache(max_size=query_cache_size)
+        
+        corpus_questions = [entry.question for entry in corpus]
+        corpus_embeddings = self.embedder.encode(corpus_questions)
+        self.index = build_vector_index(corpus_embeddings, index_type=index_type, quantization=quantization)
+        
+        logger.info(f"Dense Engine initialized with {len(corpus)} corpus entries ({index_type} index)")
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        query_vector = self.query_cache.get(query)
+        if query_vector is None:
+            query_vector = self.embedder.encode([query])[0]
+            self.query_cache.put(query, query_vector)
+        return query_vector
+    
+    def get_cache_stats(self) -> CacheStats:
+        return self.query_cache.get_stats()
+    
+    def search_vector(self, query_vector: np.ndarray, k: int) -> TopKResult:
+        scores, rows = self.index.search(query_vector, k)
+        
+        candidates = [
+            MatchCandidate(
+                corpus_index=int(row),
+                answer=self.corpus[row].answer,
+                score=float(score),
+                category=self.corpus[row].category
+            )
+            for score, row in zip(scores, rows)
+        ]
+        return TopKResult(candidates=candidates)
+    
+    def find_top_k(self, query: str, k: int = 3) -> TopKResult:
+        if not query or not query.strip():
+            raise InvalidQueryError("Query cannot be empty")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        
+        return self.search_vector(self.embed_query(query), k)
+    
+    def find_best_match(self, query: str) -> Tuple[Optional[str], float]:
+        if not query or not query.strip():
+            raise InvalidQueryError("Query cannot be empty")
+        
+        try:
+            result = self.find_top_k(query, k=1)
+            best_score = result.best_score
+            
+            logger.debug(f"Query: '{query}' | Best dense match score: {best_score:.3f}")
+            
+            if result.best and best_score >= self.similarity_threshold:
+                return result.best.answer, best_score
+            
+            return None, best_score
+        
+        except Exception as e:
+            logger.error(f"Error finding dense match for query '{query}': {e}")
+            raise
+    
+    def get_fallback_response(self) -> str:
+        return FALLBACK_RESPONSE
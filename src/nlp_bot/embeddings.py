@@ -0,0 +1,45 @@
+from pathlib import Path
+from typing import List, Protocol
+
+import numpy as np
+
+from src.common.exceptions import ConfigurationError
+from src.common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Embedder(Protocol):
+    dimension: int
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        ...
+
+
+class SentenceEmbedder:
+    def __init__(self, model_path: Path, batch_size: int = 32):
+        model_path = Path(model_path)
+        if not model_path.exists():
+            raise ConfigurationError(f"Embedding model not found on disk: {model_path}")
+        
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ConfigurationError(
+                "sentence-transformers is required for dense retrieval"
+            ) from e
+        
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(str(model_path), device="cpu")
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        logger.info(f"Loaded embedding model from {model_path} (dim={self.dimension})")
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return embeddings.astype(np.float32, copy=False)
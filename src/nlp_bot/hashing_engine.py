@@ -0,0 +1,130 @@
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+from scipy.sparse import csr_matrix, hstack, vstack
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+from src.common.logger import get_logger
+from src.nlp_bot.nlp_engine import CorpusEntry, NLPEngine
+from src.nlp_bot.text_normalizer import normalize_text, tokenize
+
+logger = get_logger(__name__)
+
+
+def _batched(documents: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    iterator = iter(documents)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _build_hasher(n_features: int, ngram: int) -> HashingVectorizer:
+    return HashingVectorizer(
+        n_features=n_features,
+        preprocessor=normalize_text,
+        tokenizer=tokenize,
+        token_pattern=None,
+        analyzer='word',
+        ngram_range=(ngram, ngram),
+        alternate_sign=False,
+        norm=None,
+        dtype=np.float32
+    )
+
+
+def _compact(matrix: csr_matrix) -> csr_matrix:
+    matrix = matrix.tocsr().astype(np.float32, copy=False)
+    if matrix.nnz < np.iinfo(np.int32).max:
+        matrix.indices = matrix.indices.astype(np.int32, copy=False)
+        matrix.indptr = matrix.indptr.astype(np.int32, copy=False)
+    return matrix
+
+
+class HashedTfidfVectorizer:
+    def __init__(
+        self,
+        n_features: int = 2 ** 18,
+        n_bigram_features: int = 2 ** 18,
+        min_bigram_df: int = 1,
+        batch_size: int = 10000
+    ):
+        # Unigrams and bigrams hash into separate column ranges so low-df
+        # bigrams can be pruned without touching unigram columns.
+        self.n_features = n_features
+        self.n_bigram_features = n_bigram_features
+        self.min_bigram_df = min_bigram_df
+        self.batch_size = batch_size
+        self.unigram_hasher = _build_hasher(n_features, 1)
+        self.bigram_hasher = _build_hasher(n_bigram_features, 2) if n_bigram_features > 0 else None
+        self.transformer = TfidfTransformer()
+        self.column_mask: Optional[np.ndarray] = None
+    
+    def _hash(self, documents: List[str]) -> csr_matrix:
+        counts = self.unigram_hasher.transform(documents)
+        if self.bigram_hasher is not None:
+            counts = hstack([counts, self.bigram_hasher.transform(documents)], format='csr')
+        return counts
+    
+    def _apply_mask(self, counts: csr_matrix) -> csr_matrix:
+        # Columns no corpus document kept are out of vocabulary, as in TfidfVectorizer
+        counts.data[~self.column_mask[counts.indices]] = 0
+        counts.eliminate_zeros()
+        return counts
+    
+    def fit_transform(self, documents: Iterable[str]) -> csr_matrix:
+        counts = vstack([self._hash(batch) for batch in _batched(documents, self.batch_size)], format='csr')
+        
+        document_frequency = np.bincount(counts.indices, minlength=counts.shape[1])
+        self.column_mask = document_frequency > 0
+        if self.min_bigram_df > 1:
+            self.column_mask[self.n_features:] &= document_frequency[self.n_features:] >= self.min_bigram_df
+        
+        counts = self._apply_mask(counts)
+        matrix = _compact(self.transformer.fit_transform(counts))
+        self.transformer.idf_ = self.transformer.idf_.astype(np.float32)
+        
+        logger.info(
+            f"Hashed TF-IDF fitted: {int(self.column_mask.sum())} active columns of {counts.shape[1]}, "
+            f"{matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes} bytes"
+        )
+        return matrix
+    
+    def transform(self, documents: Iterable[str]) -> csr_matrix:
+        counts = self._apply_mask(self._hash(list(documents)))
+        return _compact(self.transformer.transform(counts))
+
+
+class HashingNLPEngine(NLPEngine):
+    n_features = 2 ** 18
+    n_bigram_features = 2 ** 18
+    min_bigram_df = 1
+    
+    def __init__(
+        self,
+        corpus: List[CorpusEntry],
+        similarity_threshold: float = 0.3,
+        query_cache_size: int = 1024,
+        n_features: int = 2 ** 18,
+        n_bigram_features: int = 2 ** 18,
+        min_bigram_df: int = 1,
+        **kwargs
+    ):
+        self.n_features = n_features
+        self.n_bigram_features = n_bigram_features
+        self.min_bigram_df = min_bigram_df
+        super().__init__(
+            corpus,
+            similarity_threshold=similarity_threshold,
+            query_cache_size=query_cache_size,
+            **kwargs
+        )
+    
+    def _build_vectorizer(self, fast_normalization: bool) -> HashedTfidfVectorizer:
+        return HashedTfidfVectorizer(
+            n_features=self.n_features,
+            n_bigram_features=self.n_bigram_features,
+            min_bigram_df=self.min_bigram_df
+        )
@@ -0,0 +1,263 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.common.exceptions import InvalidQueryError
+from src.common.logger import get_logger
+from src.nlp_bot.dense_engine import DenseEngine
+from src.nlp_bot.embeddings import Embedder
+from src.nlp_bot.nlp_engine import FALLBACK_RESPONSE, MatchCandidate, NLPEngine, TopKResult
+
+logger = get_logger(__name__)
+
+FUSION_METHODS = ("rrf", "weighted")
+
+
+@dataclass
+class StageTimings:
+    lexical_ms: float = 0.0
+    embedding_ms: float = 0.0
+    dense_search_ms: float = 0.0
+    fusion_ms: float = 0.0
+    total_ms: float = 0.0
+    
+    def to_dict(self) -> dict:
+        return {
+            "lexical_ms": round(self.lexical_ms, 3),
+            "embedding_ms": round(self.embedding_ms, 3),
+            "dense_search_ms": round(self.dense_search_ms, 3),
+            "fusion_ms": round(self.fusion_ms, 3),
+            "total_ms": round(self.total_ms, 3)
+        }
+
+
+@dataclass
+class HybridResult:
+    result: TopKResult
+    timings: StageTimings
+    accepted: bool
+    # Best raw cosine score of the top candidate, on the scale of the similarity thresholds;
+    # result scores are fused (RRF scores are around 1/60)
+    match_score: float = 0.0
+
+
+class EmbeddingBatcher:
+    def __init__(self, embedder: Embedder, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.embedder = embedder
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches_run = 0
+        self.texts_embedded = 0
+    
+    async def embed(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush, loop)
+        
+        return await future
+    
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            # The loop only keeps weak references to tasks
+            task = loop.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        
+        try:
+            embeddings = await asyncio.to_thread(self.embedder.encode, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        self.batches_run += 1
+        self.texts_embedded += len(texts)
+        by_text = dict(zip(texts, embeddings))
+        for text, future in batch:
+            if not future.done():
+                future.set_result(by_text[text])
+    
+    def get_stats(self) -> dict:
+        return {
+            "batches_run": self.batches_run,
+            "texts_embedded": self.texts_embedded,
+            "avg_batch_size": round(self.texts_embedded / self.batches_run, 2) if self.batches_run else 0.0
+        }
+
+
+def reciprocal_rank_fusion(rankings: List[TopKResult], rrf_k: int = 60) -> Dict[int, float]:
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, candidate in enumerate(ranking.candidates, start=1):
+            fused[candidate.corpus_index] = fused.get(candidate.corpus_index, 0.0) + 1.0 / (rrf_k + rank)
+    return fused
+
+
+def weighted_fusion(lexical: TopKResult, dense: TopKResult, lexical_weight: float) -> Dict[int, float]:
+    fused: Dict[int, float] = {}
+    for candidate in lexical.candidates:
+        fused[candidate.corpus_index] = lexical_weight * candidate.score
+    for candidate in dense.candidates:
+        fused[candidate.corpus_index] = fused.get(candidate.corpus_index, 0.0) + (1 - lexical_weight) * candidate.score
+    return fused
+
+
+class HybridEngine:
+    def __init__(
+        self,
+        lexical_engine: NLPEngine,
+        dense_engine: DenseEngine,
+        fusion: str = "rrf",
+        lexical_weight: float = 0.5,
+        rrf_k: int = 60,
+        candidate_k: int = 10,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"Unsupported fusion '{fusion}', expected one of {FUSION_METHODS}")
+        
+        self.lexical_engine = lexical_engine
+        self.dense_engine = dense_engine
+        self.corpus = lexical_engine.corpus
+        self.fusion = fusion
+        self.lexical_weight = lexical_weight
+        self.rrf_k = rrf_k
+        self.candidate_k = candidate_k
+        self.batcher = EmbeddingBatcher(dense_engine.embedder, max_batch_size, max_wait_ms)
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid")
+        
+        logger.info(f"Hybrid Engine initialized with {fusion} fusion over {len(self.corpus)} entries")
+    
+    def _timed_lexical(self, query: str) -> Tuple[TopKResult, float]:
+        start_time = time.perf_counter()
+        result = self.lexical_engine.find_top_k(query, k=self.candidate_k)
+        return result, (time.perf_counter() - start_time) * 1000
+    
+    def _timed_dense_search(self, query_vector: np.ndarray) -> Tuple[TopKResult, float]:
+        start_time = time.perf_counter()
+        result = self.dense_engine.search_vector(query_vector, self.candidate_k)
+        return result, (time.perf_counter() - start_time) * 1000
+    
+    def _fuse(self, lexical: TopKResult, dense: TopKResult, k: int, timings: StageTimings) -> HybridResult:
+        start_time = time.perf_counter()
+        
+        if self.fusion == "rrf":
+            fused = reciprocal_rank_fusion([lexical, dense], self.rrf_k)
+        else:
+            fused = weighted_fusion(lexical, dense, self.lexical_weight)
+        
+        ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+        # Answers come from the retrievers' candidates; the corpus may not hold them in memory
+        retrieved = {c.corpus_index: c for c in dense.candidates}
+        retrieved.update((c.corpus_index, c) for c in lexical.candidates)
+        candidates = [
+            MatchCandidate(
+                corpus_index=idx,
+                answer=retrieved[idx].answer,
+                score=score,
+                category=retrieved[idx].category
+            )
+            for idx, score in ranked
+        ]
+        
+        # RRF scores are rank-based, so acceptance is decided on the raw retriever scores
+        accepted = False
+        match_score = 0.0
+        if candidates:
+            best_idx = candidates[0].corpus_index
+            lexical_score = next((c.score for c in lexical.candidates if c.corpus_index == best_idx), 0.0)
+            dense_score = next((c.score for c in dense.candidates if c.corpus_index == best_idx), 0.0)
+            accepted = (
+                lexical_score >= self.lexical_engine.similarity_threshold
+                or dense_score >= self.dense_engine.similarity_threshold
+            )
+            match_score = max(lexical_score, dense_score)
+        
+        timings.fusion_ms = (time.perf_counter() - start_time) * 1000
+        return HybridResult(
+            result=TopKResult(candidates=candidates), timings=timings, accepted=accepted, match_score=match_score
+        )
+    
+    async def find_top_k_async(self, query: str, k: int = 3) -> HybridResult:
+        if not query or not query.strip():
+            raise InvalidQueryError("Query cannot be empty")
+        
+        loop = asyncio.get_running_loop()
+        start_time = time.perf_counter()
+        timings = StageTimings()
+        
+        lexical_future = loop.run_in_executor(self.executor, self._timed_lexical, query)
+        
+        query_vector = self.dense_engine.query_cache.get(query)
+        if query_vector is None:
+            embed_start = time.perf_counter()
+            query_vector = await self.batcher.embed(query)
+            timings.embedding_ms = (time.perf_counter() - embed_start) * 1000
+            self.dense_engine.query_cache.put(query, query_vector)
+        
+        dense_result, timings.dense_search_ms = await loop.run_in_executor(
+            self.executor, self._timed_dense_search, query_vector
+        )
+        lexical_result, timings.lexical_ms = await lexical_future
+        
+        hybrid = self._fuse(lexical_result, dense_result, k, timings)
+        timings.total_ms = (time.perf_counter() - start_time) * 1000
+        
+        logger.debug(f"Query: '{query}' | Hybrid stage timings: {timings.to_dict()}")
+        return hybrid
+    
+    def find_top_k(self, query: str, k: int = 3) -> HybridResult:
+        if not query or not query.strip():
+            raise InvalidQueryError("Query cannot be empty")
+        
+        start_time = time.perf_counter()
+        timings = StageTimings()
+        lexical_future = self.executor.submit(self._timed_lexical, query)
+        
+        embed_start = time.perf_counter()
+        query_vector = self.dense_engine.embed_query(query)
+        timings.embedding_ms = (time.perf_counter() - embed_start) * 1000
+        
+        dense_result, timings.dense_search_ms = self._timed_dense_search(query_vector)
+        lexical_result, timings.lexical_ms = lexical_future.result()
+        
+        hybrid = self._fuse(lexical_result, dense_result, k, timings)
+        timings.total_ms = (time.perf_counter() - start_time) * 1000
+        return hybrid
+    
+    async def find_best_match_async(self, query: str) -> Tuple[Optional[str], float]:
+        hybrid = await self.find_top_k_async(query, k=1)
+        if hybrid.accepted:
+            return hybrid.result.best.answer, hybrid.match_score
+        return None, hybrid.match_score
+    
+    def find_best_match(self, query: str) -> Tuple[Optional[str], float]:
+        hybrid = self.find_top_k(query, k=1)
+        if hybrid.accepted:
+            return hybrid.result.best.answer, hybrid.match_score
+        return None, hybrid.match_score
+    
+    def get_fallback_response(self) -> str:
+        return FALLBACK_RESPONSE
@@ -1,17 +1,28 @@
 import json
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
+from scipy.sparse import csr_matrix
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 
+from src.common.cache import CacheStats, LRUCache
 from src.common.exceptions import CorpusEmptyError, InvalidQueryError
 from src.common.logger import get_logger
+from src.nlp_bot.answer_store import AnswerStore, AnswerStoreWriter, write_answer_store
+from src.nlp_bot.text_normalizer import normalize_text, tokenize
 
 logger = get_logger(__name__)
 
+FALLBACK_RESPONSE = (
+    "Lo siento, no entendí tu pregunta. "
+    "¿Podrías reformularla o preguntar sobre nuestros servicios, "
+    "horarios o ubicación?"
+)
+
 
 @dataclass
 class CorpusEntry:
@@ -20,42 +31,278 @@ class CorpusEntry:
     category: Optional[str] = None
 
 
+@dataclass(slots=True)
+class CompactEntry:
+    answer_id: int
+    category: Optional[str] = None
+
+
+@dataclass
+class MatchCandidate:
+    corpus_index: int
+    answer: str
+    score: float
+    category: Optional[str] = None
+
+
+@dataclass
+class TopKResult:
+    candidates: List[MatchCandidate]
+    
+    @property
+    def best(self) -> Optional[MatchCandidate]:
+        return self.candidates[0] if self.candidates else None
+    
+    @property
+    def best_score(self) -> float:
+        return self.candidates[0].score if self.candidates else 0.0
+    
+    @property
+    def margin(self) -> float:
+        if len(self.candidates) < 2:
+            return self.best_score
+        return self.candidates[0].score - self.candidates[1].score
+    
+    def to_dict(self) -> dict:
+        return {
+            "margin": round(self.margin, 4),
+            "candidates": [
+                {
+                    "corpus_index": c.corpus_index,
+                    "score": round(c.score, 4),
+                    "category": c.category
+                }
+                for c in self.candidates
+            ]
+        }
+
+
+def select_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k == 1:
+        return np.array([np.argmax(scores)])
+    if k >= len(scores):
+        return np.argsort(-scores, kind='stable')
+    
+    top_idx = np.argpartition(-scores, k - 1)[:k]
+    return top_idx[np.argsort(-scores[top_idx], kind='stable')]
+
+
+def build_tfidf_vectorizer(fast_normalization: bool = True) -> TfidfVectorizer:
+    if fast_normalization:
+        return TfidfVectorizer(
+            preprocessor=normalize_text,
+            tokenizer=tokenize,
+            token_pattern=None,
+            analyzer='word',
+            ngram_range=(1, 2)
+        )
+    
+    return TfidfVectorizer(
+        lowercase=True,
+        strip_accents='unicode',
+        analyzer='word',
+        ngram_range=(1, 2)
+    )
+
+
 class NLPEngine:
-    def __init__(self, corpus: List[CorpusEntry], similarity_threshold: float = 0.3):
+    def __init__(
+        self,
+        corpus: List[CorpusEntry],
+        similarity_threshold: float = 0.3,
+        query_cache_size: int = 1024,
+        fast_normalization: bool = True,
+        answer_store_dir: Optional[Path] = None,
+        answer_cache_size: int = 256
+    ):
         if not corpus:
             raise CorpusEmptyError("Corpus cannot be empty")
         
-        self.corpus = corpus
-        self.similarity_threshold = similarity_threshold
-        
-        self.vectorizer = TfidfVectorizer(
-            lowercase=True,
-            strip_accents='unicode',
-            analyzer='word',
-            ngram_range=(1, 2)
-        )
+        self._setup(similarity_threshold, query_cache_size, fast_normalization)
+        self.corpus: List[Union[CorpusEntry, CompactEntry]] = corpus
         
         corpus_questions = [entry.question for entry in corpus]
         self.tfidf_matrix = self.vectorizer.fit_transform(corpus_questions)
         
+        if answer_store_dir is not None:
+            write_answer_store((entry.answer for entry in corpus), answer_store_dir)
+            self.answer_store = AnswerStore(answer_store_dir, cache_size=answer_cache_size)
+            self.corpus = [
+                CompactEntry(answer_id=idx, category=sys.intern(entry.category) if entry.category else None)
+                for idx, entry in enumerate(corpus)
+            ]
+        
+        self._build_category_index()
+        
         logger.info(f"NLP Engine initialized with {len(corpus)} corpus entries")
     
-    def find_best_match(self, query: str) -> Tuple[Optional[str], float]:
+    def _setup(self, similarity_threshold: float, query_cache_size: int, fast_normalization: bool):
+        self.similarity_threshold = similarity_threshold
+        self.query_cache = LRUCache(max_size=query_cache_size)
+        self.answer_store: Optional[AnswerStore] = None
+        self.vectorizer = self._build_vectorizer(fast_normalization)
+    
+    @classmethod
+    def from_stream(
+        cls,
+        entries: Iterable[CorpusEntry],
+        answer_store_dir: Path,
+        similarity_threshold: float = 0.3,
+        query_cache_size: int = 1024,
+        fast_normalization: bool = True,
+        answer_cache_size: int = 256
+    ) -> "NLPEngine":
+        # Single pass: questions go straight into the vectorizer while answers
+        # are written out of line, so neither list is materialized in full.
+        engine = cls.__new__(cls)
+        engine._setup(similarity_threshold, query_cache_size, fast_normalization)
+        
+        compact_entries: List[CompactEntry] = []
+        
+        with AnswerStoreWriter(answer_store_dir) as writer:
+            def questions() -> Iterator[str]:
+                for entry in entries:
+                    category = sys.intern(entry.category) if entry.category else None
+                    compact_entries.append(
+                        CompactEntry(
+                            answer_id=writer.append(entry.answer),
+                            category=category
+                        )
+                    )
+                    yield entry.question
+            
+            try:
+                engine.tfidf_matrix = engine.vectorizer.fit_transform(questions())
+            except ValueError as e:
+                if not compact_entries:
+                    raise CorpusEmptyError("Corpus cannot be empty") from e
+                raise
+        
+        engine.corpus = compact_entries
+        engine.answer_store = AnswerStore(answer_store_dir, cache_size=answer_cache_size)
+        engine._build_category_index()
+        
+        logger.info(f"NLP Engine initialized from stream with {len(compact_entries)} corpus entries")
+        return engine
+    
+    def get_answer(self, corpus_idx: int) -> str:
+        entry = self.corpus[corpus_idx]
+        if self.answer_store is not None:
+            return self.answer_store.get(entry.answer_id)
+        return entry.answer
+    
+    def get_answer_cache_stats(self) -> Optional[CacheStats]:
+        if self.answer_store is None:
+            return None
+        return self.answer_store.get_cache_stats()
+    
+    def _build_vectorizer(self, fast_normalization: bool) -> TfidfVectorizer:
+        return build_tfidf_vectorizer(fast_normalization)
+    
+    def _build_category_index(self):
+        rows_by_category: Dict[Optional[str], List[int]] = {}
+        for idx, entry in enumerate(self.corpus):
+            rows_by_category.setdefault(entry.category, []).append(idx)
+        
+        self.category_rows: Dict[Optional[str], np.ndarray] = {
+            category: np.asarray(rows, dtype=np.int64)
+            for category, rows in rows_by_category.items()
+        }
+        self.category_matrices: Dict[Optional[str], csr_matrix] = {
+            category: self.tfidf_matrix[rows]
+            for category, rows in self.category_rows.items()
+        }
+    
+    def get_categories(self) -> List[str]:
+        return sorted(c for c in self.category_rows if c is not None)
+    
+    def vectorize_query(self, query: str) -> csr_matrix:
+        query_vector = self.query_cache.get(query)
+        if query_vector is None:
+            query_vector = self.vectorizer.transform([query])
+            self.query_cache.put(query, query_vector)
+        return query_vector
+    
+    def compute_similarities(self, query: str) -> np.ndarray:
+        # Rows of tfidf_matrix and the query vector are already L2-normalized,
+        # so the sparse dot product is the cosine similarity.
+        query_vector = self.vectorize_query(query)
+        return (self.tfidf_matrix @ query_vector.T).toarray().ravel()
+    
+    def get_cache_stats(self) -> CacheStats:
+        return self.query_cache.get_stats()
+    
+    def _score_categories(
+        self,
+        query: str,
+        categories: Union[str, Iterable[str]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # Only the sub-matrices of the requested categories are scanned
+        if isinstance(categories, str):
+            categories = [categories]
+        query_vector_t = self.vectorize_query(query).T
+        scores, rows = [], []
+        
+        for category in dict.fromkeys(categories):
+            if category not in self.category_matrices:
+                continue
+            scores.append((self.category_matrices[category] @ query_vector_t).toarray().ravel())
+            rows.append(self.category_rows[category])
+        
+        if not scores:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        return np.concatenate(scores), np.concatenate(rows)
+    
+    def find_top_k(
+        self,
+        query: str,
+        k: int = 3,
+        categories: Optional[Union[str, Iterable[str]]] = None
+    ) -> TopKResult:
+        if not query or not query.strip():
+            raise InvalidQueryError("Query cannot be empty")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        
+        if categories is None:
+            scores = self.compute_similarities(query)
+            rows = None
+        else:
+            scores, rows = self._score_categories(query, categories)
+        
+        candidates = []
+        for position in select_top_k(scores, k):
+            corpus_idx = int(rows[position]) if rows is not None else int(position)
+            entry = self.corpus[corpus_idx]
+            candidates.append(
+                MatchCandidate(
+                    corpus_index=corpus_idx,
+                    answer=self.get_answer(corpus_idx),
+                    score=float(scores[position]),
+                    category=entry.category
+                )
+            )
+        
+        return TopKResult(candidates=candidates)
+    
+    def find_best_match(
+        self,
+        query: str,
+        categories: Optional[Union[str, Iterable[str]]] = None
+    ) -> Tuple[Optional[str], float]:
         if not query or not query.strip():
             raise InvalidQueryError("Query cannot be empty")
         
         try:
-            query_vector = self.vectorizer.transform([query])
-            similarities = cosine_similarity(query_vector, self.tfidf_matrix)[0]
-            
-            best_idx = np.argmax(similarities)
-            best_score = similarities[best_idx]
+            result = self.find_top_k(query, k=1, categories=categories)
+            best_score = result.best_score
             
             logger.debug(f"Query: '{query}' | Best match score: {best_score:.3f}")
             
-            if best_score >= self.similarity_threshold:
-                best_answer = self.corpus[best_idx].answer
-                return best_answer, best_score
+            if result.best and best_score >= self.similarity_threshold:
+                return result.best.answer, best_score
             
             return None, best_score
             
@@ -64,28 +311,361 @@ class NLPEngine:
             raise
     
     def get_fallback_response(self) -> str:
-        return (
-            "Lo siento, no entendí tu pregunta. "
-            "¿Podrías reformularla o preguntar sobre nuestros servicios, "
-            "horarios o ubicación?"
-        )
+        return FALLBACK_RESPONSE
 
 
-def load_corpus_from_json(file_path: Path) -> List[CorpusEntry]:
-    if not file_path.exists():
-        raise FileNotFoundError(f"Corpus file not found: {file_path}")
+def _grow(array: np.ndarray, min_size: int) -> np.ndarray:
+    if len(array) >= min_size:
+        return array
+    grown = np.zeros(max(min_size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class IncrementalNLPEngine:
+    def __init__(
+        self,
+        corpus: Optional[List[CorpusEntry]] = None,
+        similarity_threshold: float = 0.3,
+        renormalize_every: int = 1000,
+        initial_capacity: int = 1024
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.renormalize_every = renormalize_every
+        self.analyzer = build_tfidf_vectorizer().build_analyzer()
+        
+        self.vocabulary: Dict[str, int] = {}
+        self.document_frequency = np.zeros(initial_capacity, dtype=np.int64)
+        self.entries: Dict[int, CorpusEntry] = {}
+        self.entry_rows: Dict[int, int] = {}
+        
+        # Growable CSR buffers: raw term counts are kept next to the tf-idf
+        # weights so rows can be re-weighted when the IDF drifts.
+        self._indptr = np.zeros(initial_capacity + 1, dtype=np.int64)
+        self._indices = np.zeros(initial_capacity * 8, dtype=np.int32)
+        self._counts = np.zeros(initial_capacity * 8, dtype=np.float32)
+        self._data = np.zeros(initial_capacity * 8, dtype=np.float32)
+        self._row_entry_ids = np.zeros(initial_capacity, dtype=np.int64)
+        self._row_alive = np.zeros(initial_capacity, dtype=bool)
+        
+        self.n_rows = 0
+        self.nnz = 0
+        self.n_live = 0
+        self.mutations_since_renormalize = 0
+        self._next_entry_id = 0
+        
+        for entry in corpus or []:
+            self._insert(self._next_entry_id, entry)
+            self._next_entry_id += 1
+        self.renormalize()
+        
+        logger.info(f"Incremental NLP Engine initialized with {self.n_live} corpus entries")
     
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    def _idf(self, term_indices: np.ndarray) -> np.ndarray:
+        # Same smoothed IDF as TfidfVectorizer(smooth_idf=True)
+        return np.log((1 + self.n_live) / (1 + self.document_frequency[term_indices])) + 1
+    
+    def _term_counts(self, text: str, grow_vocabulary: bool) -> Tuple[np.ndarray, np.ndarray]:
+        counts: Dict[int, int] = {}
+        for term in self.analyzer(text):
+            term_idx = self.vocabulary.get(term)
+            if term_idx is None:
+                if not grow_vocabulary:
+                    continue
+                term_idx = len(self.vocabulary)
+                self.vocabulary[term] = term_idx
+            counts[term_idx] = counts.get(term_idx, 0) + 1
+        
+        if grow_vocabulary:
+            self.document_frequency = _grow(self.document_frequency, len(self.vocabulary))
+        
+        term_indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        term_counts = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        order = np.argsort(term_indices)
+        return term_indices[order], term_counts[order]
+    
+    def _weigh(self, term_indices: np.ndarray, term_counts: np.ndarray) -> np.ndarray:
+        weights = (term_counts * self._idf(term_indices)).astype(np.float32)
+        norm = np.linalg.norm(weights)
+        return weights / norm if norm > 0 else weights
     
-    corpus = [
+    def _insert(self, entry_id: int, entry: CorpusEntry):
+        term_indices, term_counts = self._term_counts(entry.question, grow_vocabulary=True)
+        self.document_frequency[term_indices] += 1
+        self.n_live += 1
+        
+        row, start, end = self.n_rows, self.nnz, self.nnz + len(term_indices)
+        self._indptr = _grow(self._indptr, row + 2)
+        self._row_entry_ids = _grow(self._row_entry_ids, row + 1)
+        self._row_alive = _grow(self._row_alive, row + 1)
+        self._indices = _grow(self._indices, end)
+        self._counts = _grow(self._counts, end)
+        self._data = _grow(self._data, end)
+        
+        self._indices[start:end] = term_indices
+        self._counts[start:end] = term_counts
+        self._data[start:end] = self._weigh(term_indices, term_counts)
+        self._indptr[row + 1] = end
+        self._row_entry_ids[row] = entry_id
+        self._row_alive[row] = True
+        
+        self.n_rows += 1
+        self.nnz = end
+        self.entries[entry_id] = entry
+        self.entry_rows[entry_id] = row
+    
+    def _tombstone(self, entry_id: int):
+        row = self.entry_rows.pop(entry_id)
+        self.entries.pop(entry_id)
+        
+        start, end = self._indptr[row], self._indptr[row + 1]
+        self.document_frequency[self._indices[start:end]] -= 1
+        self._data[start:end] = 0.0
+        self._row_alive[row] = False
+        self.n_live -= 1
+    
+    def _record_mutation(self):
+        self.mutations_since_renormalize += 1
+        if self.mutations_since_renormalize >= self.renormalize_every:
+            self.renormalize()
+    
+    def add(self, entry: CorpusEntry) -> int:
+        entry_id = self._next_entry_id
+        self._next_entry_id += 1
+        self._insert(entry_id, entry)
+        self._record_mutation()
+        return entry_id
+    
+    def update(self, entry_id: int, entry: CorpusEntry):
+        if entry_id not in self.entries:
+            raise KeyError(f"Unknown corpus entry id: {entry_id}")
+        self._tombstone(entry_id)
+        self._insert(entry_id, entry)
+        self._record_mutation()
+    
+    def delete(self, entry_id: int):
+        if entry_id not in self.entries:
+            raise KeyError(f"Unknown corpus entry id: {entry_id}")
+        self._tombstone(entry_id)
+        self._record_mutation()
+    
+    def renormalize(self):
+        # Drops tombstoned rows and re-weighs every row with the current IDF
+        row_lengths = np.diff(self._indptr[:self.n_rows + 1])
+        alive = self._row_alive[:self.n_rows]
+        keep = np.repeat(alive, row_lengths)
+        
+        indices = self._indices[:self.nnz][keep]
+        counts = self._counts[:self.nnz][keep]
+        indptr = np.concatenate(([0], np.cumsum(row_lengths[alive])))
+        entry_ids = self._row_entry_ids[:self.n_rows][alive]
+        
+        weights = csr_matrix(
+            (counts * self._idf(indices), indices, indptr),
+            shape=(len(entry_ids), max(len(self.vocabulary), 1)),
+            dtype=np.float32
+        )
+        # sklearn rejects a matrix without rows; an empty index has nothing to normalize
+        if len(entry_ids):
+            normalize(weights, norm='l2', copy=False)
+        
+        self.n_rows, self.nnz = len(entry_ids), len(indices)
+        self._indptr = _grow(indptr.astype(np.int64), self.n_rows + 1)
+        self._indices = _grow(indices, self.nnz)
+        self._counts = _grow(counts, self.nnz)
+        self._data = _grow(weights.data.astype(np.float32), self.nnz)
+        self._row_entry_ids = _grow(entry_ids, self.n_rows)
+        self._row_alive = _grow(np.ones(self.n_rows, dtype=bool), self.n_rows)
+        self.entry_rows = {int(entry_id): row for row, entry_id in enumerate(entry_ids)}
+        self.mutations_since_renormalize = 0
+        
+        logger.debug(f"Renormalized incremental index ({self.n_rows} rows, {len(self.vocabulary)} terms)")
+    
+    @property
+    def tfidf_matrix(self) -> csr_matrix:
+        return csr_matrix(
+            (self._data[:self.nnz], self._indices[:self.nnz], self._indptr[:self.n_rows + 1]),
+            shape=(self.n_rows, max(len(self.vocabulary), 1))
+        )
+    
+    def find_top_k(self, query: str, k: int = 3) -> TopKResult:
+        if not query or not query.strip():
+            raise InvalidQueryError("Query cannot be empty")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        if self.n_live == 0:
+            return TopKResult(candidates=[])
+        
+        term_indices, term_counts = self._term_counts(query, grow_vocabulary=False)
+        # Terms only seen in deleted entries are out of vocabulary for the live corpus
+        known = self.document_frequency[term_indices] > 0
+        term_indices, term_counts = term_indices[known], term_counts[known]
+        query_vector = csr_matrix(
+            (self._weigh(term_indices, term_counts), term_indices, [0, len(term_indices)]),
+            shape=(1, max(len(self.vocabulary), 1))
+        )
+        
+        scores = (self.tfidf_matrix @ query_vector.T).toarray().ravel()
+        scores[~self._row_alive[:self.n_rows]] = -1.0
+        
+        candidates = []
+        for row in select_top_k(scores, min(k, self.n_live)):
+            entry_id = int(self._row_entry_ids[row])
+            entry = self.entries[entry_id]
+            candidates.append(
+                MatchCandidate(
+                    corpus_index=entry_id,
+                    answer=entry.answer,
+                    score=float(scores[row]),
+                    category=entry.category
+                )
+            )
+        return TopKResult(candidates=candidates)
+    
+    def find_best_match(self, query: str) -> Tuple[Optional[str], float]:
+        if not query or not query.strip():
+            raise InvalidQueryError("Query cannot be empty")
+        
+        try:
+            result = self.find_top_k(query, k=1)
+            best_score = result.best_score
+            
+            logger.debug(f"Query: '{query}' | Best incremental match score: {best_score:.3f}")
+            
+            if result.best and best_score >= self.similarity_threshold:
+                return result.best.answer, best_score
+            
+            return None, best_score
+            
+        except Exception as e:
+            logger.error(f"Error finding match for query '{query}': {e}")
+            raise
+    
+    def get_fallback_response(self) -> str:
+        return FALLBACK_RESPONSE
+
+
+def parse_corpus(data: bytes, json_lines: bool = False) -> List[CorpusEntry]:
+    text = data.decode('utf-8')
+    if json_lines:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        records = json.loads(text)['qa_pairs']
+    
+    return [
         CorpusEntry(
             question=qa['question'],
             answer=qa['answer'],
             category=qa.get('category')
         )
-        for qa in data['qa_pairs']
+        for qa in records
     ]
+
+
+def parse_corpus_lines(data: bytes) -> List[CorpusEntry]:
+    return parse_corpus(data, json_lines=True)
+
+
+def load_corpus_from_json(file_path: Path) -> List[CorpusEntry]:
+    if not file_path.exists():
+        raise FileNotFoundError(f"Corpus file not found: {file_path}")
     
+    corpus = parse_corpus(file_path.read_bytes())
     logger.info(f"Loaded {len(corpus)} entries from corpus")
     return corpus
+
+
+def iter_corpus_entries(file_path: Path, chunk_size: int = 1 << 16) -> Iterator[CorpusEntry]:
+    file_path = Path(file_path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"Corpus file not found: {file_path}")
+    
+    records = _iter_json_lines(file_path) if file_path.suffix == ".jsonl" else _iter_qa_pairs_array(file_path, chunk_size)
+    
+    count = 0
+    for qa in records:
+        count += 1
+        yield CorpusEntry(
+            question=qa['question'],
+            answer=qa['answer'],
+            category=qa.get('category')
+        )
+    
+    logger.info(f"Streamed {count} entries from corpus")
+
+
+def _iter_json_lines(file_path: Path) -> Iterator[dict]:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class _ChunkedTextReader:
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+    
+    def read_more(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            return False
+        # Drop the consumed prefix so the buffer stays around one chunk long
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def find(self, token: str) -> int:
+        while True:
+            found = self.buffer.find(token, self.pos)
+            if found >= 0:
+                return found
+            self.pos = max(self.pos, len(self.buffer) - len(token))
+            if not self.read_more():
+                return -1
+    
+    def skip_separators(self) -> bool:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n,':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return True
+            if not self.read_more():
+                return False
+
+
+def _iter_qa_pairs_array(file_path: Path, chunk_size: int) -> Iterator[dict]:
+    # Incrementally decodes the objects of the top-level "qa_pairs" array,
+    # keeping roughly one chunk plus one partial object in memory.
+    decoder = json.JSONDecoder()
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        reader = _ChunkedTextReader(f, chunk_size)
+        
+        key_pos = reader.find('"qa_pairs"')
+        if key_pos < 0:
+            raise ValueError(f"No 'qa_pairs' array found in {file_path}")
+        reader.pos = key_pos + len('"qa_pairs"')
+        
+        array_pos = reader.find('[')
+        if array_pos < 0:
+            raise ValueError(f"Malformed 'qa_pairs' array in {file_path}")
+        reader.pos = array_pos + 1
+        
+        while True:
+            if not reader.skip_separators():
+                raise ValueError(f"Unterminated 'qa_pairs' array in {file_path}")
+            if reader.buffer[reader.pos] == ']':
+                return
+            
+            try:
+                record, end = decoder.raw_decode(reader.buffer, reader.pos)
+            except json.JSONDecodeError:
+                if not reader.read_more():
+                    raise
+                continue
+            
+            reader.pos = end
+            yield record
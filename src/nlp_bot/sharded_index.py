@@ -0,0 +1,173 @@
+import heapq
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from src.common.cache import CacheStats, LRUCache
+from src.common.exceptions import CorpusEmptyError, InvalidQueryError
+from src.common.logger import get_logger
+from src.nlp_bot.nlp_engine import (
+    FALLBACK_RESPONSE,
+    CorpusEntry,
+    MatchCandidate,
+    TopKResult,
+    build_tfidf_vectorizer,
+    select_top_k
+)
+
+logger = get_logger(__name__)
+
+PARTITION_STRATEGIES = ("category", "hash")
+
+
+@dataclass
+class IndexShard:
+    shard_id: str
+    entry_ids: np.ndarray
+    matrix: Optional[csr_matrix] = None
+    
+    def search(self, query_vector_t: csr_matrix, k: int) -> List[Tuple[float, int]]:
+        if self.matrix is None or self.matrix.shape[0] == 0:
+            return []
+        
+        scores = (self.matrix @ query_vector_t).toarray().ravel()
+        top_idx = select_top_k(scores, k)
+        return [(float(scores[i]), int(self.entry_ids[i])) for i in top_idx]
+
+
+class ShardedNLPIndex:
+    def __init__(
+        self,
+        corpus: List[CorpusEntry],
+        similarity_threshold: float = 0.3,
+        partition_by: str = "category",
+        n_hash_shards: int = 4,
+        max_workers: int = 4,
+        query_cache_size: int = 1024
+    ):
+        if not corpus:
+            raise CorpusEmptyError("Corpus cannot be empty")
+        if partition_by not in PARTITION_STRATEGIES:
+            raise ValueError(f"Unsupported partitioning '{partition_by}', expected one of {PARTITION_STRATEGIES}")
+        
+        self.similarity_threshold = similarity_threshold
+        self.partition_by = partition_by
+        self.n_hash_shards = n_hash_shards
+        self.query_cache = LRUCache(max_size=query_cache_size)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard")
+        
+        self.entries: Dict[int, CorpusEntry] = dict(enumerate(corpus))
+        self._next_entry_id = len(corpus)
+        self.shards: Dict[str, IndexShard] = {}
+        
+        self.refit()
+        logger.info(f"Sharded NLP index initialized with {len(corpus)} entries in {len(self.shards)} shards")
+    
+    def shard_key(self, entry: CorpusEntry) -> str:
+        if self.partition_by == "category":
+            return entry.category or "uncategorized"
+        return f"hash-{zlib.crc32(entry.question.encode('utf-8')) % self.n_hash_shards}"
+    
+    def refit(self):
+        # Fits the shared vocabulary and IDF once, then vectorizes every shard against it
+        entry_ids = list(self.entries)
+        self.vectorizer = build_tfidf_vectorizer()
+        self.vectorizer.fit(self.entries[i].question for i in entry_ids)
+        self.query_cache.clear()
+        
+        assignments: Dict[str, List[int]] = {}
+        for entry_id in entry_ids:
+            assignments.setdefault(self.shard_key(self.entries[entry_id]), []).append(entry_id)
+        
+        self.shards = {}
+        for shard_id, ids in assignments.items():
+            self.shards[shard_id] = IndexShard(shard_id=shard_id, entry_ids=np.asarray(ids, dtype=np.int64))
+            self.rebuild_shard(shard_id)
+    
+    def rebuild_shard(self, shard_id: str, entries: Optional[List[CorpusEntry]] = None):
+        # Rebuilds a single shard against the current global vocabulary; terms unseen
+        # at the last refit() are ignored until the next full refit.
+        if entries is not None:
+            old_shard = self.shards.get(shard_id)
+            if old_shard is not None:
+                for entry_id in old_shard.entry_ids:
+                    self.entries.pop(int(entry_id), None)
+            
+            new_ids = []
+            for entry in entries:
+                self.entries[self._next_entry_id] = entry
+                new_ids.append(self._next_entry_id)
+                self._next_entry_id += 1
+            self.shards[shard_id] = IndexShard(shard_id=shard_id, entry_ids=np.asarray(new_ids, dtype=np.int64))
+        
+        shard = self.shards[shard_id]
+        questions = [self.entries[int(i)].question for i in shard.entry_ids]
+        shard.matrix = self.vectorizer.transform(questions) if questions else None
+        logger.info(f"Rebuilt shard '{shard_id}' with {len(questions)} entries")
+    
+    def vectorize_query(self, query: str) -> csr_matrix:
+        query_vector = self.query_cache.get(query)
+        if query_vector is None:
+            query_vector = self.vectorizer.transform([query])
+            self.query_cache.put(query, query_vector)
+        return query_vector
+    
+    def get_cache_stats(self) -> CacheStats:
+        return self.query_cache.get_stats()
+    
+    def find_top_k(self, query: str, k: int = 3, shard_ids: Optional[List[str]] = None) -> TopKResult:
+        if not query or not query.strip():
+            raise InvalidQueryError("Query cannot be empty")
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        
+        query_vector_t = self.vectorize_query(query).T
+        targets = [self.shards[s] for s in (self.shards if shard_ids is None else shard_ids) if s in self.shards]
+        
+        shard_results = self.executor.map(lambda shard: shard.search(query_vector_t, k), targets)
+        # Ties break towards the lower entry id, matching argmax over a single matrix
+        merged = heapq.nlargest(
+            k,
+            (hit for hits in shard_results for hit in hits),
+            key=lambda hit: (hit[0], -hit[1])
+        )
+        
+        candidates = [
+            MatchCandidate(
+                corpus_index=entry_id,
+                answer=self.entries[entry_id].answer,
+                score=score,
+                category=self.entries[entry_id].category
+            )
+            for score, entry_id in merged
+        ]
+        return TopKResult(candidates=candidates)
+    
+    def find_best_match(self, query: str) -> Tuple[Optional[str], float]:
+        if not query or not query.strip():
+            raise InvalidQueryError("Query cannot be empty")
+        
+        try:
+            result = self.find_top_k(query, k=1)
+            best_score = result.best_score
+            
+            logger.debug(f"Query: '{query}' | Best sharded match score: {best_score:.3f}")
+            
+            if result.best and best_score >= self.similarity_threshold:
+                return result.best.answer, best_score
+            
+            return None, best_score
+            
+        except Exception as e:
+            logger.error(f"Error finding match for query '{query}': {e}")
+            raise
+    
+    def get_shard_sizes(self) -> Dict[str, int]:
+        return {shard_id: len(shard.entry_ids) for shard_id, shard in self.shards.items()}
+    
+    def get_fallback_response(self) -> str:
+        return FALLBACK_RESPONSE
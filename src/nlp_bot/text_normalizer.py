@@ -0,0 +1,44 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Tuple
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+ACCENT_TRANSLATION_TABLE = str.maketrans({
+    "á": "a", "é": "e", "í": "i", "ó": "o", "ú": "u",
+    "à": "a", "è": "e", "ì": "i", "ò": "o", "ù": "u",
+    "ä": "a", "ë": "e", "ï": "i", "ö": "o", "ü": "u",
+    "â": "a", "ê": "e", "î": "i", "ô": "o", "û": "u",
+    "ñ": "n", "ç": "c",
+    "¿": " ", "¡": " ", "«": " ", "»": " "
+})
+
+
+def normalize_text(text: str) -> str:
+    normalized = text.lower().translate(ACCENT_TRANSLATION_TABLE)
+    
+    if normalized.isascii():
+        return normalized
+    
+    # Characters outside the Spanish table take the full Unicode decomposition path (same as
+    # sklearn's strip_accents_unicode, without importing sklearn for it)
+    decomposed = unicodedata.normalize("NFKD", normalized)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+@lru_cache(maxsize=8192)
+def tokenize(normalized_text: str) -> Tuple[str, ...]:
+    return tuple(TOKEN_PATTERN.findall(normalized_text))
+
+
+def get_tokenizer_cache_info() -> dict:
+    info = tokenize.cache_info()
+    total = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": round(info.hits / total, 4) if total > 0 else 0.0
+    }
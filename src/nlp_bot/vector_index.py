@@ -0,0 +1,135 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.common.logger import get_logger
+from src.nlp_bot.nlp_engine import select_top_k
+
+logger = get_logger(__name__)
+
+QUANTIZATION_MODES = ("float16", "int8")
+
+
+class QuantizedMatrix:
+    def __init__(self, vectors: np.ndarray, quantization: str = "float16", block_size: int = 4096):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unsupported quantization '{quantization}', expected one of {QUANTIZATION_MODES}")
+        
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.quantization = quantization
+        self.block_size = block_size
+        self.shape = vectors.shape
+        
+        if quantization == "float16":
+            self.data = vectors.astype(np.float16)
+            self.scales = None
+        else:
+            # Symmetric per-row int8 quantization
+            max_abs = np.abs(vectors).max(axis=1)
+            self.scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+            self.data = np.round(vectors / self.scales[:, None]).astype(np.int8)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+    
+    def _dequantize(self, rows: np.ndarray) -> np.ndarray:
+        block = self.data[rows].astype(np.float32)
+        if self.scales is not None:
+            block *= self.scales[rows, None]
+        return block
+    
+    def dot(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        # Dequantize in blocks so the float32 copy never spans the whole matrix
+        if rows is None:
+            rows = np.arange(self.shape[0])
+        
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), self.block_size):
+            block_rows = rows[start:start + self.block_size]
+            scores[start:start + len(block_rows)] = self._dequantize(block_rows) @ query
+        return scores
+
+
+class ExactIndex:
+    def __init__(self, vectors: np.ndarray, quantization: str = "float16"):
+        self.matrix = QuantizedMatrix(vectors, quantization)
+        logger.info(
+            f"Exact index built over {self.matrix.shape[0]} vectors "
+            f"({quantization}, {self.matrix.nbytes / 1024:.1f} KiB)"
+        )
+    
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = self.matrix.dot(query)
+        top_idx = select_top_k(scores, k)
+        return scores[top_idx], top_idx
+
+
+class IVFIndex:
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        quantization: str = "float16",
+        n_lists: Optional[int] = None,
+        n_probe: int = 4,
+        n_iterations: int = 20,
+        seed: int = 42
+    ):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.matrix = QuantizedMatrix(vectors, quantization)
+        self.n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+        self.n_probe = min(n_probe, self.n_lists)
+        
+        self.centroids, assignments = self._train_centroids(vectors, n_iterations, seed)
+        self.inverted_lists: List[np.ndarray] = [
+            np.flatnonzero(assignments == list_id) for list_id in range(self.n_lists)
+        ]
+        
+        logger.info(
+            f"IVF index built over {len(vectors)} vectors with {self.n_lists} lists "
+            f"(n_probe={self.n_probe}, {quantization})"
+        )
+    
+    def _train_centroids(self, vectors: np.ndarray, n_iterations: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Spherical k-means: embeddings are unit-normalized, so assignment uses inner product
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), size=self.n_lists, replace=False)].copy()
+        
+        for _ in range(n_iterations):
+            assignments = self._assign(vectors, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, vectors)
+            norms = np.linalg.norm(sums, axis=1)
+            # Empty lists keep their previous centroid
+            updated = norms > 0
+            centroids[updated] = sums[updated] / norms[updated, None]
+        
+        # The lists must match the centroids probed at query time
+        return centroids, self._assign(vectors, centroids)
+    
+    def _assign(self, vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # In blocks, so the similarity matrix never spans the whole corpus
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), self.matrix.block_size):
+            block = vectors[start:start + self.matrix.block_size]
+            assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        return assignments
+    
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        probe_lists = select_top_k(self.centroids @ query, self.n_probe)
+        candidate_rows = np.concatenate([self.inverted_lists[list_id] for list_id in probe_lists])
+        
+        if len(candidate_rows) == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        
+        scores = self.matrix.dot(query, candidate_rows)
+        top_idx = select_top_k(scores, k)
+        return scores[top_idx], candidate_rows[top_idx]
+
+
+def build_vector_index(vectors: np.ndarray, index_type: str = "exact", quantization: str = "float16"):
+    if index_type == "exact":
+        return ExactIndex(vectors, quantization=quantization)
+    if index_type == "ivf":
+        return IVFIndex(vectors, quantization=quantization)
+    raise ValueError(f"Unsupported vector index type '{index_type}'")
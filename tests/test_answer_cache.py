@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+import pytest
+
+from src.llm_bot.answer_cache import StaleWhileRevalidateCache, WarmAnswerCache, canonical_query
+from src.llm_bot.openai_client import CompletionResult
+
+TTL_SECONDS = 60
+MAX_STALENESS_SECONDS = 3600
+QUERY = "¿Dónde hay sushi?"
+
+
+class StubFetcher:
+    # Stands in for the OpenAI call: slow enough for concurrent callers to overlap
+    def __init__(self, text: str = "Nuevo: Osaka", error: Exception = None):
+        self.calls = 0
+        self.text = text
+        self.error = error
+    
+    async def __call__(self, query: str) -> CompletionResult:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.error is not None:
+            raise self.error
+        return CompletionResult(text=self.text, model="stub", output_tokens=5)
+
+
+def build_cache(tmp_path, fetcher: StubFetcher, age_seconds: float = None) -> StaleWhileRevalidateCache:
+    cache = WarmAnswerCache(tmp_path, "prompt-v1", "stub", ttl_seconds=TTL_SECONDS)
+    if age_seconds is not None:
+        cache.put(QUERY, "Antes: Osaka").created_at = time.time() - age_seconds
+    return StaleWhileRevalidateCache(cache, fetcher, MAX_STALENESS_SECONDS, cacheable_queries=[QUERY])
+
+
+def test_canonical_query_ignores_case_accents_and_punctuation():
+    assert canonical_query("¿Dónde  hay SUSHI?") == canonical_query("donde hay sushi") == "donde hay sushi"
+
+
+@pytest.mark.asyncio
+async def test_fresh_answer_is_served_without_fetching(tmp_path):
+    fetcher = StubFetcher()
+    swr = build_cache(tmp_path, fetcher, age_seconds=1)
+    
+    assert await swr.get(QUERY) == "Antes: Osaka"
+    assert fetcher.calls == 0 and swr.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_answer_is_served_while_one_refresh_runs(tmp_path):
+    fetcher = StubFetcher()
+    swr = build_cache(tmp_path, fetcher, age_seconds=TTL_SECONDS * 2)
+    
+    answers = await asyncio.gather(*(swr.get(QUERY) for _ in range(100)))
+    
+    assert set(answers) == {"Antes: Osaka"}
+    assert swr.stale_hits == 100
+    await swr.drain()
+    assert fetcher.calls == 1
+    # The refreshed answer is served fresh and persisted
+    assert await swr.get(QUERY) == "Nuevo: Osaka"
+    reloaded = WarmAnswerCache(tmp_path, "prompt-v1", "stub")
+    assert reloaded.load() == 1 and reloaded.get(QUERY).answer == "Nuevo: Osaka"
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_the_stale_answer(tmp_path):
+    fetcher = StubFetcher(error=RuntimeError("quota"))
+    swr = build_cache(tmp_path, fetcher, age_seconds=TTL_SECONDS * 2)
+    
+    assert await swr.get(QUERY) == "Antes: Osaka"
+    await swr.drain()
+    assert swr.fetch_failures == 1
+    assert await swr.get(QUERY) == "Antes: Osaka"
+
+
+@pytest.mark.asyncio
+async def test_too_stale_answer_is_refetched_inline(tmp_path):
+    fetcher = StubFetcher()
+    swr = build_cache(tmp_path, fetcher, age_seconds=MAX_STALENESS_SECONDS * 2)
+    
+    assert await swr.get(QUERY) == "Nuevo: Osaka"
+    assert swr.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_too_stale_answer_is_served_when_the_refetch_fails(tmp_path):
+    fetcher = StubFetcher(error=RuntimeError("quota"))
+    swr = build_cache(tmp_path, fetcher, age_seconds=MAX_STALENESS_SECONDS * 2)
+    
+    assert await swr.get(QUERY) == "Antes: Osaka"
+    assert swr.fetch_failures == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_on_a_canonical_query_share_one_fetch(tmp_path):
+    fetcher = StubFetcher()
+    swr = build_cache(tmp_path, fetcher)
+    
+    answers = await asyncio.gather(*(swr.get("donde hay sushi") for _ in range(1000)))
+    
+    assert set(answers) == {"Nuevo: Osaka"}
+    assert fetcher.calls == 1
+    assert swr.get_stats()["refreshes"]["collapsed"] == 999
+
+
+@pytest.mark.asyncio
+async def test_queries_outside_the_canonical_list_are_not_cached(tmp_path):
+    fetcher = StubFetcher()
+    swr = build_cache(tmp_path, fetcher)
+    
+    assert await swr.get("¿Tienen pizza?") is None
+    assert fetcher.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_miss_is_raised(tmp_path):
+    swr = build_cache(tmp_path, StubFetcher(error=RuntimeError("quota")))
+    
+    with pytest.raises(RuntimeError, match="quota"):
+        await swr.get(QUERY)
@@ -0,0 +1,54 @@
+from pathlib import Path
+
+from src.nlp_bot.answer_store import AnswerStore, AnswerStoreWriter, write_answer_store
+from src.nlp_bot.nlp_engine import CompactEntry, NLPEngine, load_corpus_from_json
+
+CORPUS_PATH = Path(__file__).parent.parent / "data" / "corpus" / "qa_pairs.json"
+ANSWERS = ["Osaka, en la calle 70 🍣", "", "Ñandú asado\ncon ají", "x" * 10_000]
+
+
+def test_answers_round_trip_through_the_store(tmp_path):
+    write_answer_store(ANSWERS, tmp_path)
+    store = AnswerStore(tmp_path)
+    
+    assert len(store) == len(ANSWERS)
+    assert [store.get(answer_id) for answer_id in range(len(ANSWERS))] == ANSWERS
+    store.close()
+
+
+def test_writer_returns_sequential_ids(tmp_path):
+    with AnswerStoreWriter(tmp_path) as writer:
+        assert [writer.append(answer) for answer in ANSWERS] == [0, 1, 2, 3]
+
+
+def test_repeated_lookups_are_served_from_the_cache(tmp_path):
+    write_answer_store(ANSWERS, tmp_path)
+    store = AnswerStore(tmp_path, cache_size=2)
+    
+    for answer_id in (0, 0, 0, 2, 3, 0):
+        store.get(answer_id)
+    
+    stats = store.get_cache_stats()
+    # 0 is evicted by 2 and 3 with room for two answers
+    assert (stats.hits, stats.misses) == (2, 4)
+    store.close()
+
+
+def test_empty_store_opens(tmp_path):
+    write_answer_store([], tmp_path)
+    store = AnswerStore(tmp_path)
+    
+    assert len(store) == 0
+    store.close()
+
+
+def test_engine_with_an_answer_store_keeps_answers_out_of_the_corpus(tmp_path):
+    corpus = load_corpus_from_json(CORPUS_PATH)
+    in_memory = NLPEngine(corpus)
+    stored = NLPEngine(corpus, answer_store_dir=tmp_path)
+    
+    assert all(isinstance(entry, CompactEntry) for entry in stored.corpus)
+    for entry in corpus:
+        assert stored.find_best_match(entry.question) == in_memory.find_best_match(entry.question)
+        assert stored.find_top_k(entry.question, k=2) == in_memory.find_top_k(entry.question, k=2)
+    assert stored.get_answer_cache_stats().hits > 0
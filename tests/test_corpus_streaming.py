@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.common.exceptions import CorpusEmptyError
+from src.nlp_bot.nlp_engine import CorpusEntry, NLPEngine, iter_corpus_entries, load_corpus_from_json
+
+CORPUS_PATH = Path(__file__).parent.parent / "data" / "corpus" / "qa_pairs.json"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_streamed_entries_match_the_loaded_corpus(chunk_size):
+    # Small chunks split tokens, strings and escapes across reads
+    assert list(iter_corpus_entries(CORPUS_PATH, chunk_size=chunk_size)) == load_corpus_from_json(CORPUS_PATH)
+
+
+def test_streaming_handles_escapes_and_unicode(tmp_path):
+    pairs = [
+        {"question": 'dice "hola" y \\ adiós', "answer": "línea 1\nlínea 2 🍣", "category": "test"},
+        {"question": "sin categoría", "answer": "{ } [ ] , :"}
+    ]
+    path = tmp_path / "corpus.json"
+    document = {"business_name": "x", "qa_pairs": pairs}
+    path.write_text(json.dumps(document, ensure_ascii=False, indent=2), encoding="utf-8")
+    
+    expected = [CorpusEntry(p["question"], p["answer"], p.get("category")) for p in pairs]
+    assert list(iter_corpus_entries(path, chunk_size=3)) == expected
+
+
+def test_streaming_reads_json_lines(tmp_path):
+    entries = load_corpus_from_json(CORPUS_PATH)
+    path = tmp_path / "corpus.jsonl"
+    path.write_text("\n".join(json.dumps(entry.__dict__) for entry in entries) + "\n\n", encoding="utf-8")
+    
+    assert list(iter_corpus_entries(path)) == entries
+
+
+def test_engine_built_from_a_stream_answers_like_the_in_memory_engine(tmp_path):
+    in_memory = NLPEngine(load_corpus_from_json(CORPUS_PATH))
+    streamed = NLPEngine.from_stream(iter_corpus_entries(CORPUS_PATH, chunk_size=256), tmp_path / "answers")
+    
+    assert len(streamed.corpus) == len(in_memory.corpus)
+    for entry in in_memory.corpus:
+        assert streamed.find_best_match(entry.question) == in_memory.find_best_match(entry.question)
+
+
+def test_engine_from_an_empty_stream_is_rejected(tmp_path):
+    with pytest.raises(CorpusEmptyError):
+        NLPEngine.from_stream(iter([]), tmp_path / "answers")
@@ -0,0 +1,80 @@
+import zlib
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+from src.common.exceptions import CorpusEmptyError, InvalidQueryError
+from src.nlp_bot.dense_engine import DenseEngine
+from src.nlp_bot.nlp_engine import load_corpus_from_json
+from src.nlp_bot.text_normalizer import normalize_text
+
+CORPUS = load_corpus_from_json(Path(__file__).parent.parent / "data" / "corpus" / "qa_pairs.json")
+
+
+class StubEmbedder:
+    # Deterministic bag of hashed words, unit length
+    def __init__(self):
+        self.calls = 0
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        self.calls += 1
+        vectors = np.zeros((len(texts), 512), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in normalize_text(text).split():
+                vectors[row, zlib.crc32(word.encode()) % 512] += 1.0
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+@pytest.mark.parametrize("index_type, quantization", [("exact", "float16"), ("exact", "int8"), ("ivf", "float16")])
+def test_every_corpus_question_finds_its_own_answer(index_type, quantization):
+    engine = DenseEngine(CORPUS, StubEmbedder(), index_type=index_type, quantization=quantization)
+    
+    for entry in CORPUS:
+        answer, score = engine.find_best_match(entry.question)
+        assert answer == entry.answer
+        assert score == pytest.approx(1.0, abs=0.02)
+
+
+def test_top_k_is_ranked_and_carries_categories():
+    engine = DenseEngine(CORPUS, StubEmbedder())
+    
+    result = engine.find_top_k(CORPUS[0].question, k=3)
+    
+    scores = [candidate.score for candidate in result.candidates]
+    assert len(scores) == 3 and scores == sorted(scores, reverse=True)
+    assert result.best.corpus_index == 0 and result.best.category == CORPUS[0].category
+
+
+def test_scores_below_the_threshold_are_not_answers():
+    engine = DenseEngine(CORPUS, StubEmbedder(), similarity_threshold=0.99)
+    
+    answer, score = engine.find_best_match("zzz qqq")
+    
+    assert answer is None and score < 0.99
+
+
+def test_repeated_queries_are_embedded_once():
+    embedder = StubEmbedder()
+    engine = DenseEngine(CORPUS, embedder)
+    corpus_calls = embedder.calls
+    
+    for _ in range(3):
+        engine.find_best_match("¿Dónde hay sushi?")
+    
+    assert embedder.calls == corpus_calls + 1
+    assert engine.get_cache_stats().hits == 2
+
+
+def test_invalid_input_is_rejected():
+    engine = DenseEngine(CORPUS, StubEmbedder())
+    
+    with pytest.raises(InvalidQueryError):
+        engine.find_best_match("   ")
+    with pytest.raises(ValueError):
+        engine.find_top_k("sushi", k=0)
+    with pytest.raises(CorpusEmptyError):
+        DenseEngine([], StubEmbedder())
+    with pytest.raises(ValueError):
+        DenseEngine(CORPUS, StubEmbedder(), index_type="hnsw")
@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.nlp_bot.hashing_engine import HashingNLPEngine
+from src.nlp_bot.nlp_engine import NLPEngine, load_corpus_from_json
+
+ROOT = Path(__file__).parent.parent
+CORPUS = load_corpus_from_json(ROOT / "data" / "corpus" / "qa_pairs.json")
+QUERIES = [query["query"] for query in json.loads((ROOT / "tests" / "test_queries.json").read_text())["test_queries"]]
+# Corpus questions, test queries and a few rephrasings
+PROBES = [entry.question for entry in CORPUS] + QUERIES + ["donde hay sushi barato", "horario del restaurante"]
+
+
+@pytest.fixture(scope="module")
+def tfidf() -> NLPEngine:
+    return NLPEngine(CORPUS)
+
+
+def test_hashed_scores_match_tfidf_without_collisions(tfidf):
+    # Unigrams and bigrams as in the TF-IDF engine; at 2**18 columns nothing in the corpus collides
+    hashed = HashingNLPEngine(CORPUS)
+    
+    for query in PROBES:
+        expected = tfidf.compute_similarities(query)
+        assert np.allclose(hashed.compute_similarities(query), expected, atol=1e-5)
+        assert hashed.find_best_match(query)[0] == tfidf.find_best_match(query)[0]
+
+
+def test_unigram_only_engine_keeps_top_1_quality(tfidf):
+    hashed = HashingNLPEngine(CORPUS, n_bigram_features=0)
+    
+    assert hashed.tfidf_matrix.shape[1] == hashed.n_features
+    for entry in CORPUS:
+        assert hashed.find_best_match(entry.question)[0] == entry.answer
+    agreement = np.mean([
+        hashed.find_top_k(query, k=1).best.corpus_index == tfidf.find_top_k(query, k=1).best.corpus_index
+        for query in QUERIES
+    ])
+    assert agreement >= 0.8
+
+
+def test_small_tables_trade_collisions_for_memory():
+    hashed = HashingNLPEngine(CORPUS, n_features=2 ** 10, n_bigram_features=2 ** 10)
+    
+    assert hashed.tfidf_matrix.shape[1] == 2 ** 11
+    for entry in CORPUS:
+        assert hashed.find_best_match(entry.question)[0] == entry.answer
+
+
+def test_rare_bigrams_are_pruned():
+    hashed = HashingNLPEngine(CORPUS, min_bigram_df=2)
+    full = HashingNLPEngine(CORPUS)
+    
+    mask = hashed.vectorizer.column_mask
+    assert mask[hashed.n_features:].sum() < full.vectorizer.column_mask[full.n_features:].sum()
+    assert np.array_equal(mask[:hashed.n_features], full.vectorizer.column_mask[:full.n_features])
@@ -0,0 +1,134 @@
+import asyncio
+import zlib
+from typing import List
+
+import numpy as np
+import pytest
+
+from src.nlp_bot.dense_engine import DenseEngine
+from src.nlp_bot.hybrid_engine import EmbeddingBatcher, HybridEngine, reciprocal_rank_fusion, weighted_fusion
+from src.nlp_bot.nlp_engine import CorpusEntry, MatchCandidate, NLPEngine, TopKResult
+from src.nlp_bot.text_normalizer import normalize_text
+
+CORPUS = [
+    CorpusEntry("donde puedo comer sushi", "Osaka, en la calle 70", "restaurantes"),
+    CorpusEntry("que restaurantes italianos recomiendas", "La Trattoria", "restaurantes"),
+    CorpusEntry("cual es el horario de atencion", "De 12 a 10 todos los días", "servicio"),
+    CorpusEntry("tienen opciones vegetarianas", "Sí, en la carta verde", "menu"),
+    CorpusEntry("como preparo un ajiaco", "Con tres papas y guascas", "recetas")
+]
+
+
+class StubEmbedder:
+    # Deterministic bag of hashed words, unit length; counts calls to check batching
+    dimension = 256
+    
+    def __init__(self, fail: bool = False):
+        self.calls: List[List[str]] = []
+        self.fail = fail
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("embedding model unavailable")
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in normalize_text(text).split():
+                vectors[row, zlib.crc32(word.encode()) % self.dimension] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+def ranking(*indices: int) -> TopKResult:
+    return TopKResult([
+        MatchCandidate(corpus_index=idx, answer=str(idx), score=1.0 / rank) for rank, idx in enumerate(indices, start=1)
+    ])
+
+
+def build_engine(fusion: str = "rrf") -> HybridEngine:
+    embedder = StubEmbedder()
+    return HybridEngine(NLPEngine(CORPUS), DenseEngine(CORPUS, embedder, index_type="exact"), fusion=fusion)
+
+
+def test_reciprocal_rank_fusion_rewards_agreement_between_rankings():
+    fused = reciprocal_rank_fusion([ranking(0, 1, 2), ranking(1, 3)], rrf_k=60)
+    
+    assert fused[1] == pytest.approx(1 / 62 + 1 / 61)
+    assert [idx for idx, _ in sorted(fused.items(), key=lambda item: item[1], reverse=True)] == [1, 0, 3, 2]
+
+
+def test_weighted_fusion_mixes_raw_scores():
+    fused = weighted_fusion(ranking(0, 1), ranking(1), lexical_weight=0.25)
+    
+    assert fused == pytest.approx({0: 0.25, 1: 0.25 * 0.5 + 0.75})
+
+
+@pytest.mark.parametrize("fusion", ["rrf", "weighted"])
+def test_hybrid_engine_finds_the_matching_entry(fusion):
+    engine = build_engine(fusion)
+    
+    result = engine.find_top_k("donde puedo comer sushi", k=3)
+    
+    assert result.result.best.answer == "Osaka, en la calle 70"
+    scores = [c.score for c in result.result.candidates]
+    assert scores == sorted(scores, reverse=True)
+    assert result.accepted
+    answer, score = engine.find_best_match("donde puedo comer sushi")
+    assert answer == "Osaka, en la calle 70"
+    # Thresholds compare against the retrievers' cosine, not the fused score
+    assert score == pytest.approx(1.0, abs=1e-3)
+
+
+def test_rrf_match_score_is_on_the_cosine_scale():
+    engine = build_engine("rrf")
+    
+    hybrid = engine.find_top_k("cual es el horario", k=1)
+    
+    assert hybrid.result.best_score < 0.05
+    assert hybrid.match_score >= engine.lexical_engine.similarity_threshold
+    assert engine.find_best_match("cual es el horario")[0] == "De 12 a 10 todos los días"
+
+
+def test_unrelated_query_is_not_accepted():
+    engine = build_engine()
+    
+    assert engine.find_best_match("xyzzy plugh") == (None, 0.0)
+
+
+@pytest.mark.asyncio
+async def test_async_search_matches_sync_search():
+    engine = build_engine()
+    queries = [entry.question for entry in CORPUS]
+    
+    results = await asyncio.gather(*(engine.find_top_k_async(query, k=2) for query in queries))
+    
+    for query, hybrid in zip(queries, results):
+        expected = engine.find_top_k(query, k=2)
+        assert [c.corpus_index for c in hybrid.result.candidates] == [
+            c.corpus_index for c in expected.result.candidates
+        ]
+
+
+@pytest.mark.asyncio
+async def test_batcher_embeds_concurrent_texts_in_one_call():
+    embedder = StubEmbedder()
+    batcher = EmbeddingBatcher(embedder, max_batch_size=32, max_wait_ms=20)
+    texts = ["sushi", "pizza", "sushi", "arepas"]
+    
+    vectors = await asyncio.gather(*(batcher.embed(text) for text in texts))
+    
+    assert embedder.calls == [["sushi", "pizza", "arepas"]]
+    assert np.array_equal(vectors[0], vectors[2])
+    assert batcher.get_stats() == {"batches_run": 1, "texts_embedded": 3, "avg_batch_size": 3.0}
+
+
+@pytest.mark.asyncio
+async def test_batcher_flushes_a_full_batch_and_reports_errors_to_every_caller():
+    batcher = EmbeddingBatcher(StubEmbedder(fail=True), max_batch_size=2, max_wait_ms=1000)
+    
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher.embed("sushi"), batcher.embed("pizza"), return_exceptions=True), timeout=1
+    )
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not batcher._tasks
@@ -0,0 +1,32 @@
+from src.nlp_bot.nlp_engine import CorpusEntry, IncrementalNLPEngine
+
+
+def entry(question: str, answer: str) -> CorpusEntry:
+    return CorpusEntry(question=question, answer=answer, category="test")
+
+
+def test_empty_engine_accepts_adds_and_deletes():
+    engine = IncrementalNLPEngine(renormalize_every=1)
+    assert engine.find_top_k("sushi").candidates == []
+    
+    sushi = engine.add(entry("donde comer sushi", "Osaka"))
+    pasta = engine.add(entry("donde comer pasta", "La Trattoria"))
+    assert engine.find_best_match("quiero sushi")[0] == "Osaka"
+    
+    engine.delete(sushi)
+    engine.delete(pasta)
+    assert engine.n_live == 0
+    assert engine.tfidf_matrix.shape[0] == 0
+    assert engine.find_top_k("sushi").candidates == []
+    
+    engine.add(entry("donde comer arepas", "La Puerta Falsa"))
+    assert engine.find_best_match("quiero arepas")[0] == "La Puerta Falsa"
+
+
+def test_deleting_the_last_entry_leaves_a_usable_index():
+    engine = IncrementalNLPEngine([entry("donde comer sushi", "Osaka")], renormalize_every=1)
+    engine.delete(0)
+    assert engine.mutations_since_renormalize == 0
+    
+    engine.add(entry("horario de atencion", "De 12 a 10"))
+    assert engine.find_best_match("cual es el horario")[0] == "De 12 a 10"
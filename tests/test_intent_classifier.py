@@ -0,0 +1,39 @@
+import pytest
+
+from src.llm_bot.intent_classifier import (
+    COURTESY, GREETING, INFORMATION, RECOMMENDATION, OutputBudgetPolicy, classify_intent
+)
+
+
+@pytest.mark.parametrize("text", ["Hola", "¡Buenas tardes!", "Hola, ¿qué tal?", "Buenos días", "hey"])
+def test_bare_greetings_are_greetings(text):
+    assert classify_intent(text) == GREETING
+
+
+@pytest.mark.parametrize("text", [
+    "¿Qué restaurantes italianos hay?",
+    "¿Qué hay de sushi?",
+    "¿Qué tal el ajiaco?",
+    "Buenos días, ¿dónde hay pizza?"
+])
+def test_questions_opening_like_greetings_are_not_greetings(text):
+    assert classify_intent(text) == RECOMMENDATION
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("Muchas gracias", COURTESY),
+    ("Hola, gracias por todo", COURTESY),
+    ("Hola, ¿a qué hora abren?", INFORMATION),
+    ("¿Cuál es el horario del restaurante?", INFORMATION),
+    ("Hola, ¿me recomiendas algo para cenar?", RECOMMENDATION),
+    ("", RECOMMENDATION)
+])
+def test_intents(text, intent):
+    assert classify_intent(text) == intent
+
+
+def test_policy_falls_back_to_the_default_budget():
+    policy = OutputBudgetPolicy(default_budget=500, budgets={GREETING: 120})
+    
+    assert policy.select("Hola") == (GREETING, 120)
+    assert policy.select("¿Qué tal el ajiaco?") == (RECOMMENDATION, 500)
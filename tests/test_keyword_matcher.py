@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from src.analysis.keyword_matcher import match_keywords, match_keywords_batch, relevance_scores, trie_regex
+
+
+@pytest.mark.parametrize("text, keywords, expected", [
+    ("Prueba el AJIACO santafereño", ["ajiaco"], ["ajiaco"]),
+    ("Tenemos café y crêpes", ["cafe", "Crepes"], ["cafe", "Crepes"]),
+    ("Abrimos de lunes a sábado", ["Sábado", "domingo"], ["Sábado"]),
+    ("¿Buscas Ñoquis?", ["ñoquis"], ["ñoquis"])
+])
+def test_case_and_accents_do_not_matter(text, keywords, expected):
+    assert match_keywords(text, keywords) == expected
+
+
+def test_keywords_match_whole_words_only():
+    assert match_keywords("Nuestro wokbar y la sushiteca", ["wok", "sushi"]) == []
+    assert match_keywords("Un wok, y sushi.", ["wok", "sushi"]) == ["wok", "sushi"]
+    assert match_keywords("El menú-del-día", ["menu", "dia"]) == ["menu", "dia"]
+
+
+def test_multiword_keywords_match_across_any_whitespace():
+    assert match_keywords("Hay comida\n   rápida", ["comida rapida"]) == ["comida rapida"]
+    assert match_keywords("Hay comida muy rápida", ["comida rapida"]) == []
+
+
+def test_overlapping_and_nested_keywords_all_match():
+    keywords = ["puerta falsa", "falsa", "pizza", "pizza napolitana", "napolitana"]
+    
+    assert match_keywords("La Puerta Falsa tiene pizza napolitana", keywords) == keywords
+    assert match_keywords("comida rápida entrega", ["comida rapida", "rapida entrega"]) == [
+        "comida rapida", "rapida entrega"
+    ]
+
+
+def test_keywords_keep_their_order_and_spelling():
+    assert match_keywords("sushi y ramen", ["Ramen", "sushi", "pizza"]) == ["Ramen", "sushi"]
+
+
+def test_empty_inputs():
+    assert match_keywords("", ["sushi"]) == []
+    assert match_keywords("sushi", []) == []
+    assert match_keywords("sushi", ["", "  "]) == []
+
+
+def test_batch_matches_per_text_results():
+    texts = ["Sushi en Osaka", "Pizza napolitana", "Sushi en Osaka", "nada"]
+    keyword_sets = [["sushi", "osaka"], ["pizza"], ["osaka"], ["sushi"]]
+    
+    found = match_keywords_batch(texts, keyword_sets)
+    
+    assert found == [match_keywords(text, keywords) for text, keywords in zip(texts, keyword_sets)]
+    # Repeated pairs are matched once but must not share one list
+    repeated = match_keywords_batch(texts[:1] * 2, keyword_sets[:1] * 2)
+    repeated[0].append("x")
+    assert repeated[1] == ["sushi", "osaka"]
+
+
+def test_trie_regex_factors_shared_prefixes():
+    assert trie_regex(["sushi", "sushiteca"]) == "sushi(?:teca)?"
+
+
+def test_relevance_scores():
+    scores = relevance_scores(np.array([0, 1, 3, 0]), np.array([2, 2, 2, 0]))
+    
+    assert scores.tolist() == [0.0, 0.5, 1.0, 1.0]
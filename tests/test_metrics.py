@@ -0,0 +1,121 @@
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.common.cache import CacheStats
+from src.common.health_server import METRICS_CONTENT_TYPE, HealthServer
+from src.common.metrics import Histogram, MetricsRegistry, register_cache_metrics
+from src.common.readiness import Readiness
+
+
+def test_render_uses_the_text_exposition_format():
+    registry = MetricsRegistry(const_labels={"bot": "nlp"})
+    messages = registry.counter("bot_messages_total", "Messages by outcome", ("outcome",))
+    queue = registry.gauge("bot_queue_depth", "Queued updates")
+    messages.inc(outcome="answered")
+    messages.inc(2, outcome="answered")
+    messages.inc(outcome='fallback "x"\n')
+    queue.set(3)
+    queue.dec()
+    
+    assert registry.render().splitlines() == [
+        "# HELP bot_messages_total Messages by outcome",
+        "# TYPE bot_messages_total counter",
+        'bot_messages_total{bot="nlp",outcome="answered"} 3',
+        'bot_messages_total{bot="nlp",outcome="fallback \\"x\\"\\n"} 1',
+        "# HELP bot_queue_depth Queued updates",
+        "# TYPE bot_queue_depth gauge",
+        'bot_queue_depth{bot="nlp"} 2'
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    
+    samples = {(name, labels.get("le")): value for name, labels, value in histogram.samples()}
+    # A value on a bucket bound counts in that bucket
+    assert samples[("latency_seconds_bucket", "0.1")] == 2
+    assert samples[("latency_seconds_bucket", "1.0")] == 3
+    assert samples[("latency_seconds_bucket", "+Inf")] == 4
+    assert samples[("latency_seconds_sum", None)] == pytest.approx(2.65)
+    assert samples[("latency_seconds_count", None)] == 4
+
+
+def test_labels_must_match_the_declared_names():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ("outcome",))
+    
+    with pytest.raises(ValueError):
+        counter.inc(status="ok")
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Requests again")
+
+
+def test_counters_are_safe_across_threads():
+    counter = MetricsRegistry().counter("updates_total", "Updates")
+    threads = [threading.Thread(target=lambda: [counter.inc() for _ in range(10_000)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert counter.get() == 40_000
+
+
+def test_failing_callback_is_skipped_not_fatal():
+    registry = MetricsRegistry()
+    registry.callback("broken", "Always fails", lambda: 1 / 0)
+    register_cache_metrics(registry, "nlp", lambda: {"query": CacheStats(hits=5, misses=2, size=3, max_size=10)})
+    
+    text = registry.render()
+    
+    assert "broken" not in text
+    assert 'nlp_cache_hits_total{cache="query"} 5' in text
+    assert 'nlp_cache_max_entries{cache="query"} 10' in text
+
+
+@pytest.fixture
+def server():
+    registry = MetricsRegistry()
+    registry.counter("bot_messages_total", "Messages").inc()
+    readiness = Readiness("test bot")
+    server = HealthServer(registry, readiness, host="127.0.0.1", port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def get(server: HealthServer, path: str, method: str = "GET"):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.port}{path}", method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.headers["Content-Type"], response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers["Content-Type"], e.read().decode("utf-8")
+
+
+def test_health_server_reports_liveness_and_readiness(server):
+    assert get(server, "/healthz")[0] == 200
+    assert get(server, "/readyz")[0] == 503
+    
+    server.readiness.mark_ready()
+    assert get(server, "/readyz")[:3:2] == (200, "ready\n")
+    server.readiness.mark_not_ready()
+    assert get(server, "/readyz")[0] == 503
+
+
+def test_health_server_serves_metrics(server):
+    status, content_type, body = get(server, "/metrics?x=1")
+    
+    assert (status, content_type) == (200, METRICS_CONTENT_TYPE)
+    assert "bot_messages_total 1" in body.splitlines()
+    assert get(server, "/metrics", method="HEAD")[2] == ""
+
+
+def test_health_server_rejects_other_routes_and_methods(server):
+    assert get(server, "/nope")[0] == 404
+    assert get(server, "/metrics", method="POST")[0] == 405
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.common.config import LLMBotConfig
+from src.common.exceptions import OpenAIError
+from src.llm_bot.answer_cache import first_turn_messages
+from src.llm_bot.openai_client import OpenAIClient
+
+MESSAGES = first_turn_messages("Eres un experto gastronómico.", "¿Qué me recomiendas?")
+
+
+class StubResponses:
+    # Stands in for client.responses: replays texts and records the options of each request
+    def __init__(self, *texts: str):
+        self.texts = list(texts)
+        self.requests = []
+    
+    async def create(self, input, **options):
+        self.requests.append(options)
+        text = self.texts.pop(0)
+        status = "completed" if text else "incomplete"
+        return SimpleNamespace(output_text=text, model=options["model"], status=status, usage=None)
+
+
+def build_client(responses: StubResponses, model: str = "gpt-5-nano", **config) -> OpenAIClient:
+    client = OpenAIClient(LLMBotConfig(token="", openai_api_key="test", model=model, **config))
+    client.client = SimpleNamespace(responses=responses)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_requests_without_a_budget_are_capped_at_max_tokens_with_low_effort():
+    responses = StubResponses("Prueba el ajiaco.")
+    client = build_client(responses)
+    
+    await client.get_completion(MESSAGES)
+    
+    assert responses.requests == [{"model": "gpt-5-nano", "max_output_tokens": 500, "reasoning": {"effort": "minimal"}}]
+
+
+@pytest.mark.asyncio
+async def test_configured_effort_wins():
+    responses = StubResponses("Prueba el ajiaco.")
+    client = build_client(responses, reasoning_effort="medium")
+    
+    await client.get_completion(MESSAGES, max_output_tokens=120)
+    
+    assert responses.requests[0]["reasoning"] == {"effort": "medium"}
+    assert responses.requests[0]["max_output_tokens"] == 120
+
+
+@pytest.mark.asyncio
+async def test_empty_budgeted_answer_is_retried_with_max_tokens():
+    responses = StubResponses("", "Prueba el ajiaco.")
+    client = build_client(responses)
+    
+    result = await client.get_completion(MESSAGES, max_output_tokens=120)
+    
+    assert result.text == "Prueba el ajiaco." and result.budget_retry
+    assert [request["max_output_tokens"] for request in responses.requests] == [120, 500]
+
+
+@pytest.mark.asyncio
+async def test_empty_answer_at_max_tokens_is_retried_without_a_cap():
+    responses = StubResponses("", "Prueba el ajiaco.")
+    client = build_client(responses)
+    
+    result = await client.get_completion(MESSAGES)
+    
+    assert result.text == "Prueba el ajiaco." and result.budget_retry
+    # The retry is the request as it was before caps: default effort, no limit
+    assert responses.requests[1] == {"model": "gpt-5-nano"}
+
+
+@pytest.mark.asyncio
+async def test_answer_empty_after_the_retry_is_an_error():
+    responses = StubResponses("", "")
+    client = build_client(responses)
+    
+    with pytest.raises(OpenAIError):
+        await client.get_completion(MESSAGES)
+    assert len(responses.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_temperature_is_sent_to_models_that_accept_it():
+    responses = StubResponses("Prueba el ajiaco.")
+    client = build_client(responses, model="gpt-4o-mini", temperature=0.3)
+    
+    await client.get_completion(MESSAGES)
+    
+    assert responses.requests == [{"model": "gpt-4o-mini", "max_output_tokens": 500, "temperature": 0.3}]
@@ -0,0 +1,170 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+
+import httpx
+import pytest
+
+from src.common.exceptions import ConfigurationError
+from src.common.hash_ring import HashRing
+from src.common.metrics import MetricsRegistry
+from src.common.readiness import Readiness
+from src.llm_bot.conversation_manager import ConversationManager
+from src.llm_bot.partitioning import SECRET_HEADER, PartitionWorker
+
+USERS = range(1, 20_001)
+NODES = [f"http://worker-{index}:8090" for index in range(4)]
+SECRET = "test-secret"
+
+
+def owners(ring: HashRing) -> Dict[int, str]:
+    return {user_id: ring.owner(user_id) for user_id in USERS}
+
+
+def test_adding_a_node_moves_about_one_in_n_keys_to_it():
+    before = owners(HashRing(NODES))
+    new_node = "http://worker-4:8090"
+    after = owners(HashRing(NODES + [new_node]))
+    
+    moved = [user_id for user_id in USERS if before[user_id] != after[user_id]]
+    # Every key that moves goes to the new node; every other key keeps its worker
+    assert all(after[user_id] == new_node for user_id in moved)
+    assert abs(len(moved) / len(USERS) - 1 / 5) < 0.05
+
+
+def test_removing_a_node_moves_only_its_keys():
+    before = owners(HashRing(NODES))
+    after = owners(HashRing(NODES[1:]))
+    
+    for user_id in USERS:
+        if before[user_id] != NODES[0]:
+            assert after[user_id] == before[user_id]
+        else:
+            assert after[user_id] != NODES[0]
+
+
+class StubBot:
+    # What PartitionWorker uses of an LLMBot, with a real ConversationManager
+    def __init__(self):
+        self.metrics = MetricsRegistry()
+        self.readiness = Readiness("test")
+        self.application = SimpleNamespace(update_queue=asyncio.Queue(), bot=None)
+        self.conversation_manager = ConversationManager()
+        self.config = SimpleNamespace(send_global_rate=30.0, send_global_burst=6)
+        self.global_limits: List[tuple] = []
+        self.send_queue = SimpleNamespace(set_global_limit=lambda rate, burst: self.global_limits.append((rate, burst)))
+
+
+async def start_workers(n: int) -> Dict[str, PartitionWorker]:
+    # Every worker is configured with the URLs of all of them, as from LLM_PARTITION_WORKERS
+    workers = [PartitionWorker(StubBot(), [], SECRET, port=0) for _ in range(n)]
+    for worker in workers:
+        await worker.start()
+    urls = [f"http://127.0.0.1:{worker.port}" for worker in workers]
+    for worker in workers:
+        worker.workers = set(urls)
+    return dict(zip(urls, workers))
+
+
+async def rebalance(workers: Dict[str, PartitionWorker], members: List[str]):
+    # What PartitionRouter._rebalance posts: the new ring to every old and new member
+    async with httpx.AsyncClient(headers={SECRET_HEADER: SECRET}) as client:
+        responses = await asyncio.gather(*(
+            client.post(f"{url}/rebalance", json={"workers": members, "self": url}) for url in workers
+        ))
+    assert all(response.status_code == 200 for response in responses)
+    return sum(response.json()["moved"] for response in responses)
+
+
+def where(workers: Dict[str, PartitionWorker], user_id: int) -> List[str]:
+    return [url for url, worker in workers.items() if user_id in worker.bot.conversation_manager.conversations]
+
+
+@pytest.mark.asyncio
+async def test_conversations_follow_their_owner_across_rebalances():
+    workers = await start_workers(3)
+    urls = sorted(workers)
+    users = range(1, 601)
+    
+    try:
+        # Each user talks to the worker owning them on a two-worker ring
+        await rebalance(workers, urls[:2])
+        two = HashRing(urls[:2])
+        for user_id in users:
+            manager = workers[two.owner(user_id)].bot.conversation_manager
+            manager.add_user_message(user_id, f"hola {user_id}")
+            manager.add_assistant_message(user_id, f"respuesta {user_id}")
+        
+        # A third worker joins: only the users it now owns move, with their history
+        three = HashRing(urls)
+        moved = await rebalance(workers, urls)
+        expected = [user_id for user_id in users if three.owner(user_id) != two.owner(user_id)]
+        assert moved == len(expected)
+        assert all(three.owner(user_id) == urls[2] for user_id in expected)
+        assert abs(moved / len(users) - 1 / 3) < 0.1
+        for user_id in users:
+            assert where(workers, user_id) == [three.owner(user_id)]
+            history = workers[three.owner(user_id)].bot.conversation_manager.get_messages_for_api(user_id, "sys")
+            assert [message["content"] for message in history[1:]] == [f"hola {user_id}", f"respuesta {user_id}"]
+        
+        # Workers share the bot token's global send limit
+        assert workers[urls[0]].bot.global_limits[-1] == (10.0, 2)
+        
+        # The first worker leaves: its users go to the other two, everyone else stays put
+        remaining = HashRing(urls[1:])
+        await rebalance(workers, urls[1:])
+        assert workers[urls[0]].released.is_set()
+        assert not workers[urls[0]].bot.conversation_manager.conversations
+        for user_id in users:
+            owner = remaining.owner(user_id)
+            assert where(workers, user_id) == [owner]
+            if three.owner(user_id) != urls[0]:
+                assert owner == three.owner(user_id)
+    finally:
+        for worker in workers.values():
+            await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_every_route_requires_the_shared_secret():
+    workers = await start_workers(1)
+    url, worker = next(iter(workers.items()))
+    worker.bot.readiness.mark_ready()
+    
+    try:
+        async with httpx.AsyncClient() as client:
+            for headers in ({}, {SECRET_HEADER: "wrong"}):
+                assert (await client.get(f"{url}/readyz", headers=headers)).status_code == 401
+                for path in ("/update", "/rebalance", "/conversations"):
+                    assert (await client.post(f"{url}{path}", json={}, headers=headers)).status_code == 401
+            assert (await client.get(f"{url}/readyz", headers={SECRET_HEADER: SECRET})).status_code == 200
+        assert worker.bot.application.update_queue.empty()
+    finally:
+        await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_rebalance_never_hands_conversations_to_unconfigured_workers():
+    workers = await start_workers(1)
+    url, worker = next(iter(workers.items()))
+    manager = worker.bot.conversation_manager
+    for user_id in range(1, 51):
+        manager.add_user_message(user_id, "hola")
+    
+    try:
+        async with httpx.AsyncClient(headers={SECRET_HEADER: SECRET}) as client:
+            response = await client.post(
+                f"{url}/rebalance", json={"workers": ["http://attacker:8090"], "self": url}
+            )
+        assert response.status_code == 400
+        assert response.json()["workers"] == ["http://attacker:8090"]
+        assert len(manager.conversations) == 50
+        assert not worker.released.is_set()
+    finally:
+        await worker.stop()
+
+
+def test_worker_binds_loopback_and_needs_a_secret():
+    assert PartitionWorker(StubBot(), NODES, SECRET).host == "127.0.0.1"
+    with pytest.raises(ConfigurationError):
+        PartitionWorker(StubBot(), NODES, "")
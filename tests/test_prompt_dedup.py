@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from src.common.config import LLMBotConfig
+from src.common.exceptions import OpenAIError
+from src.llm_bot.answer_cache import first_turn_messages
+from src.llm_bot.openai_client import CompletionResult, OpenAIClient
+
+CONCURRENCY = 1000
+MESSAGES = first_turn_messages("Eres un experto gastronómico.", "Hola")
+
+
+class StubUpstream:
+    # Stands in for OpenAIClient.create_completion: one slow request per call
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.error = error
+    
+    async def __call__(self, messages, max_output_tokens=None) -> CompletionResult:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.error is not None:
+            raise self.error
+        return CompletionResult(text="¡Hola! ¿Qué se te antoja hoy?", model="stub", output_tokens=12, cost_usd=0.001)
+
+
+def build_client(upstream: StubUpstream) -> OpenAIClient:
+    client = OpenAIClient(LLMBotConfig(token="", openai_api_key="test", model="gpt-5-nano"))
+    client.create_completion = upstream
+    return client
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_prompts_share_one_request():
+    upstream = StubUpstream()
+    client = build_client(upstream)
+    
+    results = await asyncio.gather(*(client.get_completion(MESSAGES) for _ in range(CONCURRENCY)))
+    
+    assert upstream.calls == 1
+    assert {result.text for result in results} == {"¡Hola! ¿Qué se te antoja hoy?"}
+    leaders = [result for result in results if not result.shared]
+    followers = [result for result in results if result.shared]
+    assert len(leaders) == 1 and leaders[0].cost_usd == 0.001
+    assert len(followers) == CONCURRENCY - 1
+    assert all(result.cost_usd == 0 for result in followers)
+    assert client.get_dedup_stats().collapsed == CONCURRENCY - 1
+
+
+@pytest.mark.asyncio
+async def test_leader_failure_reaches_every_waiter():
+    upstream = StubUpstream(error=OpenAIError("upstream down"))
+    client = build_client(upstream)
+    
+    results = await asyncio.gather(
+        *(client.get_completion(MESSAGES) for _ in range(CONCURRENCY)),
+        return_exceptions=True
+    )
+    
+    assert upstream.calls == 1
+    assert all(isinstance(result, OpenAIError) for result in results)
+    assert not client.singleflight.is_in_flight(client.prompt_key(MESSAGES))
+    assert client.get_dedup_stats().in_flight == 0
+    
+    # The failed key is not remembered: the next call goes upstream again
+    upstream.error = None
+    assert (await client.get_completion(MESSAGES)).text == "¡Hola! ¿Qué se te antoja hoy?"
+    assert upstream.calls == 2
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from src.common.resources import ResourceLoader
+
+
+@pytest.mark.asyncio
+async def test_reload_of_a_file_missing_at_startup_counts_an_error(tmp_path):
+    path = tmp_path / "corpus.json"
+    loader = ResourceLoader()
+    loader.register("corpus", path, json.loads)
+    with pytest.raises(FileNotFoundError):
+        loader.get("corpus")
+    
+    # What a SIGHUP or a poll runs: no exception escapes, the check is counted
+    assert await loader.reload_async("corpus", force=True) is None
+    assert loader.reload("corpus") is None
+    assert loader.reloads == {("corpus", "error"): 2}
+    
+    # The first successful load is the change that makes the resource available
+    path.write_text(json.dumps({"pairs": []}))
+    loaded = loader.reload("corpus")
+    assert loaded is not None and loaded.value == {"pairs": []}
+    assert loader.get("corpus") is loaded
+    assert loader.reloads == {("corpus", "error"): 2, ("corpus", "changed"): 1}
+
+
+def test_reload_swaps_in_changed_content(tmp_path):
+    path = tmp_path / "prompt.txt"
+    path.write_text("Eres un experto gastronómico.")
+    loader = ResourceLoader()
+    loader.register("prompt", path, bytes.decode)
+    first = loader.get("prompt")
+    
+    assert loader.reload("prompt") is None
+    path.write_text("Eres un sommelier.")
+    reloaded = loader.reload("prompt", force=True)
+    assert reloaded.value == "Eres un sommelier." and reloaded.version != first.version
+    assert loader.get("prompt") is reloaded
+    assert loader.reloads == {("prompt", "unchanged"): 1, ("prompt", "changed"): 1}
+
+
+def test_registering_a_name_again_requires_the_same_path_and_parser(tmp_path):
+    path = tmp_path / "prompt.txt"
+    loader = ResourceLoader()
+    loader.register("prompt", path, bytes.decode)
+    loader.register("prompt", path, bytes.decode)
+    
+    with pytest.raises(ValueError):
+        loader.register("prompt", path, json.loads)
+    with pytest.raises(ValueError):
+        loader.register("prompt", tmp_path / "other.txt", bytes.decode)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from src.analysis.metrics_calculator import QueryResult
+from src.analysis.results_store import (
+    JSONL, NPZ, TEXT_COLUMNS, ResultsStore, columns_to_rows, results_to_columns, summarize_bot
+)
+
+
+def build_results(n: int, response_length: int = 20) -> list:
+    return [
+        QueryResult(
+            query_id=i,
+            query_text=f"¿Dónde hay sushi? {i}",
+            response_text="Osaka 🍣 " * (response_length if i == 0 else 1),
+            response_time_ms=float(i + 1),
+            bot_type="LLM" if i % 2 else "NLP",
+            timestamp="2026-01-01T00:00:00",
+            keywords_found=["sushi"] if i % 3 else [],
+            keywords_expected=["sushi", "osaka"],
+            relevance_score=i / n,
+            category="comida" if i % 2 else "horario",
+            difficulty="easy"
+        )
+        for i in range(n)
+    ]
+
+
+def test_text_columns_are_not_padded_to_the_longest_response():
+    columns = results_to_columns(build_results(100, response_length=10_000), "run-1")
+    
+    for name in TEXT_COLUMNS:
+        assert columns[name].dtype == object
+    assert len(columns["response_text"][1]) == len("Osaka 🍣 ")
+
+
+@pytest.mark.parametrize("store_format", [NPZ, JSONL])
+def test_runs_round_trip_through_the_store(tmp_path, store_format):
+    results = build_results(10)
+    store = ResultsStore(tmp_path, store_format)
+    store.append_run(results[:6], run_id="a")
+    store.append_run(results[6:], run_id="b")
+    
+    columns = store.load()
+    
+    assert store.run_ids() == ["a", "b"]
+    assert columns_to_rows(columns)[:6] == columns_to_rows(results_to_columns(results[:6], "a"))
+    assert [row["response_text"] for row in columns_to_rows(columns)] == [r.response_text for r in results]
+    assert list(store.load_run()["query_id"]) == [6, 7, 8, 9]
+
+
+def test_compaction_keeps_every_row(tmp_path):
+    store = ResultsStore(tmp_path, NPZ, compact_threshold=3)
+    for index in range(5):
+        store.append_run(build_results(4), run_id=f"{index:02d}")
+    
+    assert len(store.run_files()) < 5
+    assert store.run_ids() == ["00", "01", "02", "03", "04"]
+    assert len(store.load()["run_id"]) == 20
+
+
+def test_npz_files_with_fixed_width_text_still_load(tmp_path):
+    # Written by earlier versions, which stored text as '<U' arrays
+    columns = results_to_columns(build_results(4), "old")
+    arrays = {name: values.astype(str) if values.dtype == object else values for name, values in columns.items()}
+    np.savez_compressed(tmp_path / "run-old.npz", **arrays)
+    store = ResultsStore(tmp_path, NPZ)
+    store.append_run(build_results(2), run_id="p")
+    
+    loaded = store.load()
+    
+    assert store.run_ids() == ["old", "p"]
+    assert loaded["response_text"].dtype == object
+    assert columns_to_rows(loaded)[:4] == columns_to_rows(columns)
+
+
+def test_summary_matches_the_results():
+    results = build_results(10)
+    summary = summarize_bot(results_to_columns(results, "run-1"), "LLM")
+    llm = [r for r in results if r.bot_type == "LLM"]
+    
+    assert summary["total_queries"] == len(llm)
+    assert summary["avg_response_time_ms"] == pytest.approx(np.mean([r.response_time_ms for r in llm]))
+    assert summary["accuracy_by_category"] == {"comida": pytest.approx(np.mean([r.relevance_score for r in llm]))}
+    assert summary["total_keywords_found"] == sum(len(r.keywords_found) for r in llm)
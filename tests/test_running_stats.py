@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.analysis.evaluator import Evaluator
+from src.analysis.running_stats import P2Quantile, RunningStats
+
+
+def latencies(n: int, seed: int = 11) -> np.ndarray:
+    # Right-skewed like response times
+    return np.random.default_rng(seed).lognormal(mean=-1.0, sigma=0.6, size=n)
+
+
+@pytest.mark.parametrize("q", [0.5, 0.95, 0.99])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_p2_quantiles_track_numpy(q, seed):
+    values = latencies(20_000, seed)
+    estimator = P2Quantile(q)
+    for value in values.tolist():
+        estimator.add(value)
+    
+    assert estimator.value() == pytest.approx(np.quantile(values, q), rel=0.03)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4])
+def test_p2_is_exact_below_five_values(n):
+    values = [0.3, 0.1, 0.4, 0.2][:n]
+    for q in (0.5, 0.95):
+        estimator = P2Quantile(q)
+        for value in values:
+            estimator.add(value)
+        assert estimator.value() == pytest.approx(np.quantile(values, q))
+
+
+def test_p2_on_sorted_input():
+    estimator = P2Quantile(0.95)
+    for value in range(10_000):
+        estimator.add(float(value))
+    
+    assert estimator.value() == pytest.approx(np.quantile(np.arange(10_000), 0.95), rel=0.01)
+
+
+def test_running_moments_match_numpy():
+    # A large offset is where the naive sum-of-squares variance loses its digits
+    values = 1e9 + latencies(10_000)
+    stats = RunningStats()
+    for value in values.tolist():
+        stats.add(value)
+    
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert stats.variance == pytest.approx(values.var(ddof=1), rel=1e-6)
+    assert (stats.minimum, stats.maximum) == (values.min(), values.max())
+
+
+def test_summary_is_scaled():
+    stats = RunningStats()
+    for value in (0.1, 0.2, 0.3):
+        stats.add(value)
+    
+    summary = stats.to_dict(scale=1000)
+    assert summary["count"] == 3
+    assert summary["mean"] == 200.0 and summary["min"] == 100.0 and summary["max"] == 300.0
+    assert summary["p50"] == 200.0
+    assert set(summary) == {"count", "mean", "stddev", "min", "max", "p50", "p95", "p99"}
+    assert RunningStats().to_dict() == {"count": 0}
+
+
+def test_evaluator_streams_responses_and_keeps_the_aggregates(tmp_path):
+    stream_path = tmp_path / "responses.jsonl"
+    with Evaluator(stream_path=stream_path) as evaluator:
+        for index, seconds in enumerate(latencies(200).tolist()):
+            evaluator.add_nlp_response(f"q{index}", "respuesta", seconds / 100)
+            evaluator.add_llm_response(f"q{index}", "respuesta", seconds)
+        evaluator.save_results(tmp_path / "results.json")
+    
+    assert evaluator.nlp_responses == [] and evaluator.llm_responses == []
+    assert len(stream_path.read_text(encoding="utf-8").splitlines()) == 400
+    saved = json.loads((tmp_path / "results.json").read_text(encoding="utf-8"))
+    assert saved["responses_path"] == str(stream_path)
+    metrics = saved["metrics"]
+    assert metrics["total_queries"] == 200
+    assert metrics["speed_comparison"] == "NLP is faster"
+    assert metrics["llm_avg_response_time_ms"] == pytest.approx(latencies(200).mean() * 1000, abs=0.01)
+
+
+def test_evaluator_without_both_bots_has_no_metrics():
+    evaluator = Evaluator()
+    evaluator.add_nlp_response("q", "respuesta", 0.01)
+    
+    assert evaluator.calculate_metrics() is None
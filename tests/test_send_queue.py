@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Tuple
+
+import pytest
+from telegram.error import BadRequest
+
+from src.common.send_queue import SendQueue
+
+
+class StubSend:
+    # Stands in for Bot.send_message: records what was sent to which chat and when
+    def __init__(self, latency: float = 0.0, reject_formatting: bool = False, reject_all: bool = False):
+        self.latency = latency
+        self.reject_formatting = reject_formatting
+        self.reject_all = reject_all
+        self.sent: List[Tuple[float, int, str, Dict]] = []
+        self.rng = random.Random(5)
+    
+    async def __call__(self, chat_id: int, text: str, **options):
+        started = time.monotonic()
+        await asyncio.sleep(self.rng.uniform(0, self.latency))
+        if self.reject_all or (self.reject_formatting and "parse_mode" in options):
+            raise BadRequest("Can't parse entities: can't find end of the entity")
+        self.sent.append((started, chat_id, text, options))
+    
+    def texts(self, chat_id: int) -> List[str]:
+        return [text for _, chat, text, _ in self.sent if chat == chat_id]
+
+
+def assert_within_rate(times: List[float], rate: float, burst: int):
+    # A token bucket allows at most burst + rate * t sends in any window of t seconds
+    times = sorted(times)
+    for first in range(len(times)):
+        for last in range(first, len(times)):
+            window = times[last] - times[first]
+            assert last - first + 1 <= burst + rate * (window + 0.02)
+
+
+async def run(queue: SendQueue, messages: List[Tuple[int, str]], **options):
+    queue.start()
+    for chat_id, text in messages:
+        await queue.enqueue(chat_id, text, **options)
+    await queue.close(timeout=10)
+    assert queue.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_messages_to_a_chat_keep_their_order():
+    send = StubSend(latency=0.01)
+    queue = SendQueue(send, global_rate=1000, global_burst=50, chat_rate=1000, chat_burst=50)
+    # Interleaved chats, with short and long (split) replies mixed in each
+    messages = [
+        (chat_id, f"m{index} " + "word " * (900 if index % 4 == 0 else 5))
+        for index in range(30) for chat_id in (1, 2, 3)
+    ]
+    
+    await run(queue, messages)
+    
+    for chat_id in (1, 2, 3):
+        tags = [text.split(" ", 1)[0] for text in send.texts(chat_id) if text.startswith("m")]
+        assert tags == [f"m{index}" for index in range(30)]
+    assert queue.messages_total.get(outcome="sent") == len(send.sent)
+
+
+@pytest.mark.asyncio
+async def test_sends_to_one_chat_stay_within_the_chat_rate():
+    send = StubSend()
+    queue = SendQueue(send, global_rate=1000, global_burst=50, chat_rate=20, chat_burst=2)
+    
+    await run(queue, [(1, f"m{index}") for index in range(12)])
+    
+    times = [started for started, _, _, _ in send.sent]
+    assert len(times) == 12
+    assert times[-1] - times[0] >= (12 - 2) / 20 - 0.02
+    assert_within_rate(times, rate=20, burst=2)
+
+
+@pytest.mark.asyncio
+async def test_sends_across_chats_stay_within_the_global_rate():
+    send = StubSend()
+    queue = SendQueue(send, global_rate=50, global_burst=5, chat_rate=1000, chat_burst=50)
+    
+    await run(queue, [(chat_id, f"m{index}") for index in range(5) for chat_id in range(8)])
+    
+    times = [started for started, _, _, _ in send.sent]
+    assert len(times) == 40
+    assert times[-1] - times[0] >= (40 - 5) / 50 - 0.02
+    assert_within_rate(times, rate=50, burst=5)
+
+
+@pytest.mark.asyncio
+async def test_empty_message_is_counted_and_not_sent(caplog):
+    send = StubSend()
+    queue = SendQueue(send)
+    
+    with caplog.at_level(logging.WARNING):
+        await run(queue, [(7, "  \n")])
+    
+    assert send.sent == []
+    assert queue.failures_total.get(reason="empty") == 1
+    assert queue.messages_total.get(outcome="failed") == 1
+    assert "chat 7" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_rejected_markdown_is_resent_as_plain_text():
+    send = StubSend(reject_formatting=True)
+    queue = SendQueue(send)
+    
+    await run(queue, [(7, "*unbalanced markdown")], parse_mode="Markdown")
+    
+    assert [(text, options) for _, _, text, options in send.sent] == [("*unbalanced markdown", {})]
+    assert queue.retries_total.get(reason="formatting") == 1
+    assert queue.messages_total.get(outcome="sent") == 1
+    assert queue.failures_total.get(reason="rejected") == 0
+
+
+@pytest.mark.asyncio
+async def test_rejected_message_is_counted_and_logged(caplog):
+    send = StubSend(reject_all=True)
+    queue = SendQueue(send)
+    
+    with caplog.at_level(logging.WARNING):
+        await run(queue, [(7, "hola"), (7, "*negrita*")], parse_mode="Markdown")
+    
+    assert send.sent == []
+    assert queue.failures_total.get(reason="rejected") == 2
+    assert queue.messages_total.get(outcome="failed") == 2
+    assert "chat 7" in caplog.text
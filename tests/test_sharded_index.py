@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.nlp_bot.nlp_engine import CorpusEntry, NLPEngine, load_corpus_from_json
+from src.nlp_bot.sharded_index import ShardedNLPIndex
+
+ROOT = Path(__file__).parent.parent
+CORPUS = load_corpus_from_json(ROOT / "data" / "corpus" / "qa_pairs.json")
+QUERIES = [query["query"] for query in json.loads((ROOT / "tests" / "test_queries.json").read_text())["test_queries"]]
+
+
+@pytest.fixture(scope="module")
+def unsharded() -> NLPEngine:
+    return NLPEngine(CORPUS)
+
+
+def assert_same_top_k(result, expected):
+    scores = [c.score for c in expected.candidates]
+    assert np.allclose([c.score for c in result.candidates], scores)
+    # Which of the entries tied with the k-th score make the cut is arbitrary; the rest must agree
+    cutoff = scores[-1] + 1e-9
+    assert {c.corpus_index for c in result.candidates if c.score > cutoff} == {
+        c.corpus_index for c in expected.candidates if c.score > cutoff
+    }
+
+
+@pytest.mark.parametrize("partition_by", ["category", "hash"])
+def test_sharded_top_k_matches_unsharded_search(unsharded, partition_by):
+    sharded = ShardedNLPIndex(CORPUS, partition_by=partition_by, n_hash_shards=4)
+    assert sum(sharded.get_shard_sizes().values()) == len(CORPUS)
+    
+    for query in QUERIES:
+        for k in (1, 5):
+            assert_same_top_k(sharded.find_top_k(query, k=k), unsharded.find_top_k(query, k=k))
+        assert sharded.find_best_match(query)[0] == unsharded.find_best_match(query)[0]
+
+
+def test_searching_selected_shards_matches_category_filtering(unsharded):
+    sharded = ShardedNLPIndex(CORPUS, partition_by="category")
+    category = sorted(sharded.shards)[0]
+    
+    for query in QUERIES[:10]:
+        result = sharded.find_top_k(query, k=3, shard_ids=[category])
+        assert all(c.category == category for c in result.candidates)
+        assert_same_top_k(result, unsharded.find_top_k(query, k=3, categories=category))
+
+
+def test_empty_shard_selection_searches_nothing():
+    sharded = ShardedNLPIndex(CORPUS, partition_by="category")
+    
+    assert sharded.find_top_k(QUERIES[0], k=3, shard_ids=[]).candidates == []
+    assert sharded.find_top_k(QUERIES[0], k=3, shard_ids=["no-such-shard"]).candidates == []
+
+
+def test_rebuilt_shard_serves_its_new_entries():
+    sharded = ShardedNLPIndex(CORPUS, partition_by="category")
+    category = sorted(sharded.shards)[0]
+    question = CORPUS[[entry.category for entry in CORPUS].index(category)].question
+    
+    sharded.rebuild_shard(category, [CorpusEntry(question, "respuesta nueva", category)])
+    
+    assert sharded.get_shard_sizes()[category] == 1
+    assert sharded.find_best_match(question)[0] == "respuesta nueva"
+    assert len(sharded.entries) == len(CORPUS) - sum(entry.category == category for entry in CORPUS) + 1
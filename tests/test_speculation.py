@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import pytest
+
+from src.common.speculation import (
+    ACCEPTED, DEADLINE, FAST, SLOW, SLOW_FAILED, SLOW_READY, JsonLinesLog, SpeculativeRacer
+)
+
+DEADLINE_SECONDS = 0.05
+
+
+def producer(value, delay: float = 0.0, error: Exception = None):
+    async def produce():
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return value
+    return produce
+
+
+def accept(score: float) -> bool:
+    return score >= 0.8
+
+
+def usable(score: float) -> bool:
+    return score >= 0.3
+
+
+async def race(fast, slow, settled=None):
+    racer = SpeculativeRacer(DEADLINE_SECONDS, on_settled=settled.append if settled is not None else None)
+    outcome = await racer.race(fast, slow, accept, usable, context={"query": "sushi"})
+    return racer, outcome
+
+
+@pytest.mark.asyncio
+async def test_accepted_fast_value_is_served_and_the_slow_call_settles_later():
+    settled = []
+    racer, outcome = await race(producer(0.9), producer("llm", delay=0.1), settled)
+    
+    assert (outcome.value, outcome.source, outcome.reason) == (0.9, FAST, ACCEPTED)
+    assert outcome.served_ms < 50
+    assert racer.pending_count() == 1 and settled == []
+    
+    await racer.drain()
+    assert racer.pending_count() == 0
+    assert settled == [outcome] and outcome.slow_value == "llm"
+    assert outcome.to_dict()["query"] == "sushi"
+
+
+@pytest.mark.asyncio
+async def test_slow_value_within_the_deadline_wins_over_a_weak_match():
+    settled = []
+    _, outcome = await race(producer(0.5), producer("llm", delay=0.01), settled)
+    
+    assert (outcome.value, outcome.source, outcome.reason) == ("llm", SLOW, SLOW_READY)
+    assert settled == [outcome]
+
+
+@pytest.mark.asyncio
+async def test_usable_fast_value_is_served_at_the_deadline():
+    settled = []
+    racer, outcome = await race(producer(0.5), producer("llm", delay=0.2), settled)
+    
+    assert (outcome.value, outcome.source, outcome.reason) == (0.5, FAST, DEADLINE)
+    assert DEADLINE_SECONDS * 1000 <= outcome.served_ms < 200
+    await racer.drain()
+    assert outcome.slow_value == "llm"
+
+
+@pytest.mark.asyncio
+async def test_slow_value_is_awaited_past_the_deadline_without_a_usable_fallback():
+    _, outcome = await race(producer(0.1), producer("llm", delay=0.1))
+    
+    assert (outcome.value, outcome.source) == ("llm", SLOW)
+    assert outcome.served_ms >= 100
+
+
+@pytest.mark.asyncio
+async def test_failed_fast_path_falls_through_to_the_slow_value():
+    _, outcome = await race(producer(None, error=RuntimeError("index down")), producer("llm", delay=0.01))
+    
+    assert outcome.fast_value is None
+    assert (outcome.value, outcome.source) == ("llm", SLOW)
+
+
+@pytest.mark.asyncio
+async def test_slow_failure_serves_a_usable_fast_value():
+    settled = []
+    _, outcome = await race(producer(0.5), producer(None, delay=0.01, error=RuntimeError("quota")), settled)
+    
+    assert (outcome.value, outcome.source, outcome.reason) == (0.5, FAST, SLOW_FAILED)
+    assert outcome.slow_error == "quota"
+    assert settled == [outcome]
+
+
+@pytest.mark.asyncio
+async def test_slow_failure_without_a_usable_fast_value_is_raised():
+    settled = []
+    with pytest.raises(RuntimeError, match="quota"):
+        await race(producer(0.1), producer(None, delay=0.01, error=RuntimeError("quota")), settled)
+    assert settled[0].reason == SLOW_FAILED
+
+
+@pytest.mark.asyncio
+async def test_log_appends_records_in_order(tmp_path):
+    log = JsonLinesLog(tmp_path / "logs" / "speculation.jsonl")
+    
+    for i in range(100):
+        log.append({"i": i, "query": "¿dónde hay sushi?"})
+        if i % 10 == 0:
+            await asyncio.sleep(0)
+    await log.close()
+    
+    records = [json.loads(line) for line in log.path.read_text(encoding="utf-8").splitlines()]
+    assert [record["i"] for record in records] == list(range(100))
+    assert records[0]["query"] == "¿dónde hay sushi?"
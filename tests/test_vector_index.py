@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from src.nlp_bot.vector_index import ExactIndex, IVFIndex, QuantizedMatrix
+
+
+def unit_vectors(n: int, dim: int = 32, seed: int = 3) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_quantized_scores_stay_close_to_float32(quantization):
+    vectors = unit_vectors(500)
+    query = vectors[7]
+    matrix = QuantizedMatrix(vectors, quantization, block_size=64)
+    
+    assert np.allclose(matrix.dot(query), vectors @ query, atol=0.02)
+    rows = np.array([3, 7, 499])
+    assert np.allclose(matrix.dot(query, rows), vectors[rows] @ query, atol=0.02)
+
+
+@pytest.mark.parametrize("quantization", ["float16", "int8"])
+def test_exact_index_returns_the_true_top_k(quantization):
+    vectors = unit_vectors(500)
+    index = ExactIndex(vectors, quantization)
+    
+    for row in (0, 123, 499):
+        scores, rows = index.search(vectors[row], k=5)
+        assert rows[0] == row
+        assert list(scores) == sorted(scores, reverse=True)
+        assert set(rows) == set(np.argsort(-(vectors @ vectors[row]))[:5])
+
+
+def test_ivf_lists_match_the_final_centroids():
+    vectors = unit_vectors(1000)
+    index = IVFIndex(vectors, n_lists=16, n_probe=1)
+    
+    assert sorted(np.concatenate(index.inverted_lists)) == list(range(1000))
+    nearest = np.argmax(vectors @ index.centroids.T, axis=1)
+    for list_id, rows in enumerate(index.inverted_lists):
+        assert np.all(nearest[rows] == list_id)
+
+
+def test_ivf_finds_every_stored_vector_with_one_probe():
+    vectors = unit_vectors(1000)
+    index = IVFIndex(vectors, n_lists=16, n_probe=1)
+    
+    # A stored vector's own list is the one its nearest centroid owns
+    assert all(index.search(vectors[row], k=1)[1][0] == row for row in range(0, 1000, 7))
+
+
+def test_ivf_with_every_list_probed_matches_exact_search():
+    vectors = unit_vectors(1000)
+    ivf = IVFIndex(vectors, n_lists=16, n_probe=16)
+    exact = ExactIndex(vectors)
+    
+    for row in (5, 500, 995):
+        query = vectors[row] * 0.9 + vectors[row + 1] * 0.1
+        assert list(ivf.search(query, 10)[1]) == list(exact.search(query, 10)[1])